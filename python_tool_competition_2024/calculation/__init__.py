@@ -19,38 +19,147 @@
 #
 """Calculation functions for generating results."""
 
-
-import shutil
+from __future__ import annotations
 
 from ..config import Config
+from ..generation_results import (
+    TestGenerationCandidates,
+    TestGenerationResult,
+    TestGenerationSuccess,
+)
+from ..previous_results import keep_previous_results
 from ..results import Result, Results, get_result, get_results
 from ..target_finder import Target
-from .coverage_caluclator import calculate_coverages
-from .generation_results_calculator import calculate_generation_result
+from ..target_index import build_target_index
+from .candidates_calculator import select_best_candidate
+from .coverage_caluclator import (
+    CoverageCalculatorName,
+    Coverages,
+    calculate_all_coverages,
+)
+from .coverage_map_calculator import calculate_coverage_map
+from .generated_test_minimizer import minimize_generated_test
+from .generated_test_validator import validate_generated_test
+from .generation_results_calculator import calculate_generation_results
+from .generator_runner import SUBINTERPRETERS_SUPPORTED, GeneratorIsolation
 from .mutation_calculator import MutationCalculatorName, calculate_mutation
 
 
-def calculate_results(
+def calculate_results(  # noqa: PLR0913
     targets: tuple[Target, ...],
     config: Config,
     mutation_calculator_name: MutationCalculatorName,
+    isolation: GeneratorIsolation,
+    generation_workers: int,
+    *,
+    coverage_calculator_name: CoverageCalculatorName,
+    minimize_tests: bool,
+    record_coverage_map: bool,
 ) -> Results:
-    """Calculate the results for all targets."""
-    if config.results_dir.exists():
-        shutil.rmtree(config.results_dir)
+    """
+    Calculate the results for all targets.
+
+    First the tests of all targets are generated with the number of generation
+    workers. Afterwards the coverages of all tests are measured and at last the
+    mutation analysis is run for one target after the other. If
+    `minimize_tests` is set, redundant test functions are removed from the
+    generated tests before they are evaluated. If `record_coverage_map` is set,
+    the coverages of every test function are stored in the coverages directory
+    before the mutation analysis, which then only runs the test functions that
+    executed a mutant. The results of the previous run are moved
+    aside, so generators can access them through `FileInfo`.
+    """
+    if isolation is GeneratorIsolation.SUBINTERPRETER and not SUBINTERPRETERS_SUPPORTED:
+        config.console.print(
+            "Sub-interpreters are not supported by this Python version. "
+            "Running the generator in the same interpreter.",
+            style="yellow",
+        )
+    keep_previous_results(config)
     config.results_dir.mkdir(parents=True)
+    build_target_index((target.source for target in targets), config)
+    generation_results = calculate_generation_results(
+        targets, config, isolation, generation_workers
+    )
+    prepared_results = tuple(
+        _prepare_test(
+            target,
+            generation_result,
+            config,
+            coverage_calculator_name,
+            minimize_tests=minimize_tests,
+        )
+        for target, generation_result in zip(targets, generation_results)
+    )
+    missing_coverages = iter(
+        calculate_all_coverages(
+            tuple(
+                target
+                for target, (_, coverages) in zip(targets, prepared_results)
+                if coverages is None
+            ),
+            config,
+            coverage_calculator_name,
+        )
+    )
     return get_results(
-        _calculate_result(target, config, mutation_calculator_name)
-        for target in targets
+        _calculate_result(
+            target,
+            generation_result,
+            next(missing_coverages) if coverages is None else coverages,
+            config,
+            mutation_calculator_name,
+            record_coverage_map=record_coverage_map,
+        )
+        for target, (generation_result, coverages) in zip(targets, prepared_results)
     )
 
 
-def _calculate_result(
-    target: Target, config: Config, mutation_calculator_name: MutationCalculatorName
+def _prepare_test(
+    target: Target,
+    generation_result: TestGenerationResult,
+    config: Config,
+    coverage_calculator_name: CoverageCalculatorName,
+    *,
+    minimize_tests: bool,
+) -> tuple[TestGenerationResult, Coverages | None]:
+    """Select, validate and minimize the test before the coverages are measured."""
+    if isinstance(generation_result, TestGenerationCandidates):
+        # the coverages of the best candidate are already known
+        best_candidate, coverages = select_best_candidate(
+            target, config, generation_result, coverage_calculator_name
+        )
+        if minimize_tests:
+            minimize_generated_test(target, config)
+        return best_candidate, coverages
+    if (
+        isinstance(generation_result, TestGenerationSuccess)
+        and validate_generated_test(target, config)
+        and minimize_tests
+    ):
+        minimize_generated_test(target, config)
+    return generation_result, None
+
+
+def _calculate_result(  # noqa: PLR0913
+    target: Target,
+    generation_result: TestGenerationResult,
+    coverages: Coverages,
+    config: Config,
+    mutation_calculator_name: MutationCalculatorName,
+    *,
+    record_coverage_map: bool,
 ) -> Result:
-    generation_result = calculate_generation_result(target, config)
-    coverages = calculate_coverages(target, config)
-    mutation = calculate_mutation(target, config, mutation_calculator_name)
+    coverage_map = (
+        calculate_coverage_map(target, config) if record_coverage_map else None
+    )
+    mutation = calculate_mutation(
+        target,
+        config,
+        mutation_calculator_name,
+        coverages.missing_lines or (),
+        coverage_map,
+    )
     return get_result(
         target=target,
         generation_result=generation_result,
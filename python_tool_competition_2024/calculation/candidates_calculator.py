@@ -0,0 +1,136 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Calculator to select the best of multiple candidate tests."""
+
+import dataclasses
+import shutil
+from pathlib import Path
+
+from ..config import Config
+from ..generation_results import TestGenerationCandidates, TestGenerationSuccess
+from ..target_finder import Target
+from .coverage_caluclator import (
+    CoverageCalculatorName,
+    Coverages,
+    calculate_coverages,
+    calculate_parallel_coverages,
+    get_coverage_xml,
+)
+from .generated_test_validator import validate_generated_test
+from .generation_results_calculator import write_generated_test
+
+
+@dataclasses.dataclass(frozen=True)
+class _Candidate:
+    body: str
+    target: Target
+    config: Config
+
+
+def select_best_candidate(
+    target: Target,
+    config: Config,
+    candidates: TestGenerationCandidates,
+    coverage_calculator_name: CoverageCalculatorName,
+) -> tuple[TestGenerationSuccess, Coverages]:
+    """
+    Measure the coverage of all candidates in parallel and keep the best one.
+
+    Each candidate is measured in its own directory below `candidates` of the results
+    directory, which is removed afterwards. The best candidate is then stored as the
+    test of the target.
+
+    Returns:
+        The best candidate and its coverages.
+    """
+    try:
+        return _select_best_candidate(
+            target, config, candidates, coverage_calculator_name
+        )
+    finally:
+        shutil.rmtree(_get_candidates_dir(target, config), ignore_errors=True)
+
+
+def _select_best_candidate(
+    target: Target,
+    config: Config,
+    candidates: TestGenerationCandidates,
+    coverage_calculator_name: CoverageCalculatorName,
+) -> tuple[TestGenerationSuccess, Coverages]:
+    all_candidates = tuple(
+        _prepare_candidate(target, config, index, body)
+        for index, body in enumerate(candidates.bodies)
+    )
+    valid_candidates = tuple(
+        candidate
+        for candidate in all_candidates
+        if validate_generated_test(candidate.target, candidate.config)
+    )
+    if not valid_candidates:
+        # keep the first one, which is handled like any other invalid test
+        body = candidates.bodies[0]
+        write_generated_test(target, body)
+        validate_generated_test(target, config)
+        return TestGenerationSuccess(body), calculate_coverages(
+            target, config, coverage_calculator_name
+        )
+
+    all_coverages = calculate_parallel_coverages(
+        tuple((candidate.target, candidate.config) for candidate in valid_candidates),
+        coverage_calculator_name,
+    )
+    best_index = max(
+        range(len(valid_candidates)),
+        key=lambda index: (
+            all_coverages[index].branch.ratio,
+            all_coverages[index].line.ratio,
+        ),
+    )
+    best_candidate = valid_candidates[best_index]
+    write_generated_test(target, best_candidate.body)
+    best_coverage_xml = get_coverage_xml(best_candidate.target, best_candidate.config)
+    # not every coverage calculator writes a report
+    if best_coverage_xml.exists():
+        config.coverages_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(best_coverage_xml, get_coverage_xml(target, config))
+    return TestGenerationSuccess(best_candidate.body), all_coverages[best_index]
+
+
+def _get_candidates_dir(target: Target, config: Config) -> Path:
+    return config.results_dir / "candidates" / target.source_module
+
+
+def _prepare_candidate(
+    target: Target, config: Config, index: int, body: str
+) -> _Candidate:
+    results_dir = _get_candidates_dir(target, config) / str(index)
+    candidate_config = dataclasses.replace(
+        config,
+        results_dir=results_dir,
+        tests_dir=results_dir / config.tests_dir.relative_to(config.results_dir),
+        coverages_dir=results_dir
+        / config.coverages_dir.relative_to(config.results_dir),
+    )
+    candidate_target = dataclasses.replace(
+        target,
+        test=candidate_config.tests_dir / target.test.relative_to(config.tests_dir),
+    )
+    write_generated_test(candidate_target, body)
+    return _Candidate(body=body, target=candidate_target, config=candidate_config)
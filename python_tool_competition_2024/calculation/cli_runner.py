@@ -21,14 +21,17 @@
 
 from __future__ import annotations
 
+import importlib.util
 import os
+import py_compile
 import subprocess  # nosec B404
+from pathlib import Path
 from typing import Literal, get_args, overload
 
 from ..config import Config
 from ..errors import CommandFailedError
 
-_COMMAND = Literal["pytest", "coverage", "cosmic-ray", "cr-report", "mut.py"]
+_COMMAND = Literal["pytest", "cosmic-ray", "cr-report", "mut.py"]
 _VALID_COMMANDS = get_args(_COMMAND)
 
 
@@ -113,8 +116,38 @@ def _extend_env(config: Config) -> dict[str, str]:
     env = os.environ | {
         "PYTHONPATH": os.pathsep.join(
             (str(config.targets_dir), str(config.results_dir))
-        )
+        ),
+        # share the bytecode between all commands, even if the trees are read-only
+        "PYTHONPYCACHEPREFIX": str(config.pycache_dir),
+        # an inherited data file would not be found by the coverage calculators
+        "COVERAGE_FILE": str(get_coverage_data_file(config)),
     }
     # reset the tox env to not confuse pytest
     env.pop("TOX_ENV_DIR", None)
     return env
+
+
+def get_coverage_data_file(config: Config) -> Path:
+    """Get the path to the coverage data file written by the commands."""
+    return config.results_dir / ".coverage"
+
+
+def cache_checked_bytecode(config: Config, source: Path) -> None:
+    """
+    Compile the source into the bytecode cache shared by all commands.
+
+    The bytecode is validated by the hash of the source instead of its
+    modification time and size, so a source that is changed in place, e.g. by
+    a mutation, is never run from the bytecode of a previous version. Python
+    keeps writing hash based bytecode for it afterwards.
+    """
+    cache_file = (
+        config.pycache_dir
+        / source.parent.relative_to(source.anchor)
+        / Path(importlib.util.cache_from_source(str(source))).name
+    )
+    py_compile.compile(
+        str(source),
+        cfile=str(cache_file),
+        invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH,
+    )
@@ -19,81 +19,429 @@
 #
 """Calculator to gather line and branch coverage results."""
 
+from __future__ import annotations
+
 import abc
+import ast
+import enum
+import os
 import re
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import NamedTuple
 
 # only used for type checking
 from xml.etree.ElementTree import Element  # nosec B405
 
+from coverage import Coverage, CoverageData
 from defusedxml import ElementTree
 
-from ..calculation.cli_runner import run_command
+from ..calculation.cli_runner import get_coverage_data_file, run_command
 from ..config import Config
+from ..coverage_analysis import analyse_coverage, analyse_coverage_data
+from ..coverage_measurement import (
+    CoverageRun,
+    CoverageTarget,
+    measure_coverage,
+    measure_coverages,
+    measure_parallel_coverages,
+)
+from ..coverage_monitoring import MONITORING_SUPPORTED
 from ..errors import (
     CommandFailedError,
     ConditionCoverageError,
+    MeasurementFailedError,
+    MeasurementTimeoutError,
     TargetNotFoundInCoveragesError,
 )
 from ..results import RatioResult
 from ..target_finder import Target
 
+_TIMEOUT = 5 * 60
+
+
+class CoverageCalculatorName(enum.Enum):
+    """A name of the calculator to measure the coverages with."""
+
+    PYTEST_COV = "pytest-cov"
+    """Runs pytest with pytest-cov in a new process and parses its XML report."""
+
+    DATA_FILE = "data-file"
+    """
+    Runs pytest with pytest-cov in a new process like `pytest-cov`, but reads the
+    executed lines and arcs from the coverage data file instead of a report.
+    """
+
+    FORK = "fork"
+    """
+    Runs pytest in a fork of the running process and measures the coverages with
+    the API of coverage. No new interpreter is started and no report is written.
+    """
+
+    MONITORING = "monitoring"
+    """
+    Like `fork`, but records the executed lines and branches with `sys.monitoring`
+    instead of the tracer of coverage, which barely slows the tests down. Requires
+    Python 3.12 or newer, otherwise it is the same as `fork`.
+    """
+
+    SESSION = "session"
+    """
+    Like `fork`, but runs the tests of all targets in a single pytest session and
+    splits the coverages by test file.
+    """
+
 
 class Coverages(NamedTuple):
     """A named tuple of line and branch coverages."""
 
     line: RatioResult
     branch: RatioResult
+    missing_lines: tuple[int, ...] | None = None
+    """
+    The sorted line numbers of the statements that the test did not execute.
+
+    `None` if the test ran, but it is not known which statements it executed.
+    """
 
 
-def calculate_coverages(target: Target, config: Config) -> Coverages:
+def calculate_coverages(
+    target: Target, config: Config, coverage_calculator_name: CoverageCalculatorName
+) -> Coverages:
     """Calculate the line coverage results."""
-    coverage_xml = _generate_coverage_xml(target, config)
-    return _parse_coverage_xml(coverage_xml, target)
+    return _COVERAGE_CALCULATORS[coverage_calculator_name](target, config)
 
 
-def _generate_coverage_xml(target: Target, config: Config) -> Path:
-    coverage_xml = config.coverages_dir / f"{target.source_module}.xml"
+def calculate_all_coverages(
+    targets: Sequence[Target],
+    config: Config,
+    coverage_calculator_name: CoverageCalculatorName,
+) -> tuple[Coverages, ...]:
+    """
+    Calculate the line coverage results of multiple targets.
+
+    The session calculator measures all targets at once, all other calculators
+    measure one target after the other.
+    """
+    if coverage_calculator_name is CoverageCalculatorName.SESSION:
+        return _calculate_session_coverages(targets, config)
+    return tuple(
+        calculate_coverages(target, config, coverage_calculator_name)
+        for target in targets
+    )
+
+
+def calculate_parallel_coverages(
+    targets: Sequence[tuple[Target, Config]],
+    coverage_calculator_name: CoverageCalculatorName,
+) -> tuple[Coverages, ...]:
+    """
+    Calculate the coverages of multiple targets, each with its own config, at once.
+
+    The calculators that start pytest in a new process are called from a pool of
+    threads. All other calculators fork a child for every target from the calling
+    thread, since a child forked while another thread holds a lock, e.g. the
+    import lock, can deadlock. `session` measures every target in its own child
+    like `fork`, which gives the same results. If a child fails, the targets are
+    measured one after the other, so the failing one is reported.
+    """
+    if coverage_calculator_name in _SUBPROCESS_COVERAGE_CALCULATORS:
+        with ThreadPoolExecutor(
+            max_workers=max(min(len(targets), os.cpu_count() or 1), 1)
+        ) as executor:
+            return tuple(
+                executor.map(
+                    lambda target_and_config: calculate_coverages(
+                        target_and_config[0],
+                        target_and_config[1],
+                        coverage_calculator_name,
+                    ),
+                    targets,
+                )
+            )
+    tested = tuple(
+        index for index, (target, _) in enumerate(targets) if target.test.exists()
+    )
+    try:
+        runs = measure_parallel_coverages(
+            tuple(
+                CoverageTarget(
+                    targets[index][0].source,
+                    targets[index][0].source_module,
+                    targets[index][0].test,
+                )
+                for index in tested
+            ),
+            python_paths=tuple(
+                (targets[index][1].targets_dir, targets[index][1].results_dir)
+                for index in tested
+            ),
+            timeout=_TIMEOUT * len(tested),
+            monitoring=coverage_calculator_name is CoverageCalculatorName.MONITORING
+            and MONITORING_SUPPORTED,
+        )
+    except (MeasurementFailedError, MeasurementTimeoutError):
+        return tuple(
+            calculate_coverages(target, config, coverage_calculator_name)
+            for target, config in targets
+        )
+    tested_runs = dict(zip(tested, runs))
+    return tuple(
+        _to_coverages(target, config, tested_runs.get(index))
+        for index, (target, config) in enumerate(targets)
+    )
+
+
+def _calculate_pytest_cov_coverages(target: Target, config: Config) -> Coverages:
+    coverage_xml = get_coverage_xml(target, config)
     coverage_xml.unlink(missing_ok=True)
+    if target.test.exists():
+        _run_pytest_cov(target, config, "--cov-report", f"xml:{coverage_xml}")
+    # if the test was not generated or it does not import the source
+    if not coverage_xml.exists():
+        _write_unexecuted_coverage_xml(target.source, coverage_xml)
+        return _to_coverages(target, config, None)
+    return _parse_coverage_xml(coverage_xml, target)
+
+
+def _write_unexecuted_coverage_xml(source: Path, coverage_xml: Path) -> None:
+    """Write the report of a source of which nothing ran without running it."""
+    cov = Coverage(data_file=None, branch=True, config_file=False)
+    cov.get_data().add_arcs({str(source): {}})
+    cov.xml_report(morfs=[str(source)], outfile=str(coverage_xml))
+
+
+def _calculate_data_file_coverages(target: Target, config: Config) -> Coverages:
+    data_file = get_coverage_data_file(config)
+    data_file.unlink(missing_ok=True)
+    if target.test.exists():
+        _run_pytest_cov(target, config, "--cov-report=")
+    data = CoverageData(basename=str(data_file))
+    # if the test was not generated or it does not import the source
+    if data_file.exists():
+        data.read()
+    coverage = analyse_coverage_data(target.source, data)
+    return Coverages(
+        line=coverage.line,
+        branch=coverage.branch,
+        missing_lines=(
+            coverage.missing_lines
+            if data_file.exists() or not target.test.exists()
+            else None
+        ),
+    )
+
+
+def _calculate_forked_coverages(target: Target, config: Config) -> Coverages:
+    return _measure_forked_coverages(target, config, monitoring=False)
+
+
+def _calculate_monitored_coverages(target: Target, config: Config) -> Coverages:
+    return _measure_forked_coverages(target, config, monitoring=MONITORING_SUPPORTED)
+
+
+def _measure_forked_coverages(
+    target: Target, config: Config, *, monitoring: bool
+) -> Coverages:
+    run = None
     if target.test.exists():
         try:
-            run_command(
-                config,
-                "pytest",
-                str(target.test),
-                f"--cov={target.source_module}",
-                "--cov-branch",
-                "--cov-report",
-                f"xml:{coverage_xml}",
-                "--color=yes",
-                # reset options that are not desired
-                "--cov-fail-under=0",
-                "--override-ini=addopts=",
-                "--override-ini=cache_dir=.pytest_competition_cache",
-                show_output_on_error=False,
+            run = measure_coverage(
+                target.source,
+                target.source_module,
+                target.test,
+                python_paths=(config.targets_dir, config.results_dir),
+                timeout=_TIMEOUT,
+                monitoring=monitoring,
+                workers=_count_workers(target, config),
+                split_above=config.test_split_threshold,
+            )
+        except (MeasurementFailedError, MeasurementTimeoutError) as error:
+            config.console.print(
+                f"Could not run pytest for {target.source_module}: {error}", style="red"
             )
-        except CommandFailedError:
-            msg = f"Could not run pytest for {target.source_module}."
-            if not config.show_commands:
-                msg = f"{msg} Add -vv to show the console output."
-            config.console.print(msg, style="red")
+    return _to_coverages(target, config, run)
 
-    # if the test was not generated or it does not import the source
-    if not coverage_xml.exists():
-        run_command(
-            config,
-            "coverage",
-            "run",
-            "--branch",
-            f"--source={config.targets_dir}",
-            "-m",
-            "typing",
+
+def _count_workers(target: Target, config: Config) -> int:
+    """
+    Split the tests across one process per CPU if there may be enough of them.
+
+    The children decide from the collected tests whether they split them, the
+    tests are only counted here to not fork them for a few tests.
+    """
+    threshold = config.test_split_threshold
+    if not threshold:
+        return 1
+    tests = _count_tests(target.test)
+    if tests is not None and tests < threshold:
+        return 1
+    return os.cpu_count() or 1
+
+
+def _count_tests(test_file: Path) -> int | None:
+    """
+    Count the tests of the file, including every case of a parametrized test.
+
+    Returns `None` if the number of cases is not known without running the file.
+    """
+    try:
+        tree = ast.parse(test_file.read_bytes(), str(test_file))
+    except (SyntaxError, ValueError):
+        # pytest reports the broken test
+        return 0
+    return _count_nested_tests(tree.body)
+
+
+def _count_nested_tests(nodes: Iterable[ast.stmt]) -> int | None:
+    total = 0
+    for node in nodes:
+        tests: int | None = 0
+        if isinstance(node, ast.ClassDef):
+            tests = _count_nested_tests(node.body)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            tests = 1 if node.name.startswith("test") else 0
+        else:
+            continue
+        cases = _count_cases(node.decorator_list)
+        if tests is None or cases is None:
+            return None
+        total += tests * cases
+    return total
+
+
+def _count_cases(decorators: Iterable[ast.expr]) -> int | None:
+    """Count the cases of the parametrizations of a test or the tests of a class."""
+    cases = 1
+    for decorator in decorators:
+        if not isinstance(decorator, ast.Call):
+            continue
+        name = _get_name(decorator.func)
+        keywords = {keyword.arg: keyword.value for keyword in decorator.keywords}
+        if name == "fixture" and "params" in keywords:
+            # multiplies the cases of every test using the fixture
+            return None
+        if name == "parametrize":
+            values = (
+                decorator.args[1]
+                if len(decorator.args) > 1
+                else keywords.get("argvalues")
+            )
+            values_count = None if values is None else _count_values(values)
+            if values_count is None:
+                return None
+            cases *= values_count
+    return cases
+
+
+def _count_values(values: ast.expr) -> int | None:
+    if isinstance(values, (ast.List, ast.Tuple, ast.Set)):
+        if any(isinstance(value, ast.Starred) for value in values.elts):
+            return None
+        return len(values.elts)
+    if (
+        not isinstance(values, ast.Call)
+        or _get_name(values.func) != "range"
+        or values.keywords
+    ):
+        return None
+    arguments = [
+        arg.value
+        for arg in values.args
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, int)
+    ]
+    if len(arguments) != len(values.args):
+        return None
+    try:
+        return len(range(*arguments))
+    except (TypeError, ValueError):
+        # pytest reports the invalid range
+        return None
+
+
+def _get_name(node: ast.expr) -> str | None:
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def _calculate_target_session_coverages(target: Target, config: Config) -> Coverages:
+    return _calculate_session_coverages((target,), config)[0]
+
+
+def _calculate_session_coverages(
+    targets: Sequence[Target], config: Config
+) -> tuple[Coverages, ...]:
+    tested = tuple(target for target in targets if target.test.exists())
+    runs: dict[Target, CoverageRun] = {}
+    try:
+        runs.update(
+            zip(
+                tested,
+                measure_coverages(
+                    tuple(
+                        CoverageTarget(target.source, target.source_module, target.test)
+                        for target in tested
+                    ),
+                    python_paths=(config.targets_dir, config.results_dir),
+                    timeout=_TIMEOUT * len(tested),
+                ),
+            )
         )
+    except (MeasurementFailedError, MeasurementTimeoutError) as error:
+        config.console.print(
+            f"Could not run pytest for the generated tests: {error}", style="red"
+        )
+    return tuple(_to_coverages(target, config, runs.get(target)) for target in targets)
+
+
+def _to_coverages(target: Target, config: Config, run: CoverageRun | None) -> Coverages:
+    if run is None:
+        # nothing was measured, so the totals are computed statically
+        coverage = analyse_coverage(target.source, (), ())
+        # without a test no statement runs, otherwise the measurement failed
+        missing_lines = None if target.test.exists() else coverage.missing_lines
+    else:
+        if not run.passed:
+            config.console.print(
+                f"Could not run pytest for {target.source_module}.", style="red"
+            )
+        coverage = run.coverage
+        missing_lines = coverage.missing_lines
+    return Coverages(
+        line=coverage.line, branch=coverage.branch, missing_lines=missing_lines
+    )
+
+
+def get_coverage_xml(target: Target, config: Config) -> Path:
+    """Get the path of the coverage XML of the target."""
+    return config.coverages_dir / f"{target.source_module}.xml"
+
+
+def _run_pytest_cov(target: Target, config: Config, *report_args: str) -> None:
+    try:
         run_command(
-            config, "coverage", "xml", "-o", str(coverage_xml), str(target.source)
+            config,
+            "pytest",
+            str(target.test),
+            f"--cov={target.source_module}",
+            "--cov-branch",
+            *report_args,
+            "--color=yes",
+            # reset options that are not desired
+            "--cov-fail-under=0",
+            "--override-ini=addopts=",
+            "--override-ini=cache_dir=.pytest_competition_cache",
+            show_output_on_error=False,
         )
-    return coverage_xml
+    except CommandFailedError:
+        msg = f"Could not run pytest for {target.source_module}."
+        if not config.show_commands:
+            msg = f"{msg} Add -vv to show the console output."
+        config.console.print(msg, style="red")
 
 
 _CONDITION_COVERAGE_REGEX = re.compile(r"\A\d+% \((?P<covered>\d+)/(?P<total>\d+)\)\Z")
@@ -118,10 +466,19 @@ class _CoverageVisitor(abc.ABC):
 
 
 class _LineCoverageVisitor(_CoverageVisitor):
+    def __init__(self) -> None:
+        super().__init__()
+        self._missing_lines: list[int] = []
+
     def visit_line(self, line: Element) -> None:
         self._total += 1
         if line.attrib["hits"] != "0":
             self._covered += 1
+        else:
+            self._missing_lines.append(int(line.attrib["number"]))
+
+    def get_missing_lines(self) -> tuple[int, ...]:
+        return tuple(sorted(self._missing_lines))
 
 
 class _BranchCoverageVisitor(_CoverageVisitor):
@@ -141,18 +498,45 @@ class _BranchCoverageVisitor(_CoverageVisitor):
 
 
 def _parse_coverage_xml(coverage_xml: Path, target: Target) -> Coverages:
-    coverage = ElementTree.parse(coverage_xml).getroot()
-    line_visitor = _LineCoverageVisitor()
-    branch_visitor = _BranchCoverageVisitor()
-    file_found = False
-    for file in coverage.iter("class"):
-        if Path(file.attrib["filename"]) != target.source:
+    """
+    Parse the coverages of the target from the XML report.
+
+    The report is streamed and every file is discarded after it was checked, so
+    reports of many files are parsed fast and with little memory. Parsing stops
+    as soon as the target was found.
+    """
+    source = str(target.source)
+    for _, element in ElementTree.iterparse(coverage_xml):
+        if element.tag != "class":
             continue
-        line_visitor.visit_file(file)
-        branch_visitor.visit_file(file)
-        file_found = True
-    if not file_found:
-        raise TargetNotFoundInCoveragesError(coverage_xml, target.source)
-    return Coverages(
-        line=line_visitor.get_coverages(), branch=branch_visitor.get_coverages()
-    )
+        filename = element.attrib["filename"]
+        # only create paths for the candidates to normalize them
+        if filename == source or (
+            filename.endswith(target.source.name) and Path(filename) == target.source
+        ):
+            line_visitor = _LineCoverageVisitor()
+            branch_visitor = _BranchCoverageVisitor()
+            line_visitor.visit_file(element)
+            branch_visitor.visit_file(element)
+            return Coverages(
+                line=line_visitor.get_coverages(),
+                branch=branch_visitor.get_coverages(),
+                missing_lines=line_visitor.get_missing_lines(),
+            )
+        element.clear()
+    raise TargetNotFoundInCoveragesError(coverage_xml, target.source)
+
+
+_SUBPROCESS_COVERAGE_CALCULATORS = frozenset(
+    (CoverageCalculatorName.PYTEST_COV, CoverageCalculatorName.DATA_FILE)
+)
+
+_COVERAGE_CALCULATORS: Mapping[
+    CoverageCalculatorName, Callable[[Target, Config], Coverages]
+] = {
+    CoverageCalculatorName.PYTEST_COV: _calculate_pytest_cov_coverages,
+    CoverageCalculatorName.FORK: _calculate_forked_coverages,
+    CoverageCalculatorName.MONITORING: _calculate_monitored_coverages,
+    CoverageCalculatorName.DATA_FILE: _calculate_data_file_coverages,
+    CoverageCalculatorName.SESSION: _calculate_target_session_coverages,
+}
@@ -0,0 +1,68 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Calculator to record which test function covers which part of a target."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from ..config import Config
+from ..coverage_map import CoverageMap, build_coverage_map, write_coverage_map
+from ..coverage_measurement import measure_coverage
+from ..errors import MeasurementFailedError, MeasurementTimeoutError
+from ..target_finder import Target
+
+_TIMEOUT = 5 * 60
+
+
+def get_coverage_map_file(target: Target, config: Config) -> Path:
+    """Get the path of the coverage map of the target."""
+    return config.coverages_dir / f"{target.source_module}.tests.json"
+
+
+def calculate_coverage_map(target: Target, config: Config) -> CoverageMap | None:
+    """
+    Measure the coverages of each test function and store them as coverage map.
+
+    No map is stored and `None` is returned if the test was not generated or
+    could not be measured.
+    """
+    map_file = get_coverage_map_file(target, config)
+    map_file.unlink(missing_ok=True)
+    if not target.test.exists():
+        return None
+    try:
+        run = measure_coverage(
+            target.source,
+            target.source_module,
+            target.test,
+            python_paths=(config.targets_dir, config.results_dir),
+            timeout=_TIMEOUT,
+            per_test=True,
+        )
+    except (MeasurementFailedError, MeasurementTimeoutError) as error:
+        config.console.print(
+            f"Could not record the coverage map of {target.source_module}: {error}",
+            style="yellow",
+        )
+        return None
+    coverage_map = build_coverage_map(target.source, run.tests)
+    write_coverage_map(coverage_map, map_file)
+    return coverage_map
@@ -0,0 +1,187 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Minimize generated tests while preserving their coverages."""
+
+from __future__ import annotations
+
+import ast
+from collections.abc import Collection, Iterator, Mapping, Sequence
+from typing import Union
+
+from ..config import Config
+from ..coverage_analysis import Arc, CoverageAnalysis
+from ..coverage_measurement import CoverageRun, measure_coverage
+from ..errors import MeasurementFailedError, MeasurementTimeoutError
+from ..target_finder import Target
+
+_TIMEOUT = 5 * 60
+
+_Function = tuple[str, ...]
+"""The names of the classes and the test function containing a test."""
+
+_Element = Union[int, Arc]
+"""A statement or a branch of the target."""
+
+_Definition = Union[ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef]
+
+
+def minimize_generated_test(target: Target, config: Config) -> None:
+    """
+    Remove redundant test functions from the generated test of a target.
+
+    The coverages of every test function are measured and a minimal subset of
+    them is greedily selected that reaches the same line and branch coverages as
+    the whole test. As every mutant runs the whole test, this reduces the
+    runtime of the mutation analysis.
+
+    The test is not changed if it does not pass, if its test functions can not be
+    removed or if the minimized test does not reach the same coverages.
+    """
+    if not target.test.exists():
+        return
+    original = target.test.read_text(encoding="utf-8")
+    try:
+        run = _measure(target, config, per_test=True)
+    except (MeasurementFailedError, MeasurementTimeoutError) as error:
+        _not_minimized(target, config, str(error))
+        return
+    if not run.passed:
+        _not_minimized(target, config, "Not all tests passed.")
+        return
+    functions = _missing_by_function(run.tests)
+    selected = _select_functions(run.coverage, functions)
+    minimized = _remove_functions(
+        original, [function for function in functions if function not in selected]
+    )
+    if minimized is None:
+        _not_minimized(target, config, "Not all test functions were found.")
+        return
+    if minimized != original:
+        target.test.write_text(minimized, encoding="utf-8")
+        if not _has_same_coverage(target, config, run):
+            target.test.write_text(original, encoding="utf-8")
+            _not_minimized(target, config, "The coverages were not preserved.")
+            return
+    config.console.print(
+        f"Minimized the test for {target.source_module} from "
+        f"{len(functions)} to {len(selected)} test functions "
+        f"({len(original.splitlines())} to {len(minimized.splitlines())} lines)."
+    )
+
+
+def _measure(target: Target, config: Config, *, per_test: bool) -> CoverageRun:
+    return measure_coverage(
+        target.source,
+        target.source_module,
+        target.test,
+        python_paths=(config.targets_dir, config.results_dir),
+        timeout=_TIMEOUT,
+        per_test=per_test,
+    )
+
+
+def _has_same_coverage(target: Target, config: Config, original: CoverageRun) -> bool:
+    try:
+        run = _measure(target, config, per_test=False)
+    except (MeasurementFailedError, MeasurementTimeoutError):
+        return False
+    return run.passed and run.coverage == original.coverage
+
+
+def _not_minimized(target: Target, config: Config, reason: str) -> None:
+    config.console.print(
+        f"Could not minimize the test for {target.source_module}: {reason}",
+        style="yellow",
+    )
+
+
+def _missing(coverage: CoverageAnalysis) -> frozenset[_Element]:
+    return frozenset((*coverage.missing_lines, *coverage.missing_branches))
+
+
+def _missing_by_function(
+    tests: Mapping[str, CoverageAnalysis]
+) -> dict[_Function, frozenset[_Element]]:
+    """Combine the tests of parametrized test functions into one."""
+    functions: dict[_Function, frozenset[_Element]] = {}
+    for node_id, coverage in tests.items():
+        function = tuple(part.split("[", 1)[0] for part in node_id.split("::")[1:])
+        missing = _missing(coverage)
+        functions[function] = functions.get(function, missing) & missing
+    return functions
+
+
+def _select_functions(
+    coverage: CoverageAnalysis, functions: Mapping[_Function, frozenset[_Element]]
+) -> set[_Function]:
+    """Greedily select the functions that cover the most uncovered elements."""
+    uncovered: frozenset[_Element] = frozenset().union(*functions.values())
+    uncovered -= _missing(coverage)
+    selected: set[_Function] = set()
+    while uncovered:
+        best = max(functions, key=lambda function: len(uncovered - functions[function]))
+        if not uncovered - functions[best]:
+            # only covered by the tests together, e.g. by shared state
+            return set(functions)
+        selected.add(best)
+        uncovered &= functions[best]
+    # keep at least one test, as pytest fails if no tests are collected
+    return selected or set(list(functions)[:1])
+
+
+def _remove_functions(source: str, functions: Collection[_Function]) -> str | None:
+    """Remove the functions from the source or `None` if not all were found."""
+    tree = ast.parse(source)
+    if not set(functions) <= set(_defined_functions(tree.body, ())):
+        return None
+    lines = source.splitlines(keepends=True)
+    for node in sorted(
+        _removed_nodes(tree.body, (), set(functions)),
+        key=lambda node: node.lineno,
+        reverse=True,
+    ):
+        start = min(
+            (decorator.lineno for decorator in node.decorator_list), default=node.lineno
+        )
+        del lines[start - 1 : node.end_lineno]
+    return "".join(lines)
+
+
+def _defined_functions(
+    body: Sequence[ast.stmt], prefix: _Function
+) -> Iterator[_Function]:
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield (*prefix, node.name)
+        elif isinstance(node, ast.ClassDef):
+            yield from _defined_functions(node.body, (*prefix, node.name))
+
+
+def _removed_nodes(
+    body: Sequence[ast.stmt], prefix: _Function, functions: set[_Function]
+) -> Iterator[_Definition]:
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if (*prefix, node.name) in functions:
+                yield node
+        elif isinstance(node, ast.ClassDef):
+            removed = tuple(_removed_nodes(node.body, (*prefix, node.name), functions))
+            # a class without any statements left would be invalid
+            yield from (node,) if len(removed) == len(node.body) else removed
@@ -0,0 +1,118 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Fast validation of generated tests before the expensive stages run."""
+
+from __future__ import annotations
+
+import dataclasses
+import sys
+from contextlib import suppress
+from pathlib import Path
+
+import pytest
+
+from ..config import Config
+from ..errors import CommandFailedError, MeasurementFailedError, MeasurementTimeoutError
+from ..forked_pytest import PYTEST_ARGS, forget_module, run_in_children
+from ..target_finder import Target
+from .cli_runner import run_command
+
+_TIMEOUT = 5 * 60
+_COLLECTED = frozenset((pytest.ExitCode.OK, pytest.ExitCode.NO_TESTS_COLLECTED))
+
+
+@dataclasses.dataclass(frozen=True)
+class _Collection:
+    module_name: str
+    test_file: Path
+    python_paths: tuple[Path, ...]
+
+
+def validate_generated_test(target: Target, config: Config) -> bool:
+    """
+    Check that the generated test compiles and can be collected by pytest.
+
+    An invalid test is renamed to `<test file>.invalid`. All following stages treat
+    the target as if no test was generated and skip running the expensive tools.
+
+    Returns:
+        Whether the generated test is valid.
+    """
+    if _compiles(target, config) and _collects(target, config):
+        return True
+    target.test.replace(target.test.with_name(f"{target.test.name}.invalid"))
+    return False
+
+
+def _compiles(target: Target, config: Config) -> bool:
+    try:
+        compile(target.test.read_bytes(), str(target.test), "exec", dont_inherit=True)
+    except (SyntaxError, ValueError) as error:
+        config.console.print(
+            f"The generated test for {target.source_module} is invalid: {error}",
+            style="red",
+        )
+        return False
+    return True
+
+
+def _collects(target: Target, config: Config) -> bool:
+    collection = _Collection(
+        target.source_module, target.test, (config.targets_dir, config.results_dir)
+    )
+    try:
+        (exit_code,) = run_in_children(_collect, (collection,), target.test, _TIMEOUT)
+    except (MeasurementFailedError, MeasurementTimeoutError):
+        exit_code = None
+    if exit_code in _COLLECTED:
+        return True
+    msg = f"Could not collect the generated test for {target.source_module}."
+    if config.show_commands:
+        # the output of the forked child is discarded, so collect it again
+        _run_collect_command(target, config)
+    else:
+        msg = f"{msg} Add -vv to show the console output."
+    config.console.print(msg, style="red")
+    return False
+
+
+def _run_collect_command(target: Target, config: Config) -> None:
+    with suppress(CommandFailedError):
+        run_command(
+            config,
+            "pytest",
+            "--collect-only",
+            "--quiet",
+            str(target.test),
+            # only import the test without any expensive plugins
+            "-p",
+            "no:pytest_cov",
+            "-p",
+            "no:cacheprovider",
+            "--override-ini=addopts=",
+            show_output_on_error=False,
+        )
+
+
+# the following function only runs in the forked child, which is not measured
+def _collect(collection: _Collection) -> int:  # pragma: no cover
+    sys.path[:0] = map(str, collection.python_paths)
+    forget_module(collection.module_name)
+    return int(pytest.main([str(collection.test_file), *PYTEST_ARGS, "--collect-only"]))
@@ -19,13 +19,17 @@
 #
 """Calculator to gather generation results."""
 
-from pathlib import Path
+from __future__ import annotations
 
-from click import Abort
+import os
+import sys
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 from ..config import Config
 from ..generation_results import (
-    FailureReason,
     TestGenerationFailure,
     TestGenerationResult,
     TestGenerationSuccess,
@@ -33,29 +37,97 @@ from ..generation_results import (
 from ..generator_plugins import find_generator
 from ..generators import FileInfo
 from ..target_finder import Target
+from ..target_index import get_target_index
+from .generator_runner import GeneratorIsolation, run_generator
 
+# protects the console output and the generated files when generating in threads
+_lock = threading.Lock()
 
-def calculate_generation_result(target: Target, config: Config) -> TestGenerationResult:
-    """Calculate the mutation analysis results."""
-    generator = find_generator(config.generator_name)()
-    try:
-        result = generator.build_test(_target_to_file_info(target, config))
-    except (Abort, KeyboardInterrupt):
-        raise
-    except Exception as exception:  # noqa: BLE001
-        result = TestGenerationFailure(
-            ("An unexpected error occured:", exception), FailureReason.UNEXPECTED_ERROR
+
+def is_free_threaded() -> bool:
+    """Whether the running interpreter is a free-threaded build without a GIL."""
+    is_gil_enabled: Callable[[], bool] | None = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def default_generation_workers() -> int:
+    """
+    Get the default number of threads to generate tests with.
+
+    Free-threaded builds use one thread per CPU. Otherwise, the GIL prevents
+    CPU-bound generators from running in parallel, so only a single thread is
+    used.
+    """
+    return (os.cpu_count() or 1) if is_free_threaded() else 1
+
+
+def calculate_generation_results(
+    targets: tuple[Target, ...],
+    config: Config,
+    isolation: GeneratorIsolation,
+    workers: int,
+) -> tuple[TestGenerationResult, ...]:
+    """
+    Generate the tests of all targets in a thread pool with the number of workers.
+
+    The targets with the highest complexity are started first, so that a single
+    expensive target does not delay the end of the generation.
+
+    Returns:
+        The generation results in the same order as the targets.
+    """
+    if workers <= 1:
+        return tuple(
+            calculate_generation_result(target, config, isolation) for target in targets
         )
-    if isinstance(result, TestGenerationFailure) and config.show_failures:
-        config.console.print(f"Target {target.source} failed with {result.reason}")
-        for line in result.error_lines:
-            config.console.print("-", line)
-    if isinstance(result, TestGenerationSuccess):
-        _create_packages(target.test.parent)
-        target.test.write_text(result.body, encoding="utf-8")
+    # load the generator plugins before they are used in multiple threads
+    find_generator(config.generator_name)
+    index = get_target_index(config)
+    costliest_first = sorted(
+        targets,
+        key=lambda target: index.get_metadata(target.source).complexity,
+        reverse=True,
+    )
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generation")
+    try:
+        futures = {
+            target: executor.submit(
+                calculate_generation_result, target, config, isolation
+            )
+            for target in costliest_first
+        }
+        return tuple(futures[target].result() for target in targets)
+    finally:
+        # do not start generating further targets if one of them aborted
+        executor.shutdown(cancel_futures=True)
+
+
+def calculate_generation_result(
+    target: Target, config: Config, isolation: GeneratorIsolation
+) -> TestGenerationResult:
+    """Calculate the mutation analysis results."""
+    result = run_generator(_target_to_file_info(target, config), isolation)
+    with _lock:
+        if isinstance(result, TestGenerationFailure) and config.show_failures:
+            config.console.print(f"Target {target.source} failed with {result.reason}")
+            for line in result.error_lines:
+                config.console.print("-", line)
+        if isinstance(result, TestGenerationSuccess):
+            _write_generated_test(target, result.body)
     return result
 
 
+def write_generated_test(target: Target, body: str) -> None:
+    """Write the test of the target and create all required packages."""
+    with _lock:
+        _write_generated_test(target, body)
+
+
+def _write_generated_test(target: Target, body: str) -> None:
+    _create_packages(target.test.parent)
+    target.test.write_text(body, encoding="utf-8")
+
+
 def _target_to_file_info(target: Target, config: Config) -> FileInfo:
     return FileInfo(
         absolute_path=target.source, module_name=target.source_module, config=config
@@ -0,0 +1,241 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Run the generator to build the test of a target."""
+
+from __future__ import annotations
+
+import enum
+import importlib
+import io
+import json
+import sys
+import tempfile
+from contextlib import suppress
+from pathlib import Path
+from types import ModuleType
+
+from click import Abort
+from rich.console import Console
+from rich.text import Text
+
+from ..config import GeneratorName, get_config
+from ..generation_results import (
+    FailureReason,
+    TestGenerationCandidates,
+    TestGenerationFailure,
+    TestGenerationResult,
+    TestGenerationSuccess,
+)
+from ..generator_plugins import find_generator
+from ..generators import FileInfo
+
+
+class GeneratorIsolation(enum.Enum):
+    """How the generator is isolated from the competition and other targets."""
+
+    NONE = "none"
+    """Run the generator directly in the process of the competition."""
+
+    SUBINTERPRETER = "subinterpreter"
+    """
+    Run the generator in a new sub-interpreter for each target.
+
+    Every target gets its own imported modules, so side effects of importing
+    one target cannot leak into another one. If the interpreter does not
+    support sub-interpreters, the generator runs directly in the process.
+    """
+
+
+def _find_interpreters_module() -> ModuleType | None:
+    # the module was renamed in Python 3.13
+    for name in ("_interpreters", "_xxsubinterpreters"):
+        with suppress(ImportError):
+            return importlib.import_module(name)
+    return None  # pragma: no cover
+
+
+_INTERPRETERS = _find_interpreters_module()
+
+SUBINTERPRETERS_SUPPORTED = _INTERPRETERS is not None
+"""Whether the running interpreter supports sub-interpreters."""
+
+
+def run_generator(
+    file_info: FileInfo, isolation: GeneratorIsolation
+) -> TestGenerationResult:
+    """
+    Build the test of the target with the generator of the config.
+
+    Unexpected errors of the generator are returned as `TestGenerationFailure`.
+    """
+    if isolation is GeneratorIsolation.SUBINTERPRETER and _INTERPRETERS is not None:
+        return _run_in_subinterpreter(file_info, _INTERPRETERS)
+    return _run_in_process(file_info)
+
+
+def _run_in_process(file_info: FileInfo) -> TestGenerationResult:
+    generator = find_generator(file_info.config.generator_name)()
+    try:
+        return generator.build_test(file_info)
+    except (Abort, KeyboardInterrupt):
+        raise
+    except Exception as exception:  # noqa: BLE001
+        return TestGenerationFailure(
+            ("An unexpected error occured:", exception), FailureReason.UNEXPECTED_ERROR
+        )
+
+
+def _run_in_subinterpreter(
+    file_info: FileInfo, interpreters: ModuleType
+) -> TestGenerationResult:
+    config = file_info.config
+    with tempfile.TemporaryDirectory() as result_dir:
+        result_file = Path(result_dir) / "result.json"
+        console_file = Path(result_dir) / "console.txt"
+        request = {
+            "sys_path": sys.path,
+            "generator_name": config.generator_name,
+            "targets_dir": str(config.targets_dir),
+            # the config appends the generator name again
+            "results_dir": str(config.results_dir.parent),
+            "show_commands": config.show_commands,
+            "show_failures": config.show_failures,
+            "test_split_threshold": config.test_split_threshold,
+            # the console cannot be passed, so its output is rendered the same way
+            "console_width": config.console.width,
+            "console_color_system": config.console.color_system,
+            "console_file": str(console_file),
+            "source": str(file_info.absolute_path),
+            "module_name": file_info.module_name,
+            "result_file": str(result_file),
+        }
+        error = _run_script(
+            interpreters,
+            f"from {__name__} import _subinterpreter_main\n"
+            "_subinterpreter_main(request)\n",
+            {"request": json.dumps(request)},
+        )
+        if console_file.exists():
+            _replay_console_output(config.console, console_file)
+        if error is not None:
+            return TestGenerationFailure(
+                ("Could not run the generator in a sub-interpreter:", error),
+                FailureReason.UNEXPECTED_ERROR,
+            )
+        return _decode_result(result_file.read_text(encoding="utf-8"))
+
+
+def _run_script(
+    interpreters: ModuleType, script: str, shared: dict[str, str]
+) -> str | None:
+    """Run the script in a new sub-interpreter and return an error if it failed."""
+    interpreter_id = _create_interpreter(interpreters)
+    try:
+        error: object = interpreters.run_string(interpreter_id, script, shared)
+    except Exception as run_error:  # noqa: BLE001
+        # Python 3.12 and older raise instead of returning the error
+        return str(run_error)
+    finally:
+        interpreters.destroy(interpreter_id)
+    return None if error is None else str(getattr(error, "formatted", error))
+
+
+def _create_interpreter(interpreters: ModuleType) -> object:
+    # the legacy configuration supports extension modules that are not isolated
+    with suppress(TypeError):
+        # Python 3.12 and older
+        return interpreters.create(isolated=False)
+    return interpreters.create("legacy")  # pragma: no cover
+
+
+def _replay_console_output(console: Console, console_file: Path) -> None:
+    output = console_file.read_text(encoding="utf-8")
+    if output:
+        console.print(Text.from_ansi(output))
+
+
+def _subinterpreter_main(request_json: str) -> None:  # noqa: V103
+    """
+    Build the test as requested by `_run_in_subinterpreter`.
+
+    The output of the console is written to a file with the width and colors of
+    the console of the competition, which prints it after the generator finished.
+    """
+    request = json.loads(request_json)
+    sys.path[:] = request["sys_path"]
+    output = io.StringIO()
+    config = get_config(
+        GeneratorName(request["generator_name"]),
+        Path(request["targets_dir"]),
+        Path(request["results_dir"]),
+        Console(
+            file=output,
+            width=request["console_width"],
+            color_system=request["console_color_system"],
+        ),
+        show_commands=request["show_commands"],
+        show_failures=request["show_failures"],
+        test_split_threshold=request["test_split_threshold"],
+    )
+    file_info = FileInfo(
+        absolute_path=Path(request["source"]),
+        module_name=request["module_name"],
+        config=config,
+    )
+    try:
+        result = _run_in_process(file_info)
+    finally:
+        Path(request["console_file"]).write_text(output.getvalue(), encoding="utf-8")
+    Path(request["result_file"]).write_text(_encode_result(result), encoding="utf-8")
+
+
+def _encode_result(result: TestGenerationResult) -> str:
+    if isinstance(result, TestGenerationSuccess):
+        return json.dumps({"type": "success", "body": result.body})
+    if isinstance(result, TestGenerationCandidates):
+        return json.dumps({"type": "candidates", "bodies": result.bodies})
+    if isinstance(result, TestGenerationFailure):
+        return json.dumps(
+            {
+                "type": "failure",
+                "reason": result.reason.name,
+                # exceptions cannot be passed between interpreters
+                "error_lines": [
+                    line if isinstance(line, str) else f"{type(line).__name__}: {line}"
+                    for line in result.error_lines
+                ],
+            }
+        )
+    msg = f"Unknown test generation result: {result!r}"
+    raise TypeError(msg)
+
+
+def _decode_result(encoded: str) -> TestGenerationResult:
+    data = json.loads(encoded)
+    if data["type"] == "success":
+        return TestGenerationSuccess(data["body"])
+    if data["type"] == "candidates":
+        return TestGenerationCandidates(tuple(data["bodies"]))
+    return TestGenerationFailure(
+        tuple(data["error_lines"]), FailureReason[data["reason"]]
+    )
+
+
+__all__ = ["GeneratorIsolation", "SUBINTERPRETERS_SUPPORTED", "run_generator"]
@@ -19,13 +19,17 @@
 #
 """Calculator to gather mutation analysis results."""
 
+from __future__ import annotations
+
 import enum
-from collections.abc import Callable, Mapping
+from collections.abc import Callable, Iterable, Mapping
 
 from ...config import Config
+from ...coverage_analysis import find_unexecuted_lines
+from ...coverage_map import CoverageMap
 from ...results import RatioResult
 from ...target_finder import Target
-from . import cosmic_ray_calculator, mutpy_calculator
+from . import cosmic_ray_calculator, mutpy_calculator, native_calculator
 
 
 class MutationCalculatorName(enum.Enum):
@@ -37,17 +41,57 @@ class MutationCalculatorName(enum.Enum):
     COSMIC_RAY = "cosmic-ray"
     """See: https://cosmic-ray.readthedocs.io/"""
 
+    COSMIC_RAY_FORK_SERVER = "cosmic-ray-fork-server"
+    """
+    Like `cosmic-ray`, but every mutant is tested in a fork of a server that
+    already imported pytest and the dependencies of the test.
+    """
+
+    NATIVE = "native"
+    """
+    Mutates the AST of the target and runs the test against every mutant in a
+    fork of the running process, loading the mutant from memory.
+    """
+
+    NATIVE_SCHEMATA = "native-schemata"
+    """
+    Like `native`, but compiles all mutants of the target into a single mutant
+    schema that selects the active mutant at runtime.
+    """
+
 
 def calculate_mutation(
-    target: Target, config: Config, mutation_calculator_name: MutationCalculatorName
+    target: Target,
+    config: Config,
+    mutation_calculator_name: MutationCalculatorName,
+    missing_lines: Iterable[int] = (),
+    coverage_map: CoverageMap | None = None,
 ) -> RatioResult:
-    """Calculate the mutation analysis results."""
-    return _MUTATION_CALCULATORS[mutation_calculator_name](target, config)
+    """
+    Calculate the mutation analysis results.
+
+    The test cannot kill the mutants within the missing statements it never
+    executed, so the calculators count them as survived without running them.
+    With the coverage map of the test, the calculators that run a mutant in a
+    fork only run the test functions that executed its statement.
+    """
+    unexecuted_lines = find_unexecuted_lines(target.source, missing_lines)
+    return _MUTATION_CALCULATORS[mutation_calculator_name](
+        target, config, unexecuted_lines, coverage_map
+    )
 
 
 _MUTATION_CALCULATORS: Mapping[
-    MutationCalculatorName, Callable[[Target, Config], RatioResult]
+    MutationCalculatorName,
+    Callable[[Target, Config, frozenset[int], CoverageMap | None], RatioResult],
 ] = {
     MutationCalculatorName.COSMIC_RAY: cosmic_ray_calculator.calculate_mutation,
+    MutationCalculatorName.COSMIC_RAY_FORK_SERVER: (
+        cosmic_ray_calculator.calculate_fork_server_mutation
+    ),
     MutationCalculatorName.MUTPY: mutpy_calculator.calculate_mutation,
+    MutationCalculatorName.NATIVE: native_calculator.calculate_mutation,
+    MutationCalculatorName.NATIVE_SCHEMATA: (
+        native_calculator.calculate_schemata_mutation
+    ),
 }
@@ -19,6 +19,8 @@
 #
 """Calculate mutation analysis using cosmic-ray."""
 
+from __future__ import annotations
+
 import re
 import shlex
 from pathlib import Path
@@ -27,10 +29,12 @@ from typing import NamedTuple
 import toml
 
 from ...config import Config
-from ...errors import CommandFailedError
+from ...coverage_map import CoverageMap
+from ...errors import CommandFailedError, MeasurementFailedError
+from ...fork_server import FORK_SERVER_SUPPORTED, serve_tests
 from ...results import RatioResult
 from ...target_finder import Target
-from ..cli_runner import run_command
+from ..cli_runner import cache_checked_bytecode, run_command
 from .helpers import find_matching_line
 
 
@@ -40,13 +44,104 @@ class _CosmicRayFiles(NamedTuple):
     target: Target
 
 
-def calculate_mutation(target: Target, config: Config) -> RatioResult:
+def calculate_mutation(
+    target: Target,
+    config: Config,
+    unexecuted_lines: frozenset[int] = frozenset(),
+    coverage_map: CoverageMap | None = None,
+) -> RatioResult:
     """Calculate mutation analysis using cosmic-ray."""
+    # cosmic-ray runs the same test command for all mutants
+    del coverage_map
+    return _calculate_mutation(
+        target, config, unexecuted_lines, None, fork_server=False
+    )
+
+
+def calculate_fork_server_mutation(
+    target: Target,
+    config: Config,
+    unexecuted_lines: frozenset[int] = frozenset(),
+    coverage_map: CoverageMap | None = None,
+) -> RatioResult:
+    """Calculate mutation analysis using cosmic-ray and a fork server for the tests."""
+    return _calculate_mutation(
+        target,
+        config,
+        unexecuted_lines,
+        coverage_map,
+        fork_server=FORK_SERVER_SUPPORTED,
+    )
+
+
+def _calculate_mutation(
+    target: Target,
+    config: Config,
+    unexecuted_lines: frozenset[int],
+    coverage_map: CoverageMap | None,
+    *,
+    fork_server: bool,
+) -> RatioResult:
     files = _get_files(target, config)
-    _prepare_config_file(files)
+    if not target.test.exists():
+        # without a test all mutants survive and running them can be skipped
+        return _count_survived_mutants(files, config)
+    # cosmic-ray mutates the source in place, possibly within the same second
+    cache_checked_bytecode(config, target.source)
+    if not fork_server:
+        return _run_mutants(
+            files,
+            config,
+            shlex.join(("pytest", "--exitfirst", str(target.test))),
+            unexecuted_lines,
+        )
+    result = None
+    try:
+        with serve_tests(
+            target.test,
+            python_paths=(config.targets_dir, config.results_dir),
+            pycache_prefix=config.pycache_dir,
+            working_dir=config.results_dir,
+            source=target.source,
+            coverage_map=coverage_map,
+        ) as client_command:
+            result = _run_mutants(
+                files, config, shlex.join(client_command), unexecuted_lines
+            )
+    except MeasurementFailedError as error:
+        config.console.print(
+            f"Could not run mutation testing for {target.source_module}: {error}",
+            style="red",
+        )
+        if result is None:
+            # the server failed before any mutant ran
+            return _count_survived_mutants(files, config)
+        # the server stopped after the mutants ran, those it killed do not count
+        return RatioResult(result.total, 0)
+    return result
+
+
+def _count_survived_mutants(files: _CosmicRayFiles, config: Config) -> RatioResult:
+    """Count all mutants of the target as survived without running them."""
+    _prepare_config_file(files, "echo no test")
+    _init(files, config)
+    return _gather_results(files, config)
+
+
+def _init(files: _CosmicRayFiles, config: Config) -> None:
     run_command(
         config, "cosmic-ray", "init", str(files.config_file), str(files.db_file)
     )
+
+
+def _run_mutants(
+    files: _CosmicRayFiles,
+    config: Config,
+    test_command: str,
+    unexecuted_lines: frozenset[int],
+) -> RatioResult:
+    _prepare_config_file(files, test_command)
+    _init(files, config)
     try:
         run_command(
             config,
@@ -56,17 +151,44 @@ def calculate_mutation(target: Target, config: Config) -> RatioResult:
             show_output_on_error=False,
         )
     except CommandFailedError:
-        msg = f"Could not run mutation testing for {target.source_module}."
+        msg = f"Could not run mutation testing for {files.target.source_module}."
         if not config.show_commands:
             msg = f"{msg} Add -vv to show the console output."
         config.console.print(msg, style="red")
     else:
+        _skip_unexecuted_mutants(files, unexecuted_lines)
         run_command(
             config, "cosmic-ray", "exec", str(files.config_file), str(files.db_file)
         )
     return _gather_results(files, config)
 
 
+def _skip_unexecuted_mutants(
+    files: _CosmicRayFiles, unexecuted_lines: frozenset[int]
+) -> None:
+    """Record the mutants on unexecuted lines as survived, so they are not run."""
+    if not unexecuted_lines:
+        return
+    # the database of cosmic-ray loads extension modules that cannot be loaded
+    # again by the sub-interpreters of the generators, so it is imported late
+    from cosmic_ray.work_db import WorkDB, use_db
+    from cosmic_ray.work_item import TestOutcome, WorkerOutcome, WorkResult
+
+    with use_db(files.db_file, WorkDB.Mode.open) as db:
+        for work_item in db.pending_work_items:
+            if all(
+                mutation.start_pos[0] in unexecuted_lines
+                for mutation in work_item.mutations
+            ):
+                db.set_result(
+                    work_item.job_id,
+                    WorkResult(
+                        worker_outcome=WorkerOutcome.SKIPPED,
+                        test_outcome=TestOutcome.SURVIVED,
+                    ),
+                )
+
+
 def _get_files(target: Target, config: Config) -> _CosmicRayFiles:
     cosmic_ray_dir = config.results_dir / "cosmic_ray"
     cosmic_ray_dir.mkdir(exist_ok=True)
@@ -80,11 +202,7 @@ def _get_files(target: Target, config: Config) -> _CosmicRayFiles:
     return files
 
 
-def _prepare_config_file(files: _CosmicRayFiles) -> None:
-    if files.target.test.exists():
-        test_command = shlex.join(("pytest", "--exitfirst", str(files.target.test)))
-    else:
-        test_command = "echo no test"
+def _prepare_config_file(files: _CosmicRayFiles, test_command: str) -> None:
     timeout_minutes = 5
     with files.config_file.open("w", encoding="utf-8") as fp:
         toml.dump(
@@ -19,10 +19,13 @@
 #
 """Calculate mutation analysis using mutpy."""
 
+from __future__ import annotations
+
 import os
 import re
 
 from ...config import Config
+from ...coverage_map import CoverageMap
 from ...errors import CommandFailedError
 from ...results import RatioResult
 from ...target_finder import Target
@@ -45,8 +48,16 @@ _TIMEOUT_REGEX = _mutpy_line_regex("timeout")
 _EMPTY_MODULE = "typing"
 
 
-def calculate_mutation(target: Target, config: Config) -> RatioResult:
+def calculate_mutation(
+    target: Target,
+    config: Config,
+    unexecuted_lines: frozenset[int] = frozenset(),
+    coverage_map: CoverageMap | None = None,
+) -> RatioResult:
     """Calculate mutation analysis using mutpy."""
+    # mutpy can only skip uncovered mutants by leaving them out of the totals and
+    # it runs the same tests for all mutants
+    del unexecuted_lines, coverage_map
     test_module = target.test_module if target.test.exists() else _EMPTY_MODULE
     try:
         output = _run_mutpy(target, config, test_module)
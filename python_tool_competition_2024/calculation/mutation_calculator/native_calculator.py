@@ -0,0 +1,94 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Calculate mutation analysis with the built-in mutation engine."""
+
+from __future__ import annotations
+
+from ...config import Config
+from ...coverage_map import CoverageMap
+from ...errors import MeasurementFailedError, MeasurementTimeoutError
+from ...mutation_testing import generate_mutants, run_mutants
+from ...results import RatioResult
+from ...target_finder import Target
+
+_TIMEOUT = 5 * 60
+
+
+def calculate_mutation(
+    target: Target,
+    config: Config,
+    unexecuted_lines: frozenset[int] = frozenset(),
+    coverage_map: CoverageMap | None = None,
+) -> RatioResult:
+    """Calculate mutation analysis by running the test against in-memory mutants."""
+    return _calculate_mutation(
+        target, config, unexecuted_lines, coverage_map, schemata=False
+    )
+
+
+def calculate_schemata_mutation(
+    target: Target,
+    config: Config,
+    unexecuted_lines: frozenset[int] = frozenset(),
+    coverage_map: CoverageMap | None = None,
+) -> RatioResult:
+    """Calculate mutation analysis by running the test against a mutant schema."""
+    return _calculate_mutation(
+        target, config, unexecuted_lines, coverage_map, schemata=True
+    )
+
+
+def _calculate_mutation(
+    target: Target,
+    config: Config,
+    unexecuted_lines: frozenset[int],
+    coverage_map: CoverageMap | None,
+    *,
+    schemata: bool,
+) -> RatioResult:
+    mutants = generate_mutants(target.source, schemata=schemata)
+    if not target.test.exists():
+        # without a test all mutants survive and running them can be skipped
+        return RatioResult(len(mutants), 0)
+    # the mutants on unexecuted lines survive without running them
+    executed_mutants = tuple(
+        mutant for mutant in mutants if mutant.line not in unexecuted_lines
+    )
+    try:
+        run = run_mutants(
+            target.source,
+            target.source_module,
+            target.test,
+            executed_mutants,
+            python_paths=(config.targets_dir, config.results_dir),
+            timeout=_TIMEOUT,
+            coverage_map=coverage_map,
+        )
+    except (MeasurementFailedError, MeasurementTimeoutError) as error:
+        config.console.print(
+            f"Could not run mutation testing for {target.source_module}: {error}",
+            style="red",
+        )
+        return RatioResult(len(mutants), 0)
+    if not run.passed:
+        config.console.print(
+            f"Could not run mutation testing for {target.source_module}.", style="red"
+        )
+    return RatioResult(len(mutants), sum(run.killed))
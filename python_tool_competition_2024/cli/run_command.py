@@ -24,6 +24,9 @@ from pathlib import Path
 import click
 
 from ..calculation import calculate_results
+from ..calculation.coverage_caluclator import CoverageCalculatorName
+from ..calculation.generation_results_calculator import default_generation_workers
+from ..calculation.generator_runner import GeneratorIsolation
 from ..calculation.mutation_calculator import MutationCalculatorName
 from ..config import get_config
 from ..generator_plugins import plugin_names, to_test_generator_plugin_name
@@ -58,10 +61,79 @@ _MIN_VERBOSITY_SHOW_FULL_ERRORS = 1
 @click.option(
     "--mutation-calculator",
     type=click.Choice(tuple(name.value for name in MutationCalculatorName)),
-    help="The calculator to run mutation analysis.",
+    help=(
+        "The calculator to run mutation analysis. "
+        "`cosmic-ray-fork-server` runs the tests of every mutant in a fork of a "
+        "warm server, `native` mutates the targets in memory and runs the tests "
+        "in a fork of this process, `native-schemata` compiles all mutants of a "
+        "target at once."
+    ),
     default=MutationCalculatorName.COSMIC_RAY.value,
     show_default=True,
 )
+@click.option(
+    "--coverage-calculator",
+    type=click.Choice(tuple(name.value for name in CoverageCalculatorName)),
+    help=(
+        "The calculator to measure line and branch coverage. "
+        "`data-file` reads the coverage data file of pytest-cov instead of its "
+        "XML report, `fork` runs the tests in a fork of this process instead of a "
+        "new one, `monitoring` does the same but measures with sys.monitoring on "
+        "Python 3.12+ and `session` runs the tests of all targets in a single "
+        "forked pytest session."
+    ),
+    default=CoverageCalculatorName.PYTEST_COV.value,
+    show_default=True,
+)
+@click.option(
+    "--generator-isolation",
+    type=click.Choice(tuple(isolation.value for isolation in GeneratorIsolation)),
+    help=(
+        "How to isolate the generator. "
+        "`subinterpreter` runs each target in its own sub-interpreter."
+    ),
+    default=GeneratorIsolation.NONE.value,
+    show_default=True,
+)
+@click.option(
+    "--generation-workers",
+    type=click.IntRange(min=0),
+    help=(
+        "The number of threads to generate tests in parallel. "
+        "0 uses one thread per CPU on free-threaded Python builds and a single "
+        "thread otherwise."
+    ),
+    default=0,
+    show_default=True,
+)
+@click.option(
+    "--split-tests-above",
+    type=click.IntRange(min=0),
+    help=(
+        "Run the tests of a generated test file with at least this many tests, "
+        "counting every parametrized case, in one process per CPU when measuring "
+        "the coverages with `fork` or `monitoring`. 0 never splits them."
+    ),
+    default=1000,
+    show_default=True,
+)
+@click.option(
+    "--minimize-tests",
+    is_flag=True,
+    help=(
+        "Remove generated test functions that do not add line or branch coverage "
+        "before running the mutation analysis."
+    ),
+)
+@click.option(
+    "--record-coverage-map",
+    is_flag=True,
+    help=(
+        "Record which test function covers which line and branch of each target "
+        "in the coverages directory and only run the covering test functions "
+        "against each mutant."
+    ),
+)
 @click.pass_context
 def run(  # noqa: PLR0913
     ctx: click.Context,
@@ -71,6 +143,12 @@ def run(  # noqa: PLR0913
     targets_dir: Path,
     results_dir: Path,
     mutation_calculator: str,
+    coverage_calculator: str,
+    generator_isolation: str,
+    generation_workers: int,
+    split_tests_above: int,
+    minimize_tests: bool,
+    record_coverage_map: bool,
 ) -> None:
     """Run the tool competition with the specified generator."""
     with create_console(
@@ -83,11 +161,19 @@ def run(  # noqa: PLR0913
             console,
             show_commands=verbose >= _MIN_VERBOSITY_SHOW_COMMANDS,
             show_failures=verbose >= _MIN_VERBOSITY_SHOW_FAILURES,
+            test_split_threshold=split_tests_above,
         )
         console.rule(f"Using generator {config.generator_name}")
         targets = find_targets(config)
         results = calculate_results(
-            targets, config, MutationCalculatorName(mutation_calculator)
+            targets,
+            config,
+            MutationCalculatorName(mutation_calculator),
+            GeneratorIsolation(generator_isolation),
+            generation_workers or default_generation_workers(),
+            coverage_calculator_name=CoverageCalculatorName(coverage_calculator),
+            minimize_tests=minimize_tests,
+            record_coverage_map=record_coverage_map,
         )
         report(results, console, config)
         if not config.show_failures and (
@@ -41,10 +41,13 @@ class Config:
     tests_dir: Path
     csv_file: Path
     coverages_dir: Path
+    cache_dir: Path
+    pycache_dir: Path
     default_targets_url: ParseResult
     console: Console
     show_commands: bool
     show_failures: bool
+    test_split_threshold: int
 
     def __post_init__(self) -> None:
         """Ensure that the data is correct."""
@@ -59,8 +62,17 @@ def get_config(  # noqa: PLR0913
     *,
     show_commands: bool,
     show_failures: bool,
+    test_split_threshold: int = 0,
 ) -> Config:
-    """Generate the config from the specific generator name."""
+    """
+    Generate the config from the specific generator name.
+
+    Generated tests with at least `test_split_threshold` tests, counting every
+    parametrized case, are run in parallel processes when their coverages are
+    measured in a fork. `0` never splits them.
+    """
+    # the cache is shared between all generators
+    cache_dir = results_dir / ".cache"
     results_dir /= generator_name
     return Config(
         generator_name=generator_name,
@@ -69,10 +81,13 @@ def get_config(  # noqa: PLR0913
         tests_dir=results_dir / "generated_tests",
         csv_file=results_dir / "statistics.csv",
         coverages_dir=results_dir / "coverages",
+        cache_dir=cache_dir,
+        pycache_dir=cache_dir / "pycache",
         default_targets_url=urlparse(
             "https://github.com/ThunderKey/python-tool-competition-2024/tree/main/python_tool_competition_2024/targets"
         ),
         console=console,
         show_commands=show_commands,
         show_failures=show_failures,
+        test_split_threshold=test_split_threshold,
     )
@@ -0,0 +1,211 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Compute line and branch coverages of a target from raw coverage data."""
+
+import dataclasses
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+from coverage import Coverage, CoverageData
+from coverage.python import PythonFileReporter
+
+from .results import RatioResult
+
+Arc = tuple[int, int]
+
+
+@dataclasses.dataclass(frozen=True)
+class CoverageAnalysis:
+    """The line and branch coverages of a single target."""
+
+    line: RatioResult
+    """The line coverage, counted like the coverage XML report."""
+
+    branch: RatioResult
+    """The branch coverage, counted like the coverage XML report."""
+
+    missing_lines: tuple[int, ...]
+    """The sorted line numbers of all statements that were not executed."""
+
+    missing_branches: tuple[Arc, ...]
+    """The sorted arcs of all branches that were not taken."""
+
+
+def analyse_coverage(
+    source: Path, executed_lines: Iterable[int], executed_arcs: Iterable[Arc]
+) -> CoverageAnalysis:
+    """
+    Analyse the executed lines and arcs of a source file.
+
+    The totals are the same as the ones of the XML report of `coverage`, which
+    is used by `pytest-cov` to report the coverages of generated tests.
+
+    Args:
+        source: The path of the analysed source file.
+        executed_lines: The line numbers that were executed.
+        executed_arcs: The arcs that were executed while measuring branches.
+
+    Returns:
+        The line and branch coverages together with what was missed.
+    """
+    reporter = _create_reporter(source)
+    statements = reporter.lines()
+    executed = reporter.translate_lines(executed_lines)
+    missing_lines = statements - executed
+
+    excluded = reporter.excluded_lines()
+    no_branch = reporter.no_branch_lines()
+    branch_exits = {
+        line: count for line, count in reporter.exit_counts().items() if count > 1
+    }
+    taken = reporter.translate_arcs(executed_arcs)
+    missing_branches = tuple(
+        sorted(
+            arc
+            for arc in reporter.arcs()
+            if arc[0] in branch_exits
+            and arc not in taken
+            and arc[0] not in no_branch
+            and arc[1] not in excluded
+        )
+    )
+    total_branches = sum(branch_exits.values())
+    return CoverageAnalysis(
+        line=RatioResult(len(statements), len(statements) - len(missing_lines)),
+        branch=RatioResult(total_branches, total_branches - len(missing_branches)),
+        missing_lines=tuple(sorted(missing_lines)),
+        missing_branches=missing_branches,
+    )
+
+
+def analyse_coverage_data(source: Path, data: CoverageData) -> CoverageAnalysis:
+    """
+    Analyse the coverage data measured for a source file.
+
+    Args:
+        source: The path of the analysed source file.
+        data: The coverage data containing the executed lines and arcs. A source
+            that was not measured counts as not executed at all.
+
+    Returns:
+        The line and branch coverages together with what was missed.
+    """
+    measured = next(
+        (
+            file
+            for file in data.measured_files()
+            if Path(file).resolve() == source.resolve()
+        ),
+        None,
+    )
+    executed_lines = () if measured is None else data.lines(measured) or ()
+    executed_arcs = () if measured is None else data.arcs(measured) or ()
+    return analyse_coverage(source, executed_lines, executed_arcs)
+
+
+def combine_coverage_analyses(analyses: Iterable[CoverageAnalysis]) -> CoverageAnalysis:
+    """
+    Combine the analyses of multiple runs of the same source.
+
+    A statement or branch is covered if any of the runs covered it.
+
+    Args:
+        analyses: At least one analysis of the same source file.
+
+    Returns:
+        The line and branch coverages of all runs together.
+    """
+    first, *others = analyses
+    missing_lines = set(first.missing_lines).intersection(
+        *(analysis.missing_lines for analysis in others)
+    )
+    missing_branches = set(first.missing_branches).intersection(
+        *(analysis.missing_branches for analysis in others)
+    )
+    return CoverageAnalysis(
+        line=RatioResult(first.line.total, first.line.total - len(missing_lines)),
+        branch=RatioResult(
+            first.branch.total, first.branch.total - len(missing_branches)
+        ),
+        missing_lines=tuple(sorted(missing_lines)),
+        missing_branches=tuple(sorted(missing_branches)),
+    )
+
+
+def find_unexecuted_lines(source: Path, missing_lines: Iterable[int]) -> frozenset[int]:
+    """
+    Find all lines of the statements of a source that were not executed.
+
+    The missing lines only contain the first line of a statement spanning
+    multiple lines, but none of its other lines was executed either.
+
+    Args:
+        source: The path of the analysed source file.
+        missing_lines: The line numbers of the statements that were not executed,
+            like the missing lines of a `CoverageAnalysis`.
+
+    Returns:
+        The line numbers of every line belonging to one of the statements.
+    """
+    missing = frozenset(missing_lines)
+    if not missing:
+        return frozenset()
+    return frozenset(
+        line
+        for line, statement in find_statement_lines(source).items()
+        if statement in missing
+    )
+
+
+def find_statement_lines(source: Path) -> Mapping[int, int]:
+    """
+    Find the statement of every line of a source that belongs to a statement.
+
+    Args:
+        source: The path of the analysed source file.
+
+    Returns:
+        The first line of the statement, like in the missing lines of a
+        `CoverageAnalysis`, keyed by each line of the statement.
+    """
+    reporter = _create_reporter(source)
+    statements = reporter.lines()
+    line_count = len(reporter.source().splitlines())
+    return {
+        line: statement
+        for line in range(1, line_count + 1)
+        for statement in reporter.translate_lines((line,)) & statements
+    }
+
+
+def _create_reporter(source: Path) -> PythonFileReporter:
+    return PythonFileReporter(
+        str(source), coverage=Coverage(data_file=None, config_file=False)
+    )
+
+
+__all__ = [
+    "CoverageAnalysis",
+    "analyse_coverage",
+    "analyse_coverage_data",
+    "combine_coverage_analyses",
+    "find_statement_lines",
+    "find_unexecuted_lines",
+]
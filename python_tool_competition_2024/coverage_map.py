@@ -0,0 +1,175 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""A compact map of the lines and branches covered by each test function."""
+
+from __future__ import annotations
+
+import base64
+import bisect
+import dataclasses
+import json
+import os
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+from .coverage_analysis import Arc, CoverageAnalysis, analyse_coverage
+
+_MAP_VERSION = 1
+
+
+@dataclasses.dataclass(frozen=True)
+class CoverageMap:
+    """
+    The lines and branches of a target covered by each test function.
+
+    The elements covered by a test are stored as a bitset: bit `i` is set if the
+    `i`th line in `lines` was executed and bit `len(lines) + j` if the `j`th
+    branch in `branches` was taken.
+    """
+
+    lines: tuple[int, ...]
+    """The sorted line numbers of all statements of the target."""
+
+    branches: tuple[Arc, ...]
+    """The sorted arcs of all branches of the target."""
+
+    tests: Mapping[str, int]
+    """The bitsets of the test functions, keyed by the pytest node id."""
+
+    def covered_lines(self, test: str) -> tuple[int, ...]:  # noqa: V105
+        """Get the sorted lines executed by the test."""
+        bits = self.tests[test]
+        return tuple(line for index, line in enumerate(self.lines) if bits >> index & 1)
+
+    def covered_branches(self, test: str) -> tuple[Arc, ...]:  # noqa: V105
+        """Get the sorted branches taken by the test."""
+        bits = self.tests[test] >> len(self.lines)
+        return tuple(
+            branch for index, branch in enumerate(self.branches) if bits >> index & 1
+        )
+
+    def select_tests(self, lines: Iterable[int]) -> tuple[str, ...] | None:
+        """
+        Get the tests that executed any of the statements in the order they ran.
+
+        Args:
+            lines: The first lines of the statements, like in `lines`.
+
+        Returns:
+            The node ids of the tests or `None` if a line is not a statement of
+            the map, so it is not known which tests executed it.
+        """
+        mask = 0
+        for line in lines:
+            index = bisect.bisect_left(self.lines, line)
+            if index == len(self.lines) or self.lines[index] != line:
+                return None
+            mask |= 1 << index
+        return tuple(test for test, bits in self.tests.items() if bits & mask)
+
+
+def build_coverage_map(
+    source: Path, tests: Mapping[str, CoverageAnalysis]
+) -> CoverageMap:
+    """
+    Build the coverage map of a source from the coverages of its tests.
+
+    Args:
+        source: The path of the analysed source file.
+        tests: The coverages of each test on the source, keyed by the node id.
+
+    Returns:
+        The map of the elements covered by each test.
+    """
+    # nothing is executed, so everything is missing
+    everything = analyse_coverage(source, (), ())
+    lines = everything.missing_lines
+    branches = everything.missing_branches
+    indexes: dict[int | Arc, int] = {line: index for index, line in enumerate(lines)}
+    indexes.update(
+        (branch, len(lines) + index) for index, branch in enumerate(branches)
+    )
+    all_bits = (1 << len(indexes)) - 1
+    bitsets = {}
+    for test, coverage in tests.items():
+        missing: tuple[int | Arc, ...] = (
+            *coverage.missing_lines,
+            *coverage.missing_branches,
+        )
+        missing_bits = 0
+        for element in missing:
+            missing_bits |= 1 << indexes[element]
+        bitsets[test] = all_bits & ~missing_bits
+    return CoverageMap(lines=lines, branches=branches, tests=bitsets)
+
+
+def write_coverage_map(coverage_map: CoverageMap, map_file: Path) -> None:
+    """Store the coverage map as JSON with the bitsets encoded in base64."""
+    size = (len(coverage_map.lines) + len(coverage_map.branches) + 7) // 8
+    content = json.dumps(
+        {
+            "version": _MAP_VERSION,
+            "lines": coverage_map.lines,
+            "branches": coverage_map.branches,
+            "tests": {
+                test: base64.b64encode(bits.to_bytes(size, "little")).decode("ascii")
+                for test, bits in coverage_map.tests.items()
+            },
+        },
+        separators=(",", ":"),
+    )
+    map_file.parent.mkdir(parents=True, exist_ok=True)
+    # write atomically, so a reader never sees a partial map
+    temp_file = map_file.with_name(f"{map_file.name}.{os.getpid()}.tmp")
+    temp_file.write_text(content, encoding="utf-8")
+    temp_file.replace(map_file)
+
+
+def read_coverage_map(map_file: Path) -> CoverageMap | None:
+    """
+    Read a coverage map stored by `write_coverage_map`.
+
+    Returns:
+        The coverage map or `None` if the file does not exist or is not a valid
+        map of this version.
+    """
+    try:
+        data = json.loads(map_file.read_text(encoding="utf-8"))
+        if data["version"] != _MAP_VERSION:
+            return None
+        return CoverageMap(
+            lines=tuple(data["lines"]),
+            branches=tuple((start, end) for start, end in data["branches"]),
+            tests={
+                test: int.from_bytes(base64.b64decode(bits, validate=True), "little")
+                for test, bits in data["tests"].items()
+            },
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        # a missing or corrupt map is measured again
+        return None
+
+
+__all__ = [
+    "CoverageMap",
+    "build_coverage_map",
+    "read_coverage_map",
+    "write_coverage_map",
+]
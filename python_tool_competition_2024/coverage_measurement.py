@@ -0,0 +1,468 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Measure the coverage of a test in a forked copy of the running process."""
+
+from __future__ import annotations
+
+import dataclasses
+import itertools
+import os
+import re
+import sys
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+
+import coverage
+import pytest
+
+from .coverage_analysis import (
+    CoverageAnalysis,
+    analyse_coverage,
+    analyse_coverage_data,
+    combine_coverage_analyses,
+)
+from .forked_pytest import PYTEST_ARGS, forget_module, run_in_children
+
+
+@dataclasses.dataclass(frozen=True)
+class CoverageRun:
+    """The result of running a test while measuring the coverage of a target."""
+
+    exit_code: int
+    """The exit code of pytest. `0` if all tests passed."""
+
+    coverage: CoverageAnalysis
+    """The coverages the test reached on the target."""
+
+    tests: Mapping[str, CoverageAnalysis] = dataclasses.field(default_factory=dict)
+    """
+    The coverages reached by each single test, keyed by the pytest node id in
+    the order the tests ran.
+
+    Only measured if requested. Everything executed while importing the test
+    file is part of the coverages of every test.
+    """
+
+    @property  # noqa: V106
+    def passed(self) -> bool:
+        """Whether all tests passed."""
+        return self.exit_code == pytest.ExitCode.OK
+
+
+@dataclasses.dataclass(frozen=True)
+class CoverageTarget:
+    """A target to measure the coverage of together with its test file."""
+
+    source: Path
+    """The source file to measure the coverage for."""
+
+    module_name: str
+    """The module name of the source file."""
+
+    test_file: Path
+    """The pytest file to run."""
+
+
+@dataclasses.dataclass(frozen=True)
+class _Measurement:
+    source: Path
+    module_name: str
+    test_file: Path
+    python_paths: tuple[Path, ...]
+    per_test: bool
+    monitoring: bool
+    worker: int
+    workers: int
+    split_above: int
+
+
+@dataclasses.dataclass(frozen=True)
+class _Session:
+    targets: tuple[CoverageTarget, ...]
+    python_paths: tuple[Path, ...]
+
+
+def measure_coverage(  # noqa: PLR0913
+    source: Path,
+    module_name: str,
+    test_file: Path,
+    *,
+    python_paths: Sequence[Path],
+    timeout: float,
+    per_test: bool = False,
+    monitoring: bool = False,
+    workers: int = 1,
+    split_above: int = 0,
+) -> CoverageRun:
+    """
+    Run the test file with pytest and measure the coverage of the source.
+
+    The test runs in a forked child process with the coverage measured
+    in-process. The target module is imported freshly in the child, so the
+    running process is not affected by the test.
+
+    Args:
+        source: The source file to measure the coverage for.
+        module_name: The module name of the source file.
+        test_file: The pytest file to run.
+        python_paths: Additional paths to import the modules from.
+        timeout: The maximum number of seconds the test may run.
+        per_test: Whether to additionally measure the coverages of each test.
+        monitoring: Whether to record the executed lines and branches with
+            `sys.monitoring` instead of the tracer of coverage. Uses the tracer if
+            `MONITORING_SUPPORTED` is false. Cannot be combined with `per_test`.
+        workers: The number of child processes to split the tests across. Every
+            child collects the whole test file, but only runs every `workers`-th
+            test. The coverages and exit codes of all children are combined.
+        split_above: Only split the tests across the children if at least this
+            many tests were collected, counting every parametrized case.
+            Otherwise the first child runs all tests and the others none.
+
+    Returns:
+        The exit code of pytest and the coverages of the source.
+    """
+    if per_test and monitoring:
+        msg = "The coverages of each test cannot be measured with sys.monitoring"
+        raise ValueError(msg)
+    if workers < 1:
+        msg = f"At least one worker is required, got {workers}"
+        raise ValueError(msg)
+    measurements = tuple(
+        _Measurement(
+            source,
+            module_name,
+            test_file,
+            tuple(python_paths),
+            per_test,
+            monitoring,
+            worker,
+            workers,
+            split_above,
+        )
+        for worker in range(workers)
+    )
+    runs = run_in_children(_measure, measurements, test_file, timeout)
+    return runs[0] if len(runs) == 1 else _combine_runs(runs)
+
+
+def measure_parallel_coverages(
+    targets: Sequence[CoverageTarget],
+    *,
+    python_paths: Sequence[Sequence[Path]],
+    timeout: float,
+    monitoring: bool = False,
+) -> tuple[CoverageRun, ...]:
+    """
+    Run the test files of multiple targets at the same time, each in its own child.
+
+    Like `measure_coverage`, but all children are forked by the calling thread.
+    Calling `measure_coverage` from multiple threads instead forks while other
+    threads may hold a lock, e.g. the import lock, which then never gets
+    released in the child.
+
+    Args:
+        targets: The targets to measure the coverage of with their test files.
+        python_paths: For every target the additional paths to import the
+            modules from.
+        timeout: The maximum number of seconds all children may run together.
+        monitoring: Whether to record the executed lines and branches with
+            `sys.monitoring` instead of the tracer of coverage.
+
+    Returns:
+        For every target the exit code of pytest and the coverages of the source.
+    """
+    if len(python_paths) != len(targets):
+        msg = (
+            f"Got the python paths of {len(python_paths)} targets "
+            f"for {len(targets)} targets"
+        )
+        raise ValueError(msg)
+    if not targets:
+        return ()
+    measurements = tuple(
+        _Measurement(
+            target.source,
+            target.module_name,
+            target.test_file,
+            tuple(paths),
+            per_test=False,
+            monitoring=monitoring,
+            worker=0,
+            workers=1,
+            split_above=0,
+        )
+        for target, paths in zip(targets, python_paths)
+    )
+    tests_path = Path(os.path.commonpath([target.test_file for target in targets]))
+    return run_in_children(_measure, measurements, tests_path, timeout)
+
+
+def measure_coverages(
+    targets: Sequence[CoverageTarget], *, python_paths: Sequence[Path], timeout: float
+) -> tuple[CoverageRun, ...]:
+    """
+    Run the test files of multiple targets in a single pytest session.
+
+    Like `measure_coverage`, the tests run in a forked child process. The
+    coverage is recorded in a separate context for every test file and each
+    target is imported freshly when its test file is collected. Therefore, the
+    results are the same as when measuring every target on its own, as long as
+    the tests do not influence each other.
+
+    Args:
+        targets: The targets to measure the coverage of with their test files.
+        python_paths: Additional paths to import the modules from.
+        timeout: The maximum number of seconds the whole session may run.
+
+    Returns:
+        For every target the coverages of the source and the exit code pytest
+        would have returned for its test file on its own.
+    """
+    if not targets:
+        return ()
+    session = _Session(tuple(targets), tuple(python_paths))
+    tests_path = Path(os.path.commonpath([target.test_file for target in targets]))
+    return run_in_children(_measure_session, (session,), tests_path, timeout)[0]
+
+
+def _combine_runs(runs: Sequence[CoverageRun]) -> CoverageRun:
+    """Combine the runs of the children that split the tests of one file."""
+    exit_codes = {run.exit_code for run in runs}
+    # a child without any of the tests does not make the whole run fail
+    exit_codes.discard(pytest.ExitCode.NO_TESTS_COLLECTED)
+    return CoverageRun(
+        exit_code=max(exit_codes, default=pytest.ExitCode.NO_TESTS_COLLECTED),
+        coverage=combine_coverage_analyses(run.coverage for run in runs),
+        # restore the order in which the tests were distributed to the children
+        tests=dict(
+            test
+            for tests in itertools.zip_longest(*(run.tests.items() for run in runs))
+            for test in tests
+            if test is not None
+        ),
+    )
+
+
+# the following functions only run in the forked child, which is not measured
+def _measure(measurement: _Measurement) -> CoverageRun:  # pragma: no cover
+    sys.path[:0] = map(str, measurement.python_paths)
+    forget_module(measurement.module_name)
+    if sys.version_info[0:2] >= (3, 12) and measurement.monitoring:
+        return _measure_monitored(measurement)
+
+    cov = coverage.Coverage(
+        data_file=None,
+        branch=True,
+        config_file=False,
+        include=[str(measurement.source)],
+    )
+    contexts = _TestContexts(cov)
+    cov.start()
+    try:
+        exit_code = pytest.main(
+            _get_pytest_args(measurement),
+            plugins=[
+                *_test_share_plugins(measurement),
+                *([contexts] if measurement.per_test else []),
+            ],
+        )
+    finally:
+        cov.stop()
+    data = cov.get_data()
+    run = CoverageRun(
+        exit_code=int(exit_code),
+        coverage=analyse_coverage_data(measurement.source, data),
+    )
+    if not measurement.per_test:
+        return run
+    tests = {}
+    for node_id in contexts.node_ids:
+        # the empty context contains everything executed while collecting the tests
+        data.set_query_contexts(["^$", f"^{re.escape(node_id)}$"])
+        tests[node_id] = analyse_coverage_data(measurement.source, data)
+    return dataclasses.replace(run, tests=tests)
+
+
+if sys.version_info[0:2] >= (3, 12):  # pragma: py312 only
+
+    def _measure_monitored(
+        measurement: _Measurement,
+    ) -> CoverageRun:  # pragma: no cover
+        from .coverage_monitoring import ExecutionMonitor
+
+        monitor = ExecutionMonitor(measurement.source)
+        monitor.start()
+        try:
+            exit_code = pytest.main(
+                _get_pytest_args(measurement), plugins=_test_share_plugins(measurement)
+            )
+        finally:
+            monitor.stop()
+        return CoverageRun(
+            exit_code=int(exit_code),
+            coverage=analyse_coverage(measurement.source, monitor.lines, monitor.arcs),
+        )
+
+
+def _measure_session(session: _Session) -> tuple[CoverageRun, ...]:  # pragma: no cover
+    sys.path[:0] = map(str, session.python_paths)
+    cov = coverage.Coverage(
+        data_file=None,
+        branch=True,
+        config_file=False,
+        include=[str(target.source) for target in session.targets],
+    )
+    contexts = _TestFileContexts(cov, session.targets)
+    cov.start()
+    try:
+        pytest.main(
+            [
+                *(str(target.test_file) for target in session.targets),
+                *PYTEST_ARGS,
+                "--continue-on-collection-errors",
+            ],
+            plugins=[contexts],
+        )
+    finally:
+        cov.stop()
+    data = cov.get_data()
+    runs = []
+    for target in session.targets:
+        data.set_query_contexts([f"^{re.escape(str(target.test_file))}$"])
+        runs.append(
+            CoverageRun(
+                exit_code=contexts.exit_code(target.test_file),
+                coverage=analyse_coverage_data(target.source, data),
+            )
+        )
+    return tuple(runs)
+
+
+def _get_pytest_args(measurement: _Measurement) -> list[str]:  # pragma: no cover
+    # the node ids of the tests are relative to the test file instead of the cwd
+    return [
+        str(measurement.test_file),
+        f"--rootdir={measurement.test_file.parent}",
+        *PYTEST_ARGS,
+    ]
+
+
+def _test_share_plugins(measurement: _Measurement) -> list[object]:  # pragma: no cover
+    if measurement.workers == 1:
+        return []
+    return [
+        _TestShare(measurement.worker, measurement.workers, measurement.split_above)
+    ]
+
+
+class _TestShare:  # pragma: no cover
+    """
+    A pytest plugin only running every n-th test, starting at an offset.
+
+    If fewer tests than the minimum were collected, the plugin at offset 0 runs
+    all of them and all others none.
+    """
+
+    def __init__(self, offset: int, step: int, minimum: int) -> None:
+        self._offset = offset
+        self._step = step
+        self._minimum = minimum
+
+    def pytest_collection_modifyitems(  # noqa: V105
+        self, config: pytest.Config, items: list[pytest.Item]
+    ) -> None:
+        if len(items) >= self._minimum:
+            selected = items[self._offset :: self._step]
+        else:
+            selected = items if self._offset == 0 else []
+        selected_ids = {id(item) for item in selected}
+        config.hook.pytest_deselected(
+            items=[item for item in items if id(item) not in selected_ids]
+        )
+        items[:] = selected
+
+
+class _TestContexts:  # pragma: no cover
+    """A pytest plugin recording the coverage of every test in its own context."""
+
+    def __init__(self, cov: coverage.Coverage) -> None:
+        self._cov = cov
+        self.node_ids: list[str] = []
+
+    def pytest_runtest_setup(self, item: pytest.Item) -> None:  # noqa: V105
+        self.node_ids.append(item.nodeid)
+        self._cov.switch_context(item.nodeid)
+
+
+class _TestFileContexts:  # pragma: no cover
+    """A pytest plugin recording the coverage of every test file in its own context."""
+
+    def __init__(
+        self, cov: coverage.Coverage, targets: Sequence[CoverageTarget]
+    ) -> None:
+        self._cov = cov
+        self._module_names = {
+            target.test_file: target.module_name for target in targets
+        }
+        self._test_files: dict[str, Path] = {}
+        self._tests: dict[Path, int] = {}
+        self._failed: set[Path] = set()
+        self._broken: set[Path] = set()
+
+    def pytest_collectstart(self, collector: pytest.Collector) -> None:  # noqa: V105
+        if not isinstance(collector, pytest.Module):
+            return
+        self._test_files[collector.nodeid] = collector.path
+        self._cov.switch_context(str(collector.path))
+        # import the target freshly, as if the test file was run on its own
+        forget_module(self._module_names.get(collector.path, ""))
+
+    def pytest_collectreport(self, report: pytest.CollectReport) -> None:  # noqa: V105
+        if report.failed:
+            self._broken.add(self._test_file(report.nodeid))
+
+    def pytest_runtest_setup(self, item: pytest.Item) -> None:  # noqa: V105
+        self._tests[item.path] = self._tests.get(item.path, 0) + 1
+        self._cov.switch_context(str(item.path))
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:  # noqa: V105
+        if report.failed:
+            self._failed.add(self._test_file(report.nodeid))
+
+    def exit_code(self, test_file: Path) -> int:
+        if test_file in self._broken:
+            return pytest.ExitCode.INTERRUPTED
+        if test_file in self._failed:
+            return pytest.ExitCode.TESTS_FAILED
+        if not self._tests.get(test_file):
+            return pytest.ExitCode.NO_TESTS_COLLECTED
+        return pytest.ExitCode.OK
+
+    def _test_file(self, node_id: str) -> Path:
+        return self._test_files.get(node_id.split("::", 1)[0], Path(node_id))
+
+
+__all__ = [
+    "CoverageRun",
+    "CoverageTarget",
+    "measure_coverage",
+    "measure_coverages",
+    "measure_parallel_coverages",
+]
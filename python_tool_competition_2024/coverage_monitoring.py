@@ -0,0 +1,207 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Record the executed lines and branches of a source with `sys.monitoring`."""
+
+from __future__ import annotations
+
+import sys
+
+MONITORING_SUPPORTED = sys.version_info[0:2] >= (3, 12)
+"""Whether the running interpreter supports `sys.monitoring` (PEP 669)."""
+
+if sys.version_info[0:2] >= (3, 12):  # pragma: py312 only
+    import dis
+    from collections.abc import Iterator
+    from pathlib import Path
+    from types import CodeType
+
+    from .coverage_analysis import Arc
+
+    _TOOL_ID = sys.monitoring.COVERAGE_ID
+    _EVENTS = sys.monitoring.events.LINE | sys.monitoring.events.BRANCH
+    _EXITS = frozenset(("RETURN_VALUE", "RETURN_CONST", "YIELD_VALUE"))
+    _RAISES = frozenset(("RAISE_VARARGS", "RERAISE"))
+    _JUMPS = frozenset(
+        ("JUMP", "JUMP_FORWARD", "JUMP_BACKWARD", "JUMP_BACKWARD_NO_INTERRUPT")
+    )
+
+    class ExecutionMonitor:
+        """
+        Records the executed lines and arcs of a source between `start` and `stop`.
+
+        Every line is disabled after its first execution and every branch after
+        both of its destinations were taken, so the measured code runs almost
+        without overhead. All code of other files is disabled when it is first
+        executed.
+        """
+
+        def __init__(self, source: Path) -> None:
+            self._source = source.resolve()
+            self._measured_files: dict[str, bool] = {}
+            self._lines: dict[CodeType, dict[int, int]] = {}
+            self._branches: dict[tuple[CodeType, int], set[int]] = {}
+
+        def start(self) -> None:
+            """Start recording the executed lines and branches."""
+            sys.monitoring.use_tool_id(_TOOL_ID, "python-tool-competition")
+            sys.monitoring.register_callback(
+                _TOOL_ID, sys.monitoring.events.LINE, self._on_line
+            )
+            sys.monitoring.register_callback(
+                _TOOL_ID, sys.monitoring.events.BRANCH, self._on_branch
+            )
+            sys.monitoring.set_events(_TOOL_ID, _EVENTS)
+
+        def stop(self) -> None:
+            """Stop recording and release `sys.monitoring` for other tools."""
+            sys.monitoring.set_events(_TOOL_ID, sys.monitoring.events.NO_EVENTS)
+            sys.monitoring.register_callback(_TOOL_ID, sys.monitoring.events.LINE, None)
+            sys.monitoring.register_callback(
+                _TOOL_ID, sys.monitoring.events.BRANCH, None
+            )
+            sys.monitoring.free_tool_id(_TOOL_ID)
+
+        @property
+        def lines(self) -> frozenset[int]:
+            """The executed line numbers of the source."""
+            return frozenset(
+                line for lines in self._lines.values() for line in lines.values()
+            )
+
+        @property
+        def arcs(self) -> frozenset[Arc]:
+            """
+            The executed arcs between the lines of the source.
+
+            Like the arcs of the tracer of `coverage`, leaving a code object leads
+            to its negated first line. The arcs of the executed lines without
+            branches are derived from the instructions they started at, the arcs
+            of all other lines from the taken branches.
+            """
+            instructions: dict[CodeType, _Instructions] = {}
+
+            def get_instructions(code: CodeType) -> _Instructions:
+                if code not in instructions:
+                    instructions[code] = _Instructions(code)
+                return instructions[code]
+
+            arcs: set[Arc] = set()
+            for code, lines in self._lines.items():
+                arcs.update(get_instructions(code).straight_arcs(lines))
+            for (code, offset), destinations in self._branches.items():
+                arcs.update(get_instructions(code).branch_arcs(offset, destinations))
+            return frozenset(arcs)
+
+        # the callbacks run while tracing is suspended, so the tracer of
+        # `coverage` cannot measure them
+        def _is_measured(self, code: CodeType) -> bool:  # pragma: no cover
+            filename = code.co_filename
+            measured = self._measured_files.get(filename)
+            if measured is None:
+                measured = Path(filename).resolve() == self._source
+                self._measured_files[filename] = measured
+            return measured
+
+        def _on_line(
+            self, code: CodeType, line_number: int
+        ) -> object:  # pragma: no cover
+            if self._is_measured(code):
+                # a line can be compiled more than once, e.g. in `finally`, so
+                # remember which of its instructions ran
+                offset = sys._getframe(1).f_lasti  # noqa: SLF001
+                self._lines.setdefault(code, {})[offset] = line_number
+            return sys.monitoring.DISABLE
+
+        def _on_branch(
+            self, code: CodeType, offset: int, destination: int
+        ) -> object:  # pragma: no cover
+            if not self._is_measured(code):
+                return sys.monitoring.DISABLE
+            destinations = self._branches.setdefault((code, offset), set())
+            destinations.add(destination)
+            # a branch has two destinations, after that nothing new can be learned
+            return sys.monitoring.DISABLE if len(destinations) > 1 else None
+
+    class _Instructions:
+        """The instructions of a code object to follow its execution."""
+
+        def __init__(self, code: CodeType) -> None:
+            self._code = code
+            self._instructions = tuple(dis.get_instructions(code))
+            self._indexes = {
+                instruction.offset: index
+                for index, instruction in enumerate(self._instructions)
+            }
+
+        def straight_arcs(self, lines: dict[int, int]) -> Iterator[Arc]:
+            """Get the arcs of the lines started at the offsets that do not branch."""
+            for offset, line in lines.items():
+                next_line = self._next_line(line, self._indexes[offset])
+                if next_line is not None:
+                    yield line, next_line
+
+        def branch_arcs(self, offset: int, destinations: set[int]) -> Iterator[Arc]:
+            """Get the arcs of a branch at the offset to the taken destinations."""
+            line = self._line_at(self._indexes[offset])
+            if line is None:
+                return
+            for destination in destinations:
+                next_line = self._next_line(line, self._indexes.get(destination))
+                if next_line is not None:
+                    yield line, next_line
+
+        def _next_line(self, line: int, index: int | None) -> int | None:
+            """
+            Get the next line that runs after the instruction at the index.
+
+            Returns `None` if the next line is decided by another branch on the
+            same line, e.g. the second operand of `and`, or if it raises.
+            """
+            visited = set()
+            while (
+                index is not None
+                and index < len(self._instructions)
+                and index not in visited
+            ):
+                visited.add(index)
+                instruction = self._instructions[index]
+                next_line = self._line_at(index)
+                if next_line is not None and next_line != line:
+                    return next_line
+                if instruction.opname in _EXITS:
+                    return -self._code.co_firstlineno
+                if instruction.opname in _RAISES or _is_branch(instruction.opname):
+                    return None
+                if instruction.opname in _JUMPS:
+                    index = self._indexes.get(instruction.argval)
+                else:
+                    index += 1
+            return None
+
+        def _line_at(self, index: int) -> int | None:
+            positions = self._instructions[index].positions
+            return None if positions is None else positions.lineno
+
+    def _is_branch(opname: str) -> bool:
+        return opname.startswith("POP_JUMP_IF_") or opname == "FOR_ITER"
+
+    __all__ = ["MONITORING_SUPPORTED", "ExecutionMonitor"]
+else:
+    __all__ = ["MONITORING_SUPPORTED"]  # pragma: no cover
@@ -139,3 +139,26 @@ class PyprojectTomlNotCreatedError(PythonToolCompetitionError):
         super().__init__(
             f"Poetry init was not able to create the file {pyproject_path}"
         )
+
+
+class NoCandidatesError(PythonToolCompetitionError):
+    """Raised if a generator returns an empty tuple of candidates."""
+
+    def __init__(self) -> None:
+        super().__init__("At least one candidate test must be generated.")
+
+
+class MeasurementTimeoutError(PythonToolCompetitionError):
+    """Raised if running the tests of a test file in a child took too long."""
+
+    def __init__(self, test_file: Path, timeout: float) -> None:
+        super().__init__(
+            f"Running the tests of {test_file} took longer than {timeout}s"
+        )
+
+
+class MeasurementFailedError(PythonToolCompetitionError):
+    """Raised if the child running the tests of a test file crashed."""
+
+    def __init__(self, test_file: Path) -> None:
+        super().__init__(f"Could not run the tests of {test_file}")
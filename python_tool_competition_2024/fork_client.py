@@ -0,0 +1,52 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+The client of a fork server, which runs the tests against the current mutant.
+
+It is started by cosmic-ray for every mutant and only imports the standard
+library, so it starts faster than pytest.
+"""
+
+from __future__ import annotations
+
+import socket
+import sys
+from collections.abc import Sequence
+
+_SERVER_STOPPED = 3
+
+
+def main(arguments: Sequence[str]) -> int:
+    """Let the server at the socket path run the tests and return their exit code."""
+    (socket_path,) = arguments
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+            response = client.recv(1)
+        except ConnectionError:
+            response = b""
+    if not response:
+        sys.stderr.write("The fork server stopped before the tests finished.\n")
+        return _SERVER_STOPPED
+    return response[0]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,249 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Run a test file in forked children of a warm server for every client."""
+
+from __future__ import annotations
+
+import dataclasses
+import importlib.util
+import multiprocessing
+import os
+import py_compile
+import select
+import signal
+import socket
+import sys
+import tempfile
+import warnings
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import contextmanager, suppress
+from pathlib import Path
+
+import pytest
+from coverage.exceptions import CoverageWarning
+
+from .coverage_analysis import find_statement_lines
+from .coverage_map import CoverageMap
+from .errors import MeasurementFailedError
+from .forked_pytest import PYTEST_ARGS, get_test_args
+
+FORK_SERVER_SUPPORTED = "fork" in multiprocessing.get_all_start_methods() and hasattr(
+    socket, "AF_UNIX"
+)
+"""Whether the platform can fork the server and connect to it via a UNIX socket."""
+
+_CLIENT = Path(__file__).with_name("fork_client.py")
+
+
+@dataclasses.dataclass(frozen=True)
+class _TestSelection:
+    source: Path
+    lines: tuple[bytes, ...]
+    statement_lines: Mapping[int, int]
+    coverage_map: CoverageMap
+
+    def select_tests(self) -> tuple[str, ...] | None:
+        """Select the tests that executed the changed lines, `None` to run all."""
+        lines = tuple(self.source.read_bytes().splitlines())
+        if len(lines) != len(self.lines):
+            return None
+        statements = set()
+        for number, (original, current) in enumerate(zip(self.lines, lines), 1):
+            if original != current:
+                statement = self.statement_lines.get(number)
+                if statement is None:
+                    return None
+                statements.add(statement)
+        # the original source runs all tests
+        return self.coverage_map.select_tests(statements) if statements else None
+
+
+@dataclasses.dataclass(frozen=True)
+class _Server:
+    test_file: Path
+    python_paths: tuple[Path, ...]
+    pycache_prefix: Path
+    working_dir: Path
+    selection: _TestSelection | None
+
+
+@contextmanager
+def serve_tests(  # noqa: PLR0913
+    test_file: Path,
+    *,
+    python_paths: Sequence[Path],
+    pycache_prefix: Path,
+    working_dir: Path,
+    source: Path | None = None,
+    coverage_map: CoverageMap | None = None,
+) -> Iterator[tuple[str, ...]]:
+    """
+    Run the test file with pytest for every client in a fork of a warm server.
+
+    The server is a fork of the running process, which collects the test file
+    once to import pytest and all dependencies of the tests. Afterwards, it
+    forgets all modules from the python paths, e.g. the target and the test, and
+    validates their bytecode by the hash of their source, so every child imports
+    their current version, e.g. a mutant written by cosmic-ray. A client gets
+    the exit code of pytest. If it stops waiting, e.g. on a timeout, the child
+    is killed. With the source and its coverage map, a child only runs the
+    tests that executed the statements in which the source differs from its
+    content when the server started.
+
+    Args:
+        test_file: The pytest file to run.
+        python_paths: Additional paths to import the modules from.
+        pycache_prefix: The directory of the bytecode cache.
+        working_dir: The working directory to run the tests in.
+        source: The source that is mutated.
+        coverage_map: The lines of the source covered by each test of the test
+            file.
+
+    Yields:
+        The command to start a client, which exits with the exit code of pytest.
+
+    Raises:
+        MeasurementFailedError: If the server stopped while it was used.
+    """
+    selection = None
+    if source is not None and coverage_map is not None:
+        # read before any client can change the source
+        selection = _TestSelection(
+            source,
+            tuple(source.read_bytes().splitlines()),
+            find_statement_lines(source),
+            coverage_map,
+        )
+    server = _Server(
+        test_file,
+        tuple(path.resolve() for path in python_paths),
+        pycache_prefix,
+        working_dir,
+        selection,
+    )
+    # the path of a UNIX socket is limited to about 100 characters
+    with tempfile.TemporaryDirectory(prefix="fork-server-") as socket_dir:
+        socket_path = Path(socket_dir) / "server.sock"
+        # bind before forking, so clients can connect before the server is warm
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server_socket:
+            server_socket.bind(str(socket_path))
+            server_socket.listen()
+            process = multiprocessing.get_context("fork").Process(
+                target=_serve, args=(server_socket, server), daemon=True
+            )
+            process.start()
+        try:
+            yield (sys.executable, "-I", "-S", str(_CLIENT), str(socket_path))
+            if not process.is_alive():
+                raise MeasurementFailedError(test_file)
+        finally:
+            process.kill()
+            process.join()
+
+
+# the following functions only run in the forked server, which is not measured
+def _serve(server_socket: socket.socket, server: _Server) -> None:  # pragma: no cover
+    os.chdir(server.working_dir)
+    sys.path[:0] = map(str, server.python_paths)
+    # use the hash based bytecode of the target, which notices mutants
+    sys.pycache_prefix = str(server.pycache_prefix)
+    with Path(os.devnull).open(
+        "w", encoding="utf-8"
+    ) as devnull, warnings.catch_warnings():
+        os.dup2(devnull.fileno(), sys.__stdout__.fileno())
+        os.dup2(devnull.fileno(), sys.__stderr__.fileno())
+        sys.stdout = sys.stderr = devnull
+        # e.g. if the test does not import the target
+        warnings.simplefilter("ignore", CoverageWarning)
+        _warm_up(server)
+        while True:
+            connection, _ = server_socket.accept()
+            with connection:
+                _answer(server_socket, connection, server)
+
+
+def _warm_up(server: _Server) -> None:  # pragma: no cover
+    pytest.main([str(server.test_file), *PYTEST_ARGS, "--collect-only"])
+    # also the targets a generator imported before the server was forked
+    for name, module in tuple(sys.modules.items()):
+        file = getattr(module, "__file__", None)
+        if file is not None and _is_local(file, server):
+            del sys.modules[name]
+            # a mutant may have the same size and modification time as the source
+            py_compile.compile(
+                file,
+                cfile=importlib.util.cache_from_source(file),
+                invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH,
+            )
+
+
+def _is_local(file: str, server: _Server) -> bool:  # pragma: no cover
+    path = Path(file).resolve()
+    return path == server.test_file.resolve() or any(
+        path.is_relative_to(python_path) for python_path in server.python_paths
+    )
+
+
+def _answer(
+    server_socket: socket.socket, connection: socket.socket, server: _Server
+) -> None:  # pragma: no cover
+    reader, writer = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            os.close(reader)
+            server_socket.close()
+            connection.close()
+            tests = (
+                None if server.selection is None else server.selection.select_tests()
+            )
+            # a mutant that no test executed cannot be killed
+            exit_code = (
+                pytest.ExitCode.OK
+                if tests == ()
+                else int(
+                    pytest.main(
+                        [
+                            *get_test_args(server.test_file, tests),
+                            *PYTEST_ARGS,
+                            "--exitfirst",
+                        ]
+                    )
+                )
+            )
+        finally:
+            # the pipe is closed on exit, which notifies the server
+            os._exit(exit_code)
+    os.close(writer)
+    try:
+        # the client never sends anything, so it is only readable once it closed
+        readable, _, _ = select.select([reader, connection], [], [])
+        if reader not in readable:
+            os.kill(pid, signal.SIGKILL)
+        _, status = os.waitpid(pid, 0)
+        exit_code = os.waitstatus_to_exitcode(status)
+        with suppress(OSError):
+            connection.sendall(bytes((exit_code if exit_code >= 0 else 1,)))
+    finally:
+        os.close(reader)
+
+
+__all__ = ["FORK_SERVER_SUPPORTED", "serve_tests"]
@@ -0,0 +1,342 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Run pytest in forked copies of the running process."""
+
+from __future__ import annotations
+
+import atexit
+import importlib
+import multiprocessing
+import os
+import pickle
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from collections.abc import Callable, Sequence
+from contextlib import suppress
+from functools import cache
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from typing import TYPE_CHECKING, TypeVar
+
+from coverage.exceptions import CoverageWarning
+
+from .errors import MeasurementFailedError, MeasurementTimeoutError
+
+if sys.version_info[0:2] >= (3, 10):
+    from importlib.metadata import entry_points  # pragma: no cover
+else:
+    from importlib_metadata import entry_points  # pragma: no cover
+
+if TYPE_CHECKING:
+    from multiprocessing.context import ForkContext, SpawnContext
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+PYTEST_ARGS = (
+    "--quiet",
+    "-p",
+    "no:pytest_cov",
+    "-p",
+    "no:cacheprovider",
+    "--override-ini=addopts=",
+)
+"""The arguments to run pytest with in a child, independent of the project."""
+
+# forking keeps pytest and coverage imported, which avoids the startup costs of
+# a new interpreter for every run
+if "fork" in multiprocessing.get_all_start_methods():
+    _CONTEXT: ForkContext | SpawnContext = multiprocessing.get_context("fork")
+else:  # pragma: no cover
+    _CONTEXT = multiprocessing.get_context("spawn")
+
+# a child forked while another thread holds a lock, e.g. the import lock, can
+# deadlock, so other threads start their children from a single-threaded server
+_FORK_SERVER_SUPPORTED = "fork" in multiprocessing.get_all_start_methods() and hasattr(
+    socket, "AF_UNIX"
+)
+
+_SERVER_COMMAND = f"from {__name__} import _serve_children; _serve_children()"
+
+
+class _ForkServer:
+    """A separate interpreter, which forks the children of other threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._server: (
+            tuple[subprocess.Popen[bytes], tempfile.TemporaryDirectory[str]] | None
+        ) = None
+
+    def start_child(self, function: Callable[[_T], object], argument: _T) -> Connection:
+        """
+        Let the server fork a child, which calls the function with the argument.
+
+        Args:
+            function: The picklable function to call in the child.
+            argument: The picklable argument of the function.
+
+        Returns:
+            The connection receiving the result. Closing it kills the child.
+        """
+        with self._lock:
+            if self._server is None or self._server[0].poll() is not None:
+                self._server = self._start()
+            socket_path = Path(self._server[1].name) / "server.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(socket_path))
+            connection = Connection(client.detach())
+        connection.send((str(Path.cwd()), sys.path))
+        # the child unpickles them after it imported from the same python path
+        connection.send_bytes(pickle.dumps((function, argument)))
+        return connection
+
+    def stop(self) -> None:
+        """Stop the server and wait until it exited, if it is running."""
+        with self._lock:
+            if self._server is None:
+                return
+            process, socket_dir = self._server
+            self._server = None
+        # the server stops when its input is closed
+        process.communicate()
+        socket_dir.cleanup()
+
+    @staticmethod
+    def _start() -> tuple[subprocess.Popen[bytes], tempfile.TemporaryDirectory[str]]:
+        # the path of a UNIX socket is limited to about 100 characters
+        socket_dir = tempfile.TemporaryDirectory(prefix="forked-pytest-")
+        # bind before starting, so clients can connect before the server is ready
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server_socket:
+            server_socket.bind(str(Path(socket_dir.name) / "server.sock"))
+            server_socket.listen()
+            process = subprocess.Popen(
+                (  # noqa: S603
+                    sys.executable,
+                    "-c",
+                    _SERVER_COMMAND,
+                    str(server_socket.fileno()),
+                ),
+                stdin=subprocess.PIPE,
+                env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+                pass_fds=(server_socket.fileno(),),
+            )
+        return process, socket_dir
+
+
+_FORK_SERVER = _ForkServer()
+atexit.register(_FORK_SERVER.stop)
+
+
+def stop_fork_server() -> None:
+    """
+    Stop the server forking the children outside of the main thread.
+
+    It is started again by the next call of `run_in_children` that needs it.
+    Otherwise, it stops with the running interpreter.
+    """
+    _FORK_SERVER.stop()
+
+
+def run_in_children(
+    function: Callable[[_T], _R],
+    arguments: Sequence[_T],
+    test_path: Path,
+    timeout: float,
+) -> tuple[_R, ...]:
+    """
+    Run the function for every argument in parallel forked children.
+
+    The output of the children is discarded and their exit handlers are
+    skipped. Outside of the main thread, the children are forked by a separate
+    server process instead, which only has pytest and coverage imported, so
+    the function and its argument must be picklable.
+
+    Args:
+        function: The function to call in each child.
+        arguments: The argument for every child.
+        test_path: The test file or directory run by the children for errors.
+        timeout: The maximum number of seconds all children may run together.
+
+    Returns:
+        The results of the function in the order of the arguments.
+
+    Raises:
+        MeasurementTimeoutError: If the children did not finish in time.
+        MeasurementFailedError: If a child exited without returning a result.
+    """
+    _import_pytest_plugins()
+    use_server = (
+        _FORK_SERVER_SUPPORTED
+        and threading.current_thread() is not threading.main_thread()
+    )
+    deadline = time.monotonic() + timeout
+    receivers: list[Connection] = []
+    processes: list[BaseProcess] = []
+    try:
+        for argument in arguments:
+            if use_server:
+                receivers.append(_FORK_SERVER.start_child(function, argument))
+                continue
+            receiver, sender = _CONTEXT.Pipe(duplex=False)
+            receivers.append(receiver)
+            process = _CONTEXT.Process(
+                target=_run_child, args=(sender, function, argument), daemon=True
+            )
+            process.start()
+            processes.append(process)
+            sender.close()
+        results: list[_R] = []
+        for receiver in receivers:
+            if not receiver.poll(max(deadline - time.monotonic(), 0)):
+                raise MeasurementTimeoutError(test_path, timeout)
+            try:
+                results.append(receiver.recv())
+            except EOFError:
+                raise MeasurementFailedError(test_path) from None
+        return tuple(results)
+    finally:
+        for receiver in receivers:
+            receiver.close()
+        for child in processes:
+            child.kill()
+            child.join()
+
+
+@cache
+def _import_pytest_plugins() -> None:
+    """Import the pytest plugins once, so every forked child has them loaded."""
+    for entry_point in entry_points(group="pytest11"):
+        with suppress(ImportError):
+            entry_point.load()
+
+
+# the following functions only run in the fork server or the forked child, which
+# are not measured
+def _serve_children() -> None:  # pragma: no cover
+    # the children start with pytest, its plugins and coverage imported
+    importlib.import_module("pytest")
+    _import_pytest_plugins()
+    context = multiprocessing.get_context("fork")
+    children: dict[Connection, BaseProcess] = {}
+    stdin = sys.stdin.fileno()
+    with socket.socket(fileno=int(sys.argv[1])) as server_socket:
+        while True:
+            sentinels = [child.sentinel for child in children.values()]
+            ready = wait([stdin, server_socket, *children, *sentinels])
+            if stdin in ready:
+                break
+            for connection, child in tuple(children.items()):
+                # the child exited or its client stopped waiting for it
+                if connection in ready or child.sentinel in ready:
+                    del children[connection]
+                    child.kill()
+                    child.join()
+                    connection.close()
+            if server_socket in ready:
+                client, _ = server_socket.accept()
+                connection = Connection(client.detach())
+                preparation = connection.recv()
+                payload = connection.recv_bytes()
+                child = context.Process(
+                    target=_run_request,
+                    args=(connection, preparation, payload, (server_socket, *children)),
+                    daemon=True,
+                )
+                child.start()
+                children[connection] = child
+        for connection, child in children.items():
+            child.kill()
+            child.join()
+            connection.close()
+
+
+def _run_request(
+    connection: Connection,
+    preparation: tuple[str, list[str]],
+    payload: bytes,
+    inherited: Sequence[socket.socket | Connection],
+) -> None:  # pragma: no cover
+    # the result of the client is only sent by this child
+    for inherited_object in inherited:
+        inherited_object.close()
+    working_dir, python_path = preparation
+    os.chdir(working_dir)
+    sys.path[:] = python_path
+    function, argument = pickle.loads(payload)  # noqa: S301
+    _run_child(connection, function, argument)
+
+
+def _run_child(
+    sender: Connection, function: Callable[[_T], object], argument: _T
+) -> None:  # pragma: no cover
+    try:
+        with Path(os.devnull).open("w", encoding="utf-8") as devnull:
+            os.dup2(devnull.fileno(), sys.__stdout__.fileno())
+            os.dup2(devnull.fileno(), sys.__stderr__.fileno())
+            sys.stdout = sys.stderr = devnull
+            with warnings.catch_warnings():
+                # e.g. if the test does not import the target
+                warnings.simplefilter("ignore", CoverageWarning)
+                sender.send(function(argument))
+    finally:
+        # skip the exit handlers inherited from the parent, e.g. one that saves the
+        # coverage data of a coverage measurement started by the parent
+        os._exit(0)
+
+
+def get_test_args(test_file: Path, tests: Sequence[str] | None) -> tuple[str, ...]:
+    """
+    Get the arguments to run the tests of a test file with pytest.
+
+    Args:
+        test_file: The pytest file containing the tests.
+        tests: The node ids of the tests to run, relative to any root directory,
+            or `None` to run all tests of the file.
+
+    Returns:
+        The test file or the node ids of the tests within it.
+    """
+    if tests is None:
+        return (str(test_file),)
+    # the root directory of the node ids may differ from the one of this run
+    return tuple(f"{test_file}::{test.split('::', 1)[1]}" for test in tests)
+
+
+def forget_module(module_name: str) -> None:  # pragma: no cover
+    """Remove the module and its submodules, so they are imported freshly."""
+    for name in tuple(sys.modules):
+        if name == module_name or name.startswith(f"{module_name}."):
+            del sys.modules[name]
+
+
+__all__ = [
+    "PYTEST_ARGS",
+    "forget_module",
+    "get_test_args",
+    "run_in_children",
+    "stop_fork_server",
+]
@@ -26,6 +26,8 @@ import dataclasses
 import enum
 from functools import total_ordering
 
+from .errors import NoCandidatesError
+
 
 class TestGenerationResult(abc.ABC):  # noqa: B024
     """An abstract version of a test generation result."""
@@ -82,9 +84,29 @@ class TestGenerationSuccess(TestGenerationResult):
     """The body of the generated test."""
 
 
+@dataclasses.dataclass(frozen=True)
+class TestGenerationCandidates(TestGenerationResult):
+    """
+    A successful result of a test generation with multiple candidate tests.
+
+    The coverage of all candidates is measured in parallel and only the candidate
+    with the best branch coverage, and then line coverage, is kept. If multiple
+    candidates are equally good, the first one is kept.
+    """
+
+    bodies: tuple[str, ...]
+    """The bodies of all candidate tests."""
+
+    def __post_init__(self) -> None:
+        """Ensure that there is at least one candidate."""
+        if not self.bodies:
+            raise NoCandidatesError
+
+
 __all__ = [
     "FailureReason",
     "TestGenerationResult",
     "TestGenerationFailure",
     "TestGenerationSuccess",
+    "TestGenerationCandidates",
 ]
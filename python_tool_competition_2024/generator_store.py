@@ -0,0 +1,167 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""A persistent key-value store for the generators."""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from .config import Config
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+"""The default maximum size in bytes of the entries of a single generator."""
+
+_TIMEOUT = 60
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        last_access INTEGER NOT NULL,
+        PRIMARY KEY (namespace, key)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)",
+)
+
+# a global counter instead of a timestamp keeps the order of the accesses exact
+_NEXT_ACCESS = "(SELECT COALESCE(MAX(last_access), 0) + 1 FROM entries)"
+
+
+class GeneratorStore:
+    """
+    A persistent key-value store of a single generator.
+
+    The entries are kept across targets and runs in a SQLite database that is
+    shared between all generators, but each generator only sees its own
+    namespace. If the entries of a generator get larger than `max_size`, the
+    least recently used ones are removed. Multiple threads and processes can
+    use the same store at the same time.
+
+    Values are stored as bytes, so other objects have to be serialized, e.g.
+    with `json` or `pickle`.
+    """
+
+    def __init__(
+        self, path: Path, namespace: str, *, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        """
+        Create a store. The database is only created once it is used.
+
+        Args:
+            path: The path of the SQLite database.
+            namespace: The namespace of the entries, e.g. the generator name.
+            max_size: The maximum size in bytes of all keys and values.
+        """
+        self._path = path
+        self._namespace = namespace
+        self._max_size = max_size
+
+    def get(self, key: str) -> bytes | None:
+        """Get the value of the key or `None` if it is not stored."""
+        if not self._path.exists():
+            return None
+        with self._transaction() as connection:
+            row: tuple[bytes] | None = connection.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ?",
+                (self._namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                f"UPDATE entries SET last_access = {_NEXT_ACCESS} "  # noqa: S608
+                "WHERE namespace = ? AND key = ?",
+                (self._namespace, key),
+            )
+        return row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Store the value for the key and evict the least recently used ones.
+
+        Values that are larger than the maximum size of the store are not
+        stored at all.
+        """
+        size = len(key.encode()) + len(value)
+        if size > self._max_size:
+            self.delete(key)
+            return
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries "  # noqa: S608
+                f"VALUES (?, ?, ?, ?, {_NEXT_ACCESS})",
+                (self._namespace, key, value, size),
+            )
+            connection.execute(
+                """
+                DELETE FROM entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (
+                            ORDER BY last_access DESC
+                        ) AS used_size
+                        FROM entries WHERE namespace = ?
+                    ) WHERE used_size > ?
+                )
+                """,
+                (self._namespace, self._namespace, self._max_size),
+            )
+
+    def delete(self, key: str) -> None:
+        """Remove the key from the store if it exists."""
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                (self._namespace, key),
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        # a new connection per transaction can be used by any thread or process
+        connection = sqlite3.connect(self._path, timeout=_TIMEOUT, isolation_level=None)
+        try:
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in _SCHEMA:
+                    connection.execute(statement)
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+
+def get_generator_store(config: Config) -> GeneratorStore:
+    """Get the store of the generator of the config."""
+    return GeneratorStore(
+        config.cache_dir / "generator_store.sqlite3", config.generator_name
+    )
+
+
+__all__ = ["DEFAULT_MAX_SIZE", "GeneratorStore", "get_generator_store"]
@@ -19,19 +19,27 @@
 #
 """Base classes and helpers for the generators."""
 
+from __future__ import annotations
 
 import abc
+import ast
 import dataclasses
 import importlib
+import importlib.util
 import os
-import sys
-from collections.abc import Iterator
-from contextlib import contextmanager
+import tempfile
+from functools import cached_property
 from pathlib import Path
 from types import ModuleType
 
 from .config import Config
+from .coverage_measurement import CoverageRun, measure_coverage
 from .generation_results import TestGenerationResult, TestGenerationSuccess
+from .generator_store import GeneratorStore, get_generator_store
+from .previous_results import PreviousResult, get_previous_result
+from .source_analysis import ClassInfo, FunctionInfo, find_classes, find_functions
+from .target_importer import import_target
+from .target_index import TargetMetadata, get_target_index
 
 
 @dataclasses.dataclass(frozen=True)
@@ -47,10 +55,97 @@ class FileInfo:
     config: Config
     """The configuration of the current run of the competition tool."""
 
+    @cached_property
+    def source(self) -> str:
+        """The source code of the target file. It is only read once."""
+        return importlib.util.decode_source(self.absolute_path.read_bytes())
+
+    @cached_property
+    def syntax_tree(self) -> ast.Module:
+        """The parsed AST of `source`. It is only parsed once."""
+        return ast.parse(self.source, filename=str(self.absolute_path))
+
+    @cached_property  # noqa: V105
+    def functions(self) -> tuple[FunctionInfo, ...]:
+        """All top-level functions of the target file with their signatures."""
+        return find_functions(self.syntax_tree)
+
+    @cached_property  # noqa: V105
+    def classes(self) -> tuple[ClassInfo, ...]:
+        """All top-level classes of the target file with their methods."""
+        return find_classes(self.syntax_tree)
+
+    @cached_property
+    def metadata(self) -> TargetMetadata:
+        """
+        The metadata of the target file from the persisted target index.
+
+        The index is built once per run and reused between runs and generators as
+        long as the target does not change.
+        """
+        return get_target_index(self.config).get_metadata(self.absolute_path)
+
+    @cached_property  # noqa: V105
+    def store(self) -> GeneratorStore:
+        """
+        A persistent key-value store of the current generator.
+
+        It is shared between all targets and kept between runs, e.g. to reuse
+        expensive results that do not depend on a single target.
+        """
+        return get_generator_store(self.config)
+
+    @cached_property  # noqa: V105
+    def previous_result(self) -> PreviousResult | None:
+        """
+        The generated test and its metrics from the previous run of the generator.
+
+        It is `None` if the target was not part of the previous run. The target
+        may have changed since, so the previous test should only be used as a
+        starting point, e.g. to refine it with `evaluate_draft`.
+        """
+        return get_previous_result(self.absolute_path, self.config)
+
+    @cached_property
+    def module(self) -> ModuleType:
+        """The imported module of the target file. It is only imported once."""
+        return import_target(self.config.targets_dir, self.module_name)
+
     def import_module(self) -> ModuleType:
         """Import the module that represents this file."""
-        with _extend_path(self.config.targets_dir):
-            return importlib.import_module(self.module_name)
+        return self.module
+
+    def evaluate_draft(  # noqa: V105
+        self, body: str, *, timeout: float = 60
+    ) -> CoverageRun:
+        """
+        Measure the coverages a draft test reaches on this target.
+
+        The draft is run with pytest in a fork of the current process, so it is
+        much faster than a full evaluation and can be used to iteratively
+        improve a test before returning it. Outside of the main thread, e.g.
+        with multiple generation workers, the draft runs in a fork of a
+        separate server process instead, since forking a process with multiple
+        threads can deadlock.
+
+        Args:
+            body: The content of the draft test file.
+            timeout: The maximum number of seconds the draft may run.
+
+        Returns:
+            The exit code of pytest, the line and branch coverages and the
+            lines and branches that were missed.
+        """
+        with tempfile.TemporaryDirectory() as test_dir:
+            test_file = Path(test_dir) / "test_draft.py"
+            test_file.write_text(body, encoding="utf-8")
+            return measure_coverage(
+                self.absolute_path,
+                self.module_name,
+                test_file,
+                python_paths=(self.config.targets_dir,),
+                timeout=timeout,
+            )
 
 
 class TestGenerator(abc.ABC):
@@ -101,14 +196,4 @@ class DummyTestGenerator(TestGenerator):
         )
 
 
-@contextmanager
-def _extend_path(path: Path) -> Iterator[None]:
-    old_path = sys.path
-    sys.path = [*sys.path, str(path)]
-    try:
-        yield
-    finally:
-        sys.path = old_path
-
-
 __all__ = ["FileInfo", "TestGenerator", "DummyTestGenerator"]
@@ -0,0 +1,689 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Generate mutants of a source and run a test against them in forked children."""
+
+from __future__ import annotations
+
+import ast
+import copy
+import dataclasses
+import importlib.abc
+import importlib.util
+import marshal
+import operator
+import sys
+import time
+from collections.abc import Callable, Container, Iterable, Iterator, Mapping, Sequence
+from importlib.machinery import ModuleSpec
+from pathlib import Path
+from types import CodeType, ModuleType
+from typing import cast
+
+import pytest
+
+from .coverage_analysis import find_statement_lines
+from .coverage_map import CoverageMap
+from .errors import MeasurementFailedError, MeasurementTimeoutError
+from .forked_pytest import PYTEST_ARGS, forget_module, get_test_args, run_in_children
+
+_OPERATORS: Mapping[type[ast.AST], type[ast.AST]] = {
+    # arithmetic and bitwise operators
+    ast.Add: ast.Sub,
+    ast.Sub: ast.Add,
+    ast.Mult: ast.Div,
+    ast.Div: ast.Mult,
+    ast.FloorDiv: ast.Div,
+    ast.Mod: ast.FloorDiv,
+    ast.Pow: ast.Mult,
+    ast.LShift: ast.RShift,
+    ast.RShift: ast.LShift,
+    ast.BitAnd: ast.BitOr,
+    ast.BitOr: ast.BitAnd,
+    ast.BitXor: ast.BitAnd,
+    # comparison operators
+    ast.Eq: ast.NotEq,
+    ast.NotEq: ast.Eq,
+    ast.Lt: ast.LtE,
+    ast.LtE: ast.Lt,
+    ast.Gt: ast.GtE,
+    ast.GtE: ast.Gt,
+    ast.Is: ast.IsNot,
+    ast.IsNot: ast.Is,
+    ast.In: ast.NotIn,
+    ast.NotIn: ast.In,
+    # boolean and unary operators
+    ast.And: ast.Or,
+    ast.Or: ast.And,
+    ast.USub: ast.UAdd,
+    ast.UAdd: ast.USub,
+    # loop control
+    ast.Break: ast.Continue,
+    ast.Continue: ast.Break,
+}
+
+# annotations are not executed at runtime, mutating them creates equivalent mutants
+_SKIPPED_FIELDS = frozenset(("annotation", "returns", "type_comment"))
+
+# the patterns of `match` statements only accept constants, which cannot be switched
+if sys.version_info[0:2] >= (3, 10):
+    _PATTERNS: tuple[type[ast.AST], ...] = (ast.pattern,)
+else:  # pragma: no cover
+    _PATTERNS = ()
+
+# the global of a mutant schema selecting the active mutant
+_ACTIVE_MUTANT = "__active_mutant__"
+# the global of a mutant schema with the functions its operators dispatch to
+_OPERATOR_FUNCTIONS = "__mutant_operators__"
+
+_MIN_MUTANT_TIMEOUT = 5
+_MUTANT_TIMEOUT_FACTOR = 10
+
+
+@dataclasses.dataclass(frozen=True)
+class Mutant:
+    """A mutated version of a source."""
+
+    operator: str
+    """A description of the mutation, e.g. `replace Add with Sub`."""
+
+    line: int
+    """The line number of the mutated code."""
+
+    code: CodeType
+    """The compiled code of the mutated module."""
+
+    identifier: int | None = None
+    """
+    The identifier selecting the mutant if the code is a mutant schema.
+
+    A mutant schema contains all mutants of a source and is only compiled once.
+    `None` if the code only contains this mutant.
+    """
+
+
+@dataclasses.dataclass(frozen=True)
+class MutationRun:
+    """The result of running a test against the mutants of a source."""
+
+    exit_code: int
+    """The exit code of pytest on the original source. `0` if all tests passed."""
+
+    killed: tuple[bool, ...]
+    """
+    Whether each mutant was killed in the order of the mutants.
+
+    The mutants only run if all tests passed on the original source, otherwise
+    none of them is killed.
+    """
+
+    @property  # noqa: V106
+    def passed(self) -> bool:
+        """Whether all tests passed on the original source."""
+        return self.exit_code == pytest.ExitCode.OK
+
+
+@dataclasses.dataclass(frozen=True)
+class _Mutation:
+    operator: str
+    line: int
+    node: ast.AST
+    field: str
+    position: int | None
+    replacement: ast.AST
+
+    def swap(self, replacement: ast.AST) -> ast.AST:
+        """Replace the mutated child of the node and return the previous one."""
+        if self.position is None:
+            previous: ast.AST = getattr(self.node, self.field)
+            setattr(self.node, self.field, replacement)
+        else:
+            children = getattr(self.node, self.field)
+            previous = children[self.position]
+            children[self.position] = replacement
+        return previous
+
+
+@dataclasses.dataclass(frozen=True)
+class _TestRun:
+    source: Path
+    module_name: str
+    test_file: Path
+    python_paths: tuple[Path, ...]
+    bytecode: bytes | None
+    identifier: int | None
+    tests: tuple[str, ...] | None
+
+
+@dataclasses.dataclass(frozen=True)
+class _Switch:
+    identifier: int
+    field: str
+    position: int | None
+    operator: ast.AST
+
+
+class _SchemaBuilder:
+    """Builds a copy of a tree that switches to a mutation by its identifier."""
+
+    def __init__(self, mutations: Sequence[_Mutation]) -> None:
+        self._identifiers = {
+            (id(mutation.node), mutation.field, mutation.position): identifier
+            for identifier, mutation in enumerate(mutations)
+        }
+        self.excluded: set[int] = set()
+        """The mutations inside of patterns, which cannot contain switches."""
+
+    def build(self, node: ast.AST, *, in_pattern: bool = False) -> ast.AST:
+        """
+        Copy the node and its children with switches to all their mutations.
+
+        The operators of expressions dispatch to a function by the active mutant,
+        so their operands are only compiled once. Only the operators of augmented
+        assignments and chained comparisons switch a copy of the whole node.
+        """
+        in_pattern = in_pattern or isinstance(node, _PATTERNS)
+        schema = copy.copy(node)
+        switches: list[_Switch] = []
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                new_value: object = [
+                    (
+                        self._build_child(
+                            node,
+                            field,
+                            position,
+                            child,
+                            switches,
+                            in_pattern=in_pattern,
+                        )
+                        if isinstance(child, ast.AST)
+                        else child
+                    )
+                    for position, child in enumerate(value)
+                ]
+            elif isinstance(value, ast.AST):
+                new_value = self._build_child(
+                    node, field, None, value, switches, in_pattern=in_pattern
+                )
+            else:
+                continue
+            setattr(schema, field, new_value)
+        if in_pattern:
+            self.excluded.update(switch.identifier for switch in switches)
+            return schema
+        if switches and _can_dispatch(schema):
+            (switch,) = switches
+            return _dispatch(switch, schema)
+        # the remaining operators are switched by switching the whole node
+        result = schema
+        for switch in switches:
+            mutant = copy.copy(schema)
+            if switch.position is None:
+                setattr(mutant, switch.field, switch.operator)
+            else:
+                operators = list(getattr(schema, switch.field))
+                operators[switch.position] = switch.operator
+                setattr(mutant, switch.field, operators)
+            result = _switch(switch.identifier, mutant, result)
+        return result
+
+    def _build_child(  # noqa: PLR0913
+        self,
+        node: ast.AST,
+        field: str,
+        position: int | None,
+        child: ast.AST,
+        switches: list[_Switch],
+        *,
+        in_pattern: bool,
+    ) -> ast.AST:
+        schema = self.build(child, in_pattern=in_pattern)
+        identifier = self._identifiers.get((id(node), field, position))
+        if identifier is None:
+            return schema
+        # the copy of the child has the same mutations as the child
+        _, mutated = cast(tuple[str, ast.AST], _replace(schema))
+        if isinstance(mutated, (ast.operator, ast.cmpop, ast.boolop, ast.unaryop)):
+            switches.append(_Switch(identifier, field, position, mutated))
+            return schema
+        if in_pattern:
+            self.excluded.add(identifier)
+            return schema
+        if isinstance(schema, ast.UnaryOp):
+            # removes `not` without compiling its operand twice
+            return _call_operator(
+                _is_active(identifier), "Identity", "Not", schema, [schema.operand]
+            )
+        return _switch(identifier, mutated, schema)
+
+
+def generate_mutants(source: Path, *, schemata: bool = False) -> tuple[Mutant, ...]:
+    """
+    Generate the first order mutants of a source.
+
+    The mutants replace arithmetic, bitwise, comparison, boolean and unary
+    operators, negate booleans, increment numbers, swap `break` and `continue`
+    and remove `not`. Annotations and strings are not mutated.
+
+    Args:
+        source: The source file to mutate.
+        schemata: Whether to compile all mutants into a single mutant schema
+            instead of compiling every mutant on its own. Mutants in patterns of
+            `match` statements are still compiled on their own.
+
+    Returns:
+        The compiled mutants in the order of the source. Mutants that cannot be
+        compiled are left out.
+    """
+    tree = ast.parse(source.read_bytes(), str(source))
+    mutations = tuple(_collect_mutations(tree))
+    schema = None
+    excluded: set[int] = set()
+    if schemata and mutations:
+        builder = _SchemaBuilder(mutations)
+        schema_tree = cast(ast.Module, builder.build(tree))
+        schema = _compile(ast.fix_missing_locations(schema_tree), source)
+        excluded = builder.excluded
+    mutants = []
+    for identifier, mutation in enumerate(mutations):
+        if schema is None or identifier in excluded:
+            original = mutation.swap(mutation.replacement)
+            try:
+                code = _compile(tree, source)
+            except (SyntaxError, ValueError):
+                # e.g. `case +1:`, patterns only accept some operators
+                continue
+            finally:
+                mutation.swap(original)
+            mutants.append(Mutant(mutation.operator, mutation.line, code))
+        else:
+            mutants.append(Mutant(mutation.operator, mutation.line, schema, identifier))
+    return tuple(mutants)
+
+
+def run_mutants(  # noqa: PLR0913
+    source: Path,
+    module_name: str,
+    test_file: Path,
+    mutants: Sequence[Mutant],
+    *,
+    python_paths: Sequence[Path],
+    timeout: float,
+    coverage_map: CoverageMap | None = None,
+) -> MutationRun:
+    """
+    Run the test file with pytest against every mutant of the source.
+
+    The tests first run against the original source and afterwards against one
+    mutant after the other, each in a forked child. An import hook loads the
+    mutant from memory instead of the source, so no file is changed. A mutant is
+    killed if a test fails, if its child crashes or if the tests take ten times
+    longer than on the original source. With a coverage map, only the tests that
+    executed the statement of a mutant run against it, so a mutant that no test
+    executed survives without running any test.
+
+    Args:
+        source: The source file that was mutated.
+        module_name: The module name of the source file.
+        test_file: The pytest file to run.
+        mutants: The mutants of the source.
+        python_paths: Additional paths to import the modules from.
+        timeout: The maximum number of seconds the tests may run on the original
+            source or on a single mutant.
+        coverage_map: The lines covered by each test of the test file.
+
+    Returns:
+        The exit code of pytest on the original source and which mutants were
+        killed.
+
+    Raises:
+        MeasurementTimeoutError: If the tests did not finish on the original
+            source in time.
+        MeasurementFailedError: If the tests crashed on the original source.
+    """
+    paths = tuple(python_paths)
+    start = time.monotonic()
+    (exit_code,) = run_in_children(
+        _run_tests,
+        (_TestRun(source, module_name, test_file, paths, None, None, None),),
+        test_file,
+        timeout,
+    )
+    if exit_code != pytest.ExitCode.OK:
+        return MutationRun(exit_code=exit_code, killed=(False,) * len(mutants))
+    mutant_timeout = min(
+        timeout,
+        max(_MIN_MUTANT_TIMEOUT, _MUTANT_TIMEOUT_FACTOR * (time.monotonic() - start)),
+    )
+    # the mutants of a schema share their code, which is only serialized once
+    bytecodes = {code: marshal.dumps(code) for code in {m.code for m in mutants}}
+    statement_lines = {} if coverage_map is None else find_statement_lines(source)
+    killed = []
+    for mutant in mutants:
+        tests = _select_tests(mutant, coverage_map, statement_lines)
+        killed.append(
+            tests != ()
+            and _is_killed(
+                _TestRun(
+                    source,
+                    module_name,
+                    test_file,
+                    paths,
+                    bytecodes[mutant.code],
+                    mutant.identifier,
+                    tests,
+                ),
+                mutant_timeout,
+            )
+        )
+    return MutationRun(exit_code=exit_code, killed=tuple(killed))
+
+
+def _select_tests(
+    mutant: Mutant, coverage_map: CoverageMap | None, statement_lines: Mapping[int, int]
+) -> tuple[str, ...] | None:
+    """Select the tests that executed the mutant or `None` to run all tests."""
+    statement = statement_lines.get(mutant.line)
+    if coverage_map is None or statement is None:
+        return None
+    return coverage_map.select_tests((statement,))
+
+
+def _collect_mutations(node: ast.AST) -> Iterator[_Mutation]:
+    for field, value in ast.iter_fields(node):
+        if field in _SKIPPED_FIELDS:
+            continue
+        children: Iterable[tuple[int | None, object]] = (
+            enumerate(value) if isinstance(value, list) else ((None, value),)
+        )
+        for position, child in children:
+            if isinstance(child, ast.AST):
+                replacement = _replace(child)
+                if replacement is not None:
+                    description, new_child = replacement
+                    yield _Mutation(
+                        operator=description,
+                        line=getattr(child, "lineno", getattr(node, "lineno", 0)),
+                        node=node,
+                        field=field,
+                        position=position,
+                        replacement=new_child,
+                    )
+                yield from _collect_mutations(child)
+
+
+def _replace(node: ast.AST) -> tuple[str, ast.AST] | None:
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return "remove Not", node.operand
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool):
+            new_value: object = not value
+        elif isinstance(value, (int, float)):
+            new_value = value + 1
+        else:
+            return None
+        return (
+            f"replace {value!r} with {new_value!r}",
+            ast.copy_location(ast.Constant(value=new_value), node),
+        )
+    replacement = _OPERATORS.get(type(node))
+    if replacement is None:
+        return None
+    return (
+        f"replace {type(node).__name__} with {replacement.__name__}",
+        ast.copy_location(replacement(), node),
+    )
+
+
+def _compile(tree: ast.Module, source: Path) -> CodeType:
+    return compile(tree, str(source), "exec", dont_inherit=True)
+
+
+def _switch(identifier: int, mutant: ast.AST, original: ast.AST) -> ast.AST:
+    """Switch to the mutant if its identifier is the active mutant."""
+    is_active = _is_active(identifier)
+    switch: ast.AST
+    if isinstance(original, ast.stmt):
+        switch = ast.If(test=is_active, body=[mutant], orelse=[original])
+    else:
+        switch = ast.IfExp(test=is_active, body=mutant, orelse=original)
+    return ast.copy_location(switch, original)
+
+
+def _is_active(identifier: int, *, negate: bool = False) -> ast.expr:
+    return ast.Compare(
+        left=ast.Name(id=_ACTIVE_MUTANT, ctx=ast.Load()),
+        ops=[ast.NotEq() if negate else ast.Eq()],
+        comparators=[ast.Constant(value=identifier)],
+    )
+
+
+def _can_dispatch(node: ast.AST) -> bool:
+    if isinstance(node, ast.Compare):
+        # the operands of chained comparisons are shared by two operators
+        return len(node.ops) == 1
+    return isinstance(node, (ast.BinOp, ast.UnaryOp, ast.BoolOp))
+
+
+def _dispatch(switch: _Switch, node: ast.AST) -> ast.expr:
+    """Dispatch the operator of the node to a function by the active mutant."""
+    if isinstance(node, ast.BoolOp):
+        # stops at the first falsy value like `and` or at the first truthy like `or`
+        negate = isinstance(node.op, ast.Or)
+        *values, last = node.values  # noqa: PD011
+        stops = [
+            _call(
+                "stop", value, _is_active(switch.identifier, negate=negate), node=value
+            )
+            for value in values
+        ]
+        result = ast.BoolOp(op=ast.Or(), values=[*stops, last])
+        return _call("unwrap", result, node=node)
+    original = getattr(node, switch.field)
+    if switch.position is not None:
+        original = original[switch.position]
+    operands: list[ast.expr]
+    if isinstance(node, ast.BinOp):
+        operands = [node.left, node.right]
+    elif isinstance(node, ast.UnaryOp):
+        operands = [node.operand]
+    else:
+        compare = cast(ast.Compare, node)
+        operands = [compare.left, *compare.comparators]
+    return _call_operator(
+        _is_active(switch.identifier),
+        type(switch.operator).__name__,
+        type(original).__name__,
+        node,
+        operands,
+    )
+
+
+def _call_operator(
+    is_active: ast.expr,
+    mutant: str,
+    original: str,
+    node: ast.AST,
+    operands: list[ast.expr],
+) -> ast.expr:
+    """Call the function of the mutated operator if the mutant is active."""
+    function = ast.IfExp(
+        test=is_active,
+        body=ast.Constant(value=mutant),
+        orelse=ast.Constant(value=original),
+    )
+    return _call(function, *operands, node=node)
+
+
+def _call(name: str | ast.expr, *args: ast.expr, node: ast.AST) -> ast.expr:
+    """Call a function of the mutant schema by its name."""
+    function = ast.Subscript(
+        value=ast.Name(id=_OPERATOR_FUNCTIONS, ctx=ast.Load()),
+        slice=ast.Constant(value=name) if isinstance(name, str) else name,
+        ctx=ast.Load(),
+    )
+    call = ast.Call(func=function, args=list(args), keywords=[])
+    return ast.copy_location(call, node)
+
+
+def _is_killed(run: _TestRun, timeout: float) -> bool:
+    try:
+        (exit_code,) = run_in_children(_run_tests, (run,), run.test_file, timeout)
+    except (MeasurementFailedError, MeasurementTimeoutError):
+        return True
+    return exit_code != pytest.ExitCode.OK
+
+
+# the following functions only run in the forked child, which is not measured
+def _run_tests(run: _TestRun) -> int:  # pragma: no cover
+    sys.path[:0] = map(str, run.python_paths)
+    forget_module(run.module_name)
+    if run.bytecode is not None:
+        # the bytecode was compiled by the parent process
+        code = marshal.loads(run.bytecode)  # noqa: S302  # nosec B302
+        sys.meta_path.insert(
+            0, _MutantFinder(run.module_name, run.source, code, run.identifier)
+        )
+    return int(
+        pytest.main(
+            [*get_test_args(run.test_file, run.tests), *PYTEST_ARGS, "--exitfirst"]
+        )
+    )
+
+
+class _MutantFinder(importlib.abc.MetaPathFinder):  # pragma: no cover
+    """An import hook loading a mutant instead of its source."""
+
+    def __init__(
+        self, module_name: str, source: Path, code: CodeType, identifier: int | None
+    ) -> None:
+        self._module_name = module_name
+        self._source = source
+        self._code = code
+        self._identifier = identifier
+
+    def find_spec(
+        self,
+        fullname: str,
+        path: Sequence[str] | None,  # noqa: ARG002
+        target: ModuleType | None = None,  # noqa: ARG002
+    ) -> ModuleSpec | None:
+        if fullname != self._module_name:
+            return None
+        return importlib.util.spec_from_file_location(
+            fullname,
+            self._source,
+            loader=_MutantLoader(self._code, self._identifier),
+            submodule_search_locations=(
+                [str(self._source.parent)]
+                if self._source.name == "__init__.py"
+                else None
+            ),
+        )
+
+
+class _MutantLoader(importlib.abc.Loader):  # pragma: no cover
+    def __init__(self, code: CodeType, identifier: int | None) -> None:
+        self._code = code
+        self._identifier = identifier
+
+    def exec_module(self, module: ModuleType) -> None:  # noqa: V105
+        if self._identifier is not None:
+            # selects the mutant of the schema
+            module.__dict__[_ACTIVE_MUTANT] = self._identifier
+            module.__dict__[_OPERATOR_FUNCTIONS] = {
+                **_UNARY_FUNCTIONS,
+                **_BINARY_FUNCTIONS,
+            }
+        exec(self._code, module.__dict__)  # noqa: S102  # nosec B102
+
+
+class _Stopped:  # pragma: no cover
+    """The value a boolean operation of a mutant schema stopped at."""
+
+    def __init__(self, value: object) -> None:
+        self.value = value
+
+
+def _stop(value: object, is_or: object) -> _Stopped | None:  # pragma: no cover
+    """Stop at truthy values like `or` or at falsy values like `and`."""
+    return _Stopped(value) if bool(value) == is_or else None
+
+
+def _unwrap(result: object) -> object:  # pragma: no cover
+    return result.value if isinstance(result, _Stopped) else result
+
+
+def _in(value: object, container: object) -> bool:  # pragma: no cover
+    return value in cast(Container[object], container)
+
+
+def _not_in(value: object, container: object) -> bool:  # pragma: no cover
+    return value not in cast(Container[object], container)
+
+
+def _identity(value: object) -> object:  # pragma: no cover
+    return value
+
+
+# the functions of the operator module accept any operands that support them,
+# which is only checked at runtime like for the operators themselves
+_UnaryFunction = Callable[[object], object]
+_BinaryFunction = Callable[[object, object], object]
+
+# the functions of a mutant schema with one operand by their names
+_UNARY_FUNCTIONS: Mapping[str, _UnaryFunction] = {
+    "USub": cast(_UnaryFunction, operator.neg),
+    "UAdd": cast(_UnaryFunction, operator.pos),
+    "Not": operator.not_,
+    "Identity": _identity,
+    "unwrap": _unwrap,
+}
+
+# the functions of a mutant schema with two operands by their names
+_BINARY_FUNCTIONS: Mapping[str, _BinaryFunction] = {
+    "Add": operator.add,
+    "Sub": operator.sub,
+    "Mult": operator.mul,
+    "Div": operator.truediv,
+    "FloorDiv": operator.floordiv,
+    "Mod": operator.mod,
+    "Pow": operator.pow,
+    "LShift": operator.lshift,
+    "RShift": operator.rshift,
+    "BitAnd": operator.and_,
+    "BitOr": operator.or_,
+    "BitXor": operator.xor,
+    "Eq": operator.eq,
+    "NotEq": operator.ne,
+    "Lt": cast(_BinaryFunction, operator.lt),
+    "LtE": cast(_BinaryFunction, operator.le),
+    "Gt": cast(_BinaryFunction, operator.gt),
+    "GtE": cast(_BinaryFunction, operator.ge),
+    "Is": operator.is_,
+    "IsNot": operator.is_not,
+    "In": _in,
+    "NotIn": _not_in,
+    "stop": _stop,
+}
+
+
+__all__ = ["Mutant", "MutationRun", "generate_mutants", "run_mutants"]
@@ -0,0 +1,108 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Access the results of the previous run of a generator."""
+
+from __future__ import annotations
+
+import csv
+import dataclasses
+import shutil
+from pathlib import Path
+
+from .config import Config
+from .results import RatioResult
+from .target_finder import get_target
+
+
+@dataclasses.dataclass(frozen=True)
+class PreviousResult:
+    """The result of a target in the previous run of the same generator."""
+
+    test: str | None
+    """The generated test or `None` if no valid test was generated."""
+
+    line_coverage: RatioResult
+    """The line coverage the generated test reached."""
+
+    branch_coverage: RatioResult
+    """The branch coverage the generated test reached."""
+
+    mutation_analysis: RatioResult
+    """The mutation score the generated test reached."""
+
+
+def keep_previous_results(config: Config) -> None:
+    """
+    Move the results of the previous run aside before a new run starts.
+
+    Only the results of the last run are kept.
+    """
+    previous_dir = _previous_results_dir(config)
+    if previous_dir.exists():
+        shutil.rmtree(previous_dir)
+    if config.results_dir.exists():
+        previous_dir.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(config.results_dir, previous_dir)
+
+
+def get_previous_result(source: Path, config: Config) -> PreviousResult | None:
+    """
+    Get the result of a target from the previous run of the current generator.
+
+    Args:
+        source: The absolute source file of the target.
+        config: The configuration of the current run.
+
+    Returns:
+        The previous result or `None` if the target was not part of the previous
+        run.
+    """
+    previous_dir = _previous_results_dir(config)
+    target = get_target(source, config)
+    row = _find_statistics(
+        previous_dir / config.csv_file.relative_to(config.results_dir),
+        str(target.relative_source),
+    )
+    if row is None:
+        return None
+    test = previous_dir / target.test.relative_to(config.results_dir)
+    return PreviousResult(
+        test=test.read_text(encoding="utf-8") if test.exists() else None,
+        line_coverage=RatioResult(int(row["lines"]), int(row["covered lines"])),
+        branch_coverage=RatioResult(int(row["branches"]), int(row["covered branches"])),
+        mutation_analysis=RatioResult(int(row["mutants"]), int(row["killed mutants"])),
+    )
+
+
+def _previous_results_dir(config: Config) -> Path:
+    return config.cache_dir / "previous_results" / config.generator_name
+
+
+def _find_statistics(csv_file: Path, relative_source: str) -> dict[str, str] | None:
+    if not csv_file.exists():
+        return None
+    with csv_file.open(encoding="utf-8", newline="") as fp:
+        return next(
+            (row for row in csv.DictReader(fp) if row["target"] == relative_source),
+            None,
+        )
+
+
+__all__ = ["PreviousResult", "get_previous_result", "keep_previous_results"]
@@ -0,0 +1,191 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Static analysis of the symbols defined in a target file."""
+
+from __future__ import annotations
+
+import ast
+import dataclasses
+import enum
+
+
+class ParameterKind(enum.Enum):
+    """The kind of a parameter, equivalent to `inspect.Parameter.kind`."""
+
+    POSITIONAL_ONLY = "positional_only"
+    POSITIONAL_OR_KEYWORD = "positional_or_keyword"
+    VAR_POSITIONAL = "var_positional"
+    KEYWORD_ONLY = "keyword_only"
+    VAR_KEYWORD = "var_keyword"
+
+
+@dataclasses.dataclass(frozen=True)
+class ParameterInfo:
+    """A parameter of a function signature."""
+
+    name: str
+    """The name of the parameter."""
+
+    kind: ParameterKind
+    """How the argument is bound to this parameter."""
+
+    annotation: str | None
+    """The source of the type annotation or `None` if it is not annotated."""
+
+    default: str | None
+    """The source of the default value or `None` if there is no default."""
+
+
+@dataclasses.dataclass(frozen=True)
+class FunctionInfo:
+    """A function or method defined in a target file."""
+
+    name: str
+    """The name of the function."""
+
+    lineno: int
+    """The line number of the definition."""
+
+    signature: str
+    """The source of the signature, e.g. `(number: int) -> str`."""
+
+    parameters: tuple[ParameterInfo, ...]
+    """All parameters in the order of the definition."""
+
+    return_annotation: str | None
+    """The source of the return annotation or `None` if it is not annotated."""
+
+    is_async: bool  # noqa: V107
+    """Whether the function is defined with `async def`."""
+
+
+@dataclasses.dataclass(frozen=True)
+class ClassInfo:
+    """A class defined in a target file."""
+
+    name: str
+    """The name of the class."""
+
+    lineno: int
+    """The line number of the definition."""
+
+    bases: tuple[str, ...]
+    """The sources of all base classes."""
+
+    methods: tuple[FunctionInfo, ...]  # noqa: V107
+    """All methods defined directly in the class body."""
+
+
+_FunctionNode = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def find_functions(tree: ast.Module | ast.ClassDef) -> tuple[FunctionInfo, ...]:
+    """Find all functions that are defined directly in the body of the `tree`."""
+    return tuple(
+        _to_function_info(node) for node in tree.body if isinstance(node, _FunctionNode)
+    )
+
+
+def find_classes(tree: ast.Module) -> tuple[ClassInfo, ...]:
+    """Find all classes that are defined directly in the body of the `tree`."""
+    return tuple(
+        ClassInfo(
+            name=node.name,
+            lineno=node.lineno,
+            bases=tuple(ast.unparse(base) for base in node.bases),
+            methods=find_functions(node),
+        )
+        for node in tree.body
+        if isinstance(node, ast.ClassDef)
+    )
+
+
+def _to_function_info(node: ast.FunctionDef | ast.AsyncFunctionDef) -> FunctionInfo:
+    signature = f"({ast.unparse(node.args)})"
+    return_annotation = _unparse_optional(node.returns)
+    if return_annotation is not None:
+        signature = f"{signature} -> {return_annotation}"
+    return FunctionInfo(
+        name=node.name,
+        lineno=node.lineno,
+        signature=signature,
+        parameters=_to_parameter_infos(node.args),
+        return_annotation=return_annotation,
+        is_async=isinstance(node, ast.AsyncFunctionDef),
+    )
+
+
+def _to_parameter_infos(args: ast.arguments) -> tuple[ParameterInfo, ...]:
+    positional = (*args.posonlyargs, *args.args)
+    # defaults belong to the last positional parameters
+    positional_defaults: tuple[ast.expr | None, ...] = (
+        *(None for _ in range(len(positional) - len(args.defaults))),
+        *args.defaults,
+    )
+    parameters = [
+        _to_parameter_info(
+            arg,
+            (
+                ParameterKind.POSITIONAL_ONLY
+                if index < len(args.posonlyargs)
+                else ParameterKind.POSITIONAL_OR_KEYWORD
+            ),
+            default,
+        )
+        for index, (arg, default) in enumerate(zip(positional, positional_defaults))
+    ]
+    if args.vararg is not None:
+        parameters.append(
+            _to_parameter_info(args.vararg, ParameterKind.VAR_POSITIONAL, None)
+        )
+    parameters.extend(
+        _to_parameter_info(arg, ParameterKind.KEYWORD_ONLY, default)
+        for arg, default in zip(args.kwonlyargs, args.kw_defaults)
+    )
+    if args.kwarg is not None:
+        parameters.append(
+            _to_parameter_info(args.kwarg, ParameterKind.VAR_KEYWORD, None)
+        )
+    return tuple(parameters)
+
+
+def _to_parameter_info(
+    arg: ast.arg, kind: ParameterKind, default: ast.expr | None
+) -> ParameterInfo:
+    return ParameterInfo(
+        name=arg.arg,
+        kind=kind,
+        annotation=_unparse_optional(arg.annotation),
+        default=_unparse_optional(default),
+    )
+
+
+def _unparse_optional(node: ast.expr | None) -> str | None:
+    return None if node is None else ast.unparse(node)
+
+
+__all__ = [
+    "ParameterKind",
+    "ParameterInfo",
+    "FunctionInfo",
+    "ClassInfo",
+    "find_functions",
+    "find_classes",
+]
@@ -54,7 +54,7 @@ class Target:
 def find_targets(config: Config) -> tuple[Target, ...]:
     """Gather all targets from the `targets` dir."""
     targets = tuple(
-        _find_target(source, config)
+        get_target(source, config)
         for source in sorted(config.targets_dir.glob("**/*.py"))
     )
     if not targets:
@@ -62,7 +62,8 @@ def find_targets(config: Config) -> tuple[Target, ...]:
     return targets
 
 
-def _find_target(source: Path, config: Config) -> Target:
+def get_target(source: Path, config: Config) -> Target:
+    """Get the target of an absolute source file in the `targets` dir."""
     test = _to_test_file(source, config)
     relative_source = source.relative_to(config.targets_dir)
     return Target(
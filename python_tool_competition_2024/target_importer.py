@@ -0,0 +1,100 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Thread-safe imports of the target modules."""
+
+from __future__ import annotations
+
+import importlib
+import importlib.abc
+import importlib.machinery
+import sys
+import threading
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from importlib.machinery import ModuleSpec
+from pathlib import Path
+from types import ModuleType
+
+_finders: dict[Path, _TargetsFinder] = {}
+_finder_users: Counter[Path] = Counter()
+_finders_lock = threading.Lock()
+
+
+class _TargetsFinder(importlib.abc.MetaPathFinder):
+    """Find top-level modules in the targets dir without changing `sys.path`."""
+
+    def __init__(self, targets_dir: Path) -> None:
+        self._search_path = [str(targets_dir)]
+
+    def find_spec(
+        self,
+        fullname: str,
+        path: Sequence[str] | None,
+        target: ModuleType | None = None,
+    ) -> ModuleSpec | None:
+        # submodules are found through the __path__ of their parent package
+        if path is not None:
+            return None
+        return importlib.machinery.PathFinder.find_spec(
+            fullname, self._search_path, target
+        )
+
+
+def import_target(targets_dir: Path, module_name: str) -> ModuleType:
+    """
+    Import a target module from the targets dir.
+
+    A finder for the targets dir is added to the end of `sys.meta_path` while
+    the module is imported, so modules on `sys.path` take precedence and later
+    imports do not find the targets anymore. In contrast to changing
+    `sys.path`, this can be called from multiple threads at the same time and
+    every module is only imported once.
+
+    Args:
+        targets_dir: The directory containing the targets.
+        module_name: The full name of the module to import.
+
+    Returns:
+        The imported module.
+    """
+    with _find_targets(targets_dir):
+        return importlib.import_module(module_name)
+
+
+@contextmanager
+def _find_targets(targets_dir: Path) -> Iterator[None]:
+    """Add a finder for the targets dir until no thread imports from it anymore."""
+    with _finders_lock:
+        if targets_dir not in _finders:
+            _finders[targets_dir] = _TargetsFinder(targets_dir)
+            sys.meta_path.append(_finders[targets_dir])
+        _finder_users[targets_dir] += 1
+    try:
+        yield
+    finally:
+        with _finders_lock:
+            _finder_users[targets_dir] -= 1
+            if not _finder_users[targets_dir]:
+                del _finder_users[targets_dir]
+                sys.meta_path.remove(_finders.pop(targets_dir))
+
+
+__all__ = ["import_target"]
@@ -0,0 +1,285 @@
+#
+# Copyright (c) 2023 Nicolas Erni.
+#
+# This file is part of python-tool-competition-2024
+# (see https://github.com/ThunderKey/python-tool-competition-2024/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""A persisted index of the statically analysed metadata of all targets."""
+
+from __future__ import annotations
+
+import ast
+import dataclasses
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import tokenize
+from collections.abc import Iterable, Mapping
+from functools import cache
+from pathlib import Path
+
+from .config import Config
+from .source_analysis import (
+    ClassInfo,
+    FunctionInfo,
+    ParameterInfo,
+    ParameterKind,
+    find_classes,
+    find_functions,
+)
+
+_INDEX_VERSION = 1
+
+
+@dataclasses.dataclass(frozen=True)
+class TargetMetadata:
+    """The statically analysed metadata of a target file."""
+
+    functions: tuple[FunctionInfo, ...]  # noqa: V107
+    """All top-level functions of the target."""
+
+    classes: tuple[ClassInfo, ...]  # noqa: V107
+    """All top-level classes of the target."""
+
+    imports: tuple[str, ...]
+    """
+    The sorted names of all imported modules.
+
+    Relative imports are prefixed with one dot per level, e.g. `..utils`.
+    """
+
+    lines_of_code: int  # noqa: V107
+    """The number of lines that contain code, i.e. not blank or comment only."""
+
+    complexity: int
+    """
+    The cyclomatic complexity of the entire file.
+
+    This is one plus the number of decision points and can be used as a cost
+    estimate for the target.
+    """
+
+
+_EMPTY_METADATA = TargetMetadata(
+    functions=(), classes=(), imports=(), lines_of_code=0, complexity=1
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class _IndexEntry:
+    mtime_ns: int
+    size: int
+    sha256: str
+    metadata: TargetMetadata
+
+
+class TargetIndex:
+    """
+    An index of the `TargetMetadata` of target files.
+
+    The entries are invalidated if the modification time or size of a file changed
+    and its hash does not match anymore.
+    """
+
+    def __init__(self, index_file: Path, entries: dict[str, _IndexEntry]) -> None:
+        self._index_file = index_file
+        self._entries = entries
+        self._changed = False
+
+    def get_metadata(self, source: Path) -> TargetMetadata:
+        """
+        Get the metadata of the source and analyse it if it is not up to date.
+
+        A source that cannot be decoded or parsed gets empty metadata.
+        """
+        key = str(source)
+        stat = source.stat()
+        entry = self._entries.get(key)
+        if (
+            entry is not None
+            and entry.mtime_ns == stat.st_mtime_ns
+            and entry.size == stat.st_size
+        ):
+            return entry.metadata
+        content = source.read_bytes()
+        sha256 = hashlib.sha256(content).hexdigest()
+        if entry is None or entry.sha256 != sha256:
+            metadata = _analyse_content(content, source)
+        else:
+            metadata = entry.metadata
+        self._entries[key] = _IndexEntry(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            sha256=sha256,
+            metadata=metadata,
+        )
+        self._changed = True
+        return metadata
+
+    def save(self) -> None:
+        """Store the index to disk if anything changed."""
+        if not self._changed:
+            return
+        self._index_file.parent.mkdir(parents=True, exist_ok=True)
+        content = json.dumps(
+            {"version": _INDEX_VERSION, "entries": dict(sorted(self._entries.items()))},
+            separators=(",", ":"),
+            default=_encode_json,
+        )
+        # write atomically, because other runs could read the index concurrently
+        temp_file = self._index_file.with_name(
+            f"{self._index_file.name}.{os.getpid()}.tmp"
+        )
+        temp_file.write_text(content, encoding="utf-8")
+        temp_file.replace(self._index_file)
+        self._changed = False
+
+
+def build_target_index(sources: Iterable[Path], config: Config) -> None:
+    """Index all sources once and store the index for later runs."""
+    index = get_target_index(config)
+    for source in sources:
+        index.get_metadata(source)
+    index.save()
+
+
+def get_target_index(config: Config) -> TargetIndex:
+    """Get the shared index of this configuration."""
+    return _load_index(config.cache_dir / "target_index.json")
+
+
+@cache
+def _load_index(index_file: Path) -> TargetIndex:
+    try:
+        data = json.loads(
+            index_file.read_text(encoding="utf-8"), object_hook=_decode_json
+        )
+    except (OSError, ValueError, TypeError, KeyError):
+        # a missing or corrupt index is rebuilt from scratch
+        return TargetIndex(index_file, {})
+    if not isinstance(data, dict) or data.get("version") != _INDEX_VERSION:
+        return TargetIndex(index_file, {})
+    return TargetIndex(index_file, data["entries"])
+
+
+def _analyse_content(content: bytes, source: Path) -> TargetMetadata:
+    try:
+        return analyse_source(importlib.util.decode_source(content), source)
+    except (SyntaxError, UnicodeDecodeError):
+        # an invalid target only fails its own generation, not the whole index
+        return _EMPTY_METADATA
+
+
+def analyse_source(source: str, filename: Path) -> TargetMetadata:
+    """Analyse the metadata of the source code."""
+    tree = ast.parse(source, filename=str(filename))
+    return TargetMetadata(
+        functions=find_functions(tree),
+        classes=find_classes(tree),
+        imports=_find_imports(tree),
+        lines_of_code=_count_lines_of_code(source),
+        complexity=1 + sum(map(_count_decisions, ast.walk(tree))),
+    )
+
+
+def _find_imports(tree: ast.Module) -> tuple[str, ...]:
+    imports: set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.add(f"{'.' * node.level}{node.module or ''}")
+    return tuple(sorted(imports))
+
+
+_NON_CODE_TOKENS = frozenset(
+    (
+        tokenize.COMMENT,
+        tokenize.NL,
+        tokenize.NEWLINE,
+        tokenize.INDENT,
+        tokenize.DEDENT,
+        tokenize.ENDMARKER,
+    )
+)
+
+
+def _count_lines_of_code(source: str) -> int:
+    lines: set[int] = set()
+    for token in tokenize.generate_tokens(io.StringIO(source).readline):
+        if token.type not in _NON_CODE_TOKENS:
+            lines.update(range(token.start[0], token.end[0] + 1))
+    return len(lines)
+
+
+_DECISION_NODES = (
+    ast.If,
+    ast.IfExp,
+    ast.For,
+    ast.AsyncFor,
+    ast.While,
+    ast.ExceptHandler,
+    ast.Assert,
+    ast.comprehension,
+)
+
+
+def _count_decisions(node: ast.AST) -> int:
+    if isinstance(node, ast.BoolOp):
+        return len(node.values) - 1
+    if isinstance(node, ast.comprehension):
+        return 1 + len(node.ifs)
+    if isinstance(node, _DECISION_NODES):
+        return 1
+    # `match` is only available from Python 3.10
+    return 1 if type(node).__name__ == "match_case" else 0
+
+
+_JSON_TYPE_KEY = "__type__"
+_JSON_TYPES: Mapping[str, type[object]] = {
+    cls.__name__: cls
+    for cls in (_IndexEntry, TargetMetadata, FunctionInfo, ClassInfo, ParameterInfo)
+}
+
+
+def _encode_json(value: object) -> object:
+    if isinstance(value, ParameterKind):
+        return value.value
+    if not dataclasses.is_dataclass(value) or isinstance(value, type):
+        msg = f"Object of type {type(value).__name__} is not JSON serializable"
+        raise TypeError(msg)
+    return {
+        _JSON_TYPE_KEY: type(value).__name__,
+        **{
+            field.name: getattr(value, field.name)
+            for field in dataclasses.fields(value)
+        },
+    }
+
+
+def _decode_json(data: dict[str, object]) -> object:
+    type_name = data.pop(_JSON_TYPE_KEY, None)
+    if type_name is None:
+        return data
+    values = {
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in data.items()
+    }
+    if type_name == ParameterInfo.__name__:
+        values["kind"] = ParameterKind(values["kind"])
+    return _JSON_TYPES[str(type_name)](**values)
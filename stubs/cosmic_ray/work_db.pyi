@@ -0,0 +1,20 @@
+import enum
+from contextlib import AbstractContextManager
+from pathlib import Path
+
+from .work_item import WorkItem, WorkResult
+
+class WorkDB:
+    class Mode(enum.Enum):
+        create = 1
+        open = 2
+
+    @property
+    def pending_work_items(self) -> tuple[WorkItem, ...]: ...
+    @property
+    def completed_work_items(self) -> tuple[tuple[WorkItem, WorkResult], ...]: ...
+    def set_result(self, job_id: str, result: WorkResult) -> None: ...
+
+def use_db(
+    path: str | Path, mode: WorkDB.Mode = ...
+) -> AbstractContextManager[WorkDB]: ...
@@ -0,0 +1,31 @@
+import enum
+from pathlib import Path
+
+class WorkerOutcome(str, enum.Enum):
+    NORMAL = "normal"
+    SKIPPED = "skipped"
+
+class TestOutcome(str, enum.Enum):
+    SURVIVED = "survived"
+
+class WorkResult:
+    worker_outcome: WorkerOutcome
+    test_outcome: TestOutcome | None
+    def __init__(
+        self,
+        worker_outcome: WorkerOutcome,
+        output: str | None = ...,
+        test_outcome: TestOutcome | None = ...,
+        diff: str | None = ...,
+    ) -> None: ...
+    @property
+    def is_killed(self) -> bool: ...
+
+class MutationSpec:
+    module_path: Path
+    start_pos: tuple[int, int]
+    end_pos: tuple[int, int]
+
+class WorkItem:
+    job_id: str
+    mutations: tuple[MutationSpec, ...]
@@ -1,4 +1,8 @@
+from collections.abc import Iterator, Sequence
 from pathlib import Path
-from xml.etree.ElementTree import ElementTree
+from xml.etree.ElementTree import Element, ElementTree
 
 def parse(source: str | Path) -> ElementTree: ...
+def iterparse(
+    source: str | Path, events: Sequence[str] | None = ...
+) -> Iterator[tuple[str, Element]]: ...
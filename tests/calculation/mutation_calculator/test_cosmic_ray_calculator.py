@@ -1,16 +1,33 @@
 from __future__ import annotations
 
+import re
+import shlex
+import subprocess  # nosec B404
+import sys
+from collections import Counter
 from pathlib import Path
 from unittest import mock
 
 import pytest
+import toml
+from cosmic_ray.work_db import WorkDB, use_db
+from cosmic_ray.work_item import WorkerOutcome
 
+from python_tool_competition_2024 import fork_client
+from python_tool_competition_2024.calculation.generation_results_calculator import (
+    write_generated_test,
+)
 from python_tool_competition_2024.calculation.mutation_calculator.cosmic_ray_calculator import (  # noqa: E501
     _gather_results,
+    calculate_fork_server_mutation,
     calculate_mutation,
 )
 from python_tool_competition_2024.config import Config
-from python_tool_competition_2024.errors import CommandFailedError
+from python_tool_competition_2024.coverage_map import CoverageMap
+from python_tool_competition_2024.errors import (
+    CommandFailedError,
+    MeasurementFailedError,
+)
 from python_tool_competition_2024.results import RatioResult
 from python_tool_competition_2024.target_finder import find_targets
 
@@ -48,13 +65,15 @@ def test_cosmic_ray_calculator(tmp_path: Path) -> None:
         assert run_command_mock.call_args_list == [
             *_cr_calls(config, "example1"),
             *_cr_calls(config, "example2"),
-            *_cr_calls(config, "sub_example"),
-            *_cr_calls(config, "sub_example.example3"),
-            *_cr_calls(config, "sub_example.example4"),
+            *_cr_calls(config, "sub_example", without_test=True),
+            *_cr_calls(config, "sub_example.example3", without_test=True),
+            *_cr_calls(config, "sub_example.example4", without_test=True),
         ]
         cr_path = tmp_path / "dummy" / "cosmic_ray"
         assert {
-            path: path.read_text() for path in tmp_path.glob("**/*") if path.is_file()
+            path: path.read_text()
+            for path in (tmp_path / "dummy").glob("**/*")
+            if path.is_file()
         } == {
             cr_path
             / "example1.toml": _cr_config(
@@ -79,6 +98,42 @@ def test_cosmic_ray_calculator(tmp_path: Path) -> None:
             tmp_path / "dummy" / "generated_tests" / "test_example1.py": "",
             tmp_path / "dummy" / "generated_tests" / "test_example2.py": "",
         }
+        # only the targets with tests are mutated
+        assert sorted(
+            path.name.split(".")[0] for path in config.pycache_dir.glob("**/*.pyc")
+        ) == ["example1", "example2"]
+
+
+def test_cosmic_ray_calculator_with_unexecuted_lines(tmp_path: Path) -> None:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        targets_dir=TARGETS_DIR,
+        results_dir=tmp_path,
+    )
+    target = find_targets(config)[0]
+    write_generated_test(
+        target,
+        "from example1 import other_method\n\n"
+        "def test_other():\n    assert other_method(3) == 3\n",
+    )
+    # only the two mutants of `total = 0` run
+    unexecuted_lines = frozenset(range(1, 17)) - {13}
+    assert calculate_mutation(target, config, unexecuted_lines) == RatioResult(37, 2)
+    db_file = config.results_dir / "cosmic_ray" / "example1.sqlite"
+    with use_db(db_file, WorkDB.Mode.open) as db:
+        outcomes = Counter(
+            (
+                work_item.mutations[0].start_pos[0] in unexecuted_lines,
+                result.worker_outcome,
+                result.is_killed,
+            )
+            for work_item, result in db.completed_work_items
+        )
+    assert outcomes == {
+        (True, WorkerOutcome.SKIPPED, False): 35,
+        (False, WorkerOutcome.NORMAL, True): 2,
+    }
 
 
 def test_cosmic_ray_calculator_with_failing_baseline(tmp_path: Path) -> None:
@@ -114,21 +169,15 @@ def test_cosmic_ray_calculator_with_failing_baseline(tmp_path: Path) -> None:
                 f"Could not run mutation testing for {module}. "
                 "Add -vv to show the console output."
             )
-            for module in (
-                "example1",
-                "example2",
-                "sub_example",
-                "sub_example.example3",
-                "sub_example.example4",
-            )
+            for module in ("example1", "example2")
         )
 
         assert run_command_mock.call_args_list == [
             *_cr_calls(config, "example1", skip_exec=True),
             *_cr_calls(config, "example2", skip_exec=True),
-            *_cr_calls(config, "sub_example", skip_exec=True),
-            *_cr_calls(config, "sub_example.example3", skip_exec=True),
-            *_cr_calls(config, "sub_example.example4", skip_exec=True),
+            *_cr_calls(config, "sub_example", without_test=True),
+            *_cr_calls(config, "sub_example.example3", without_test=True),
+            *_cr_calls(config, "sub_example.example4", without_test=True),
         ]
 
 
@@ -162,22 +211,132 @@ def test_cosmic_ray_calculator_with_failing_baseline_and_output(tmp_path: Path)
             }
         assert tuple(capture.get().splitlines()) == tuple(
             f"Could not run mutation testing for {module}."
-            for module in (
-                "example1",
-                "example2",
-                "sub_example",
-                "sub_example.example3",
-                "sub_example.example4",
-            )
+            for module in ("example1", "example2")
         )
 
         assert run_command_mock.call_args_list == [
             *_cr_calls(config, "example1", skip_exec=True),
             *_cr_calls(config, "example2", skip_exec=True),
-            *_cr_calls(config, "sub_example", skip_exec=True),
-            *_cr_calls(config, "sub_example.example3", skip_exec=True),
-            *_cr_calls(config, "sub_example.example4", skip_exec=True),
+            *_cr_calls(config, "sub_example", without_test=True),
+            *_cr_calls(config, "sub_example.example3", without_test=True),
+            *_cr_calls(config, "sub_example.example4", without_test=True),
+        ]
+
+
+def test_cosmic_ray_calculator_with_fork_server(tmp_path: Path) -> None:
+    client_exit_codes: list[int] = []
+
+    def run_client(config: Config, *args: str, **kwargs: object) -> str:
+        if args[0:2] == ("cosmic-ray", "baseline"):
+            # the client runs the test in the fork server
+            test_command = toml.loads(Path(args[2]).read_text())["cosmic-ray"][
+                "test-command"
+            ]
+            client = subprocess.run(
+                shlex.split(test_command), check=False  # noqa: S603
+            )
+            client_exit_codes.append(client.returncode)
+        return output_counter(config, *args, **kwargs)
+
+    output_counter = _OutputCounter()
+    with mock.patch(
+        "python_tool_competition_2024.calculation.mutation_calculator.cosmic_ray_calculator.run_command"
+    ) as run_command_mock:
+        run_command_mock.side_effect = run_client
+        mock.seal(run_command_mock)
+        config = get_test_config(
+            show_commands=False,
+            show_failures=False,
+            targets_dir=TARGETS_DIR,
+            results_dir=tmp_path,
+        )
+        target = find_targets(config)[0]
+        write_generated_test(
+            target,
+            "from example1 import some_method\n\n"
+            "def test_positive():\n    assert some_method(1) == '5'\n",
+        )
+        assert calculate_fork_server_mutation(target, config) == RatioResult(10, 0)
+        assert client_exit_codes == [0]
+        assert run_command_mock.call_args_list == list(_cr_calls(config, "example1"))
+        config_file = config.results_dir / "cosmic_ray" / "example1.toml"
+        client = shlex.join(
+            (sys.executable, "-I", "-S", str(Path(fork_client.__file__)))
+        )
+        assert re.fullmatch(
+            re.escape(_cr_config(TARGETS_DIR / "example1.py", None)).replace(
+                re.escape("echo no test"), rf"{re.escape(client)} \S+/server\.sock"
+            ),
+            config_file.read_text(),
+        )
+
+
+def test_cosmic_ray_calculator_with_stopped_fork_server(tmp_path: Path) -> None:
+    with mock.patch(
+        "python_tool_competition_2024.calculation.mutation_calculator.cosmic_ray_calculator.run_command"
+    ) as run_command_mock, mock.patch(
+        "python_tool_competition_2024.calculation.mutation_calculator.cosmic_ray_calculator.serve_tests"
+    ) as serve_tests_mock:
+        run_command_mock.side_effect = _OutputCounter()
+        mock.seal(run_command_mock)
+        config = get_test_config(
+            show_commands=False,
+            show_failures=False,
+            targets_dir=TARGETS_DIR,
+            results_dir=tmp_path,
+        )
+        target = find_targets(config)[0]
+        write_generated_test(target, "def test_nothing(): pass\n")
+        serve_tests_mock.return_value.__enter__.return_value = ("client",)
+        serve_tests_mock.return_value.__exit__.side_effect = MeasurementFailedError(
+            target.test
+        )
+        coverage_map = CoverageMap(lines=(), branches=(), tests={})
+        with config.console.capture() as capture:
+            assert calculate_fork_server_mutation(
+                target, config, coverage_map=coverage_map
+            ) == RatioResult(10, 0)
+        assert serve_tests_mock.call_args.kwargs["source"] == target.source
+        assert serve_tests_mock.call_args.kwargs["coverage_map"] is coverage_map
+        assert capture.get().splitlines() == [
+            f"Could not run mutation testing for example1: Could not run the "
+            f"tests of {target.test}"
         ]
+        assert run_command_mock.call_args_list == list(_cr_calls(config, "example1"))
+
+
+def test_cosmic_ray_calculator_with_failed_fork_server(tmp_path: Path) -> None:
+    with mock.patch(
+        "python_tool_competition_2024.calculation.mutation_calculator.cosmic_ray_calculator.run_command"
+    ) as run_command_mock, mock.patch(
+        "python_tool_competition_2024.calculation.mutation_calculator.cosmic_ray_calculator.serve_tests"
+    ) as serve_tests_mock:
+        run_command_mock.side_effect = _OutputCounter()
+        mock.seal(run_command_mock)
+        config = get_test_config(
+            show_commands=False,
+            show_failures=False,
+            targets_dir=TARGETS_DIR,
+            results_dir=tmp_path,
+        )
+        target = find_targets(config)[0]
+        write_generated_test(target, "def test_nothing(): pass\n")
+        # e.g. if the server could not warm up
+        serve_tests_mock.return_value.__enter__.side_effect = MeasurementFailedError(
+            target.test
+        )
+        with config.console.capture() as capture:
+            assert calculate_fork_server_mutation(target, config) == RatioResult(10, 0)
+        assert capture.get().splitlines() == [
+            f"Could not run mutation testing for example1: Could not run the "
+            f"tests of {target.test}"
+        ]
+        assert run_command_mock.call_args_list == list(
+            _cr_calls(config, "example1", without_test=True)
+        )
+        assert (
+            config.results_dir / "cosmic_ray" / "example1.toml"
+        ).read_text() == _cr_config(TARGETS_DIR / "example1.py", None)
 
 
 def test_gather_results_not_started() -> None:
@@ -216,22 +375,26 @@ def test_gather_results_not_completed() -> None:
 
 
 def _cr_calls(
-    config: Config, target: str, *, skip_exec: bool = False
+    config: Config, target: str, *, skip_exec: bool = False, without_test: bool = False
 ) -> tuple[mock._Call, ...]:
     cr_dir = config.results_dir / "cosmic_ray"
     config_file = cr_dir / f"{target}.toml"
     db_file = cr_dir / f"{target}.sqlite"
     calls: tuple[mock._Call, ...] = (
         mock.call(config, "cosmic-ray", "init", str(config_file), str(db_file)),
-        mock.call(
-            config,
-            "cosmic-ray",
-            "baseline",
-            str(config_file),
-            show_output_on_error=False,
-        ),
     )
-    if not skip_exec:
+    if not without_test:
+        calls = (
+            *calls,
+            mock.call(
+                config,
+                "cosmic-ray",
+                "baseline",
+                str(config_file),
+                show_output_on_error=False,
+            ),
+        )
+    if not skip_exec and not without_test:
         calls = (
             *calls,
             mock.call(config, "cosmic-ray", "exec", str(config_file), str(db_file)),
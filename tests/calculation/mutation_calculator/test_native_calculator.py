@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from python_tool_competition_2024.calculation.generation_results_calculator import (
+    write_generated_test,
+)
+from python_tool_competition_2024.calculation.mutation_calculator.native_calculator import (  # noqa: E501
+    calculate_mutation,
+    calculate_schemata_mutation,
+)
+from python_tool_competition_2024.config import Config
+from python_tool_competition_2024.coverage_map import CoverageMap
+from python_tool_competition_2024.errors import MeasurementTimeoutError
+from python_tool_competition_2024.mutation_testing import run_mutants
+from python_tool_competition_2024.results import RatioResult
+from python_tool_competition_2024.target_finder import Target, find_targets
+
+from ...helpers import TARGETS_DIR, get_test_config, get_test_config_and_target
+
+
+@pytest.mark.parametrize(
+    "calculator", (calculate_mutation, calculate_schemata_mutation)
+)
+def test_native_calculator(
+    tmp_path: Path, calculator: Callable[[Target, Config], RatioResult]
+) -> None:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        targets_dir=TARGETS_DIR,
+        results_dir=tmp_path,
+    )
+    targets = find_targets(config)
+    write_generated_test(
+        targets[0],
+        "from example1 import some_method\n\n"
+        "def test_positive():\n    assert some_method(1) == '5'\n",
+    )
+    with config.console.capture() as capture:
+        results = {
+            target.source_module: calculator(target, config) for target in targets
+        }
+    assert results == {
+        "example1": RatioResult(8, 3),
+        "example2": RatioResult(2, 0),
+        "sub_example": RatioResult(1, 0),
+        "sub_example.example3": RatioResult(1, 0),
+        "sub_example.example4": RatioResult(0, 0),
+    }
+    assert not capture.get()
+
+
+@pytest.mark.parametrize(
+    "calculator", (calculate_mutation, calculate_schemata_mutation)
+)
+def test_native_calculator_with_unexecuted_lines(
+    tmp_path: Path, calculator: Callable[[Target, Config, frozenset[int]], RatioResult]
+) -> None:
+    config, target = get_test_config_and_target(
+        tmp_path,
+        "from example1 import some_method\n\n"
+        "def test_positive():\n    assert some_method(1) == '5'\n",
+    )
+    with mock.patch(
+        "python_tool_competition_2024.calculation.mutation_calculator.native_calculator.run_mutants",
+        wraps=run_mutants,
+    ) as run_mutants_mock:
+        result = calculator(target, config, frozenset((8, 13, 14, 15, 16)))
+    assert result == RatioResult(8, 3)
+    ((_, _, _, mutants), _) = run_mutants_mock.call_args
+    assert sorted(mutant.line for mutant in mutants) == [6, 6, 7, 7]
+
+
+@pytest.mark.parametrize(
+    "calculator", (calculate_mutation, calculate_schemata_mutation)
+)
+def test_native_calculator_with_coverage_map(
+    tmp_path: Path,
+    calculator: Callable[
+        [Target, Config, frozenset[int], CoverageMap | None], RatioResult
+    ],
+) -> None:
+    config, target = get_test_config_and_target(
+        tmp_path,
+        "from example1 import some_method\n\n"
+        "def test_positive():\n    assert some_method(1) == '5'\n",
+    )
+    # the map claims that the test only executes the condition of `some_method`
+    coverage_map = CoverageMap(
+        lines=(4, 6, 7, 8, 11, 13, 14, 15, 16),
+        branches=(),
+        tests={"test_example1.py::test_positive": 0b10},
+    )
+    assert calculator(target, config, frozenset(), coverage_map) == RatioResult(8, 1)
+
+
+def test_native_calculator_with_failing_test(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(
+        tmp_path,
+        "from example1 import some_method\n\n"
+        "def test_failing():\n    assert some_method(1) == '6'\n",
+    )
+    with config.console.capture() as capture:
+        assert calculate_mutation(target, config) == RatioResult(8, 0)
+    assert capture.get().splitlines() == [
+        "Could not run mutation testing for example1."
+    ]
+
+
+def test_native_calculator_with_timeout(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path, "def test_nothing(): pass\n")
+    with mock.patch(
+        "python_tool_competition_2024.calculation.mutation_calculator.native_calculator.run_mutants",
+        side_effect=MeasurementTimeoutError(target.test, 300),
+    ), config.console.capture() as capture:
+        assert calculate_mutation(target, config) == RatioResult(8, 0)
+    assert capture.get().splitlines() == [
+        f"Could not run mutation testing for example1: Running the tests of "
+        f"{target.test} took longer than 300s"
+    ]
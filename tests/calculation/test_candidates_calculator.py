@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from python_tool_competition_2024.calculation import _prepare_test
+from python_tool_competition_2024.calculation.candidates_calculator import (
+    select_best_candidate,
+)
+from python_tool_competition_2024.calculation.coverage_caluclator import (
+    CoverageCalculatorName,
+    Coverages,
+)
+from python_tool_competition_2024.forked_pytest import run_in_children
+from python_tool_competition_2024.generation_results import (
+    TestGenerationCandidates,
+    TestGenerationSuccess,
+)
+from python_tool_competition_2024.results import RatioResult
+
+from ..helpers import get_test_config_and_target
+
+_POSITIVE_ONLY = """\
+import example1
+
+def test_positive() -> None:
+    assert example1.some_method(5) == "25"
+"""
+
+_BOTH_BRANCHES = """\
+import example1
+
+def test_positive() -> None:
+    assert example1.some_method(5) == "25"
+
+def test_negative() -> None:
+    assert example1.some_method(-1) == "-4"
+"""
+
+_ALL_BRANCHES = """\
+import example1
+
+def test_both() -> None:
+    assert example1.some_method(5) == "25"
+    assert example1.some_method(-1) == "-4"
+    assert example1.other_method(3) == 3
+"""
+
+_INVALID = "def test_invalid(:\n"
+
+_CRASHING = "import os\n\ndef test_crash() -> None:\n    os._exit(3)\n"
+
+
+@pytest.mark.parametrize("coverage_calculator_name", tuple(CoverageCalculatorName))
+def test_select_best_candidate(
+    tmp_path: Path, coverage_calculator_name: CoverageCalculatorName
+) -> None:
+    config, target = get_test_config_and_target(tmp_path)
+    with config.console.capture():
+        result, coverages = select_best_candidate(
+            target,
+            config,
+            TestGenerationCandidates(
+                (
+                    _POSITIVE_ONLY,
+                    _INVALID,
+                    _BOTH_BRANCHES,
+                    _ALL_BRANCHES,
+                    _BOTH_BRANCHES,
+                )
+            ),
+            coverage_calculator_name,
+        )
+    assert result == TestGenerationSuccess(_ALL_BRANCHES)
+    assert coverages == Coverages(RatioResult(9, 9), RatioResult(4, 4), ())
+    assert target.test.read_text() == _ALL_BRANCHES
+    assert (config.coverages_dir / "example1.xml").exists() is (
+        coverage_calculator_name is CoverageCalculatorName.PYTEST_COV
+    )
+
+    # the losing candidates are removed
+    assert not (config.results_dir / "candidates" / "example1").exists()
+
+
+def test_select_best_candidate_keeps_first_of_equal(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path)
+    first = f"{_BOTH_BRANCHES}\n# first\n"
+    with config.console.capture():
+        result, coverages = select_best_candidate(
+            target,
+            config,
+            TestGenerationCandidates((_POSITIVE_ONLY, first, _BOTH_BRANCHES)),
+            CoverageCalculatorName.PYTEST_COV,
+        )
+    assert result == TestGenerationSuccess(first)
+    assert coverages == Coverages(
+        RatioResult(9, 5), RatioResult(4, 2), (13, 14, 15, 16)
+    )
+
+
+@pytest.mark.parametrize("coverage_calculator_name", tuple(CoverageCalculatorName))
+def test_select_best_candidate_without_valid_candidates(
+    tmp_path: Path, coverage_calculator_name: CoverageCalculatorName
+) -> None:
+    config, target = get_test_config_and_target(tmp_path)
+    with config.console.capture():
+        result, coverages = select_best_candidate(
+            target,
+            config,
+            TestGenerationCandidates((_INVALID, f"{_INVALID}\n")),
+            coverage_calculator_name,
+        )
+    assert result == TestGenerationSuccess(_INVALID)
+    assert coverages == Coverages(
+        RatioResult(9, 0), RatioResult(4, 0), (4, 6, 7, 8, 11, 13, 14, 15, 16)
+    )
+    assert not target.test.exists()
+    assert target.test.with_name("test_example1.py.invalid").read_text() == _INVALID
+    assert not (config.results_dir / "candidates" / "example1").exists()
+
+
+@pytest.mark.parametrize(
+    "coverage_calculator_name",
+    (
+        CoverageCalculatorName.FORK,
+        CoverageCalculatorName.MONITORING,
+        CoverageCalculatorName.SESSION,
+    ),
+)
+def test_select_best_candidate_forks_from_the_calling_thread(
+    tmp_path: Path, coverage_calculator_name: CoverageCalculatorName
+) -> None:
+    config, target = get_test_config_and_target(tmp_path)
+    threads = []
+
+    def record_thread(*args: object, **kwargs: object) -> object:
+        threads.append(threading.current_thread())
+        return run_in_children(*args, **kwargs)  # type: ignore[arg-type]
+
+    with mock.patch(
+        "python_tool_competition_2024.coverage_measurement.run_in_children",
+        side_effect=record_thread,
+    ) as run_mock, config.console.capture():
+        result, _ = select_best_candidate(
+            target,
+            config,
+            TestGenerationCandidates((_POSITIVE_ONLY, _BOTH_BRANCHES, _ALL_BRANCHES)),
+            coverage_calculator_name,
+        )
+    assert result == TestGenerationSuccess(_ALL_BRANCHES)
+    # all candidates are measured in one call from the main thread
+    assert threads == [threading.main_thread()]
+    assert len(run_mock.call_args.args[1]) == 3
+
+
+def test_select_best_candidate_with_crashing_candidate(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path)
+    with config.console.capture() as capture:
+        result, coverages = select_best_candidate(
+            target,
+            config,
+            TestGenerationCandidates((_CRASHING, _BOTH_BRANCHES)),
+            CoverageCalculatorName.FORK,
+        )
+    assert result == TestGenerationSuccess(_BOTH_BRANCHES)
+    assert coverages == Coverages(
+        RatioResult(9, 5), RatioResult(4, 2), (13, 14, 15, 16)
+    )
+    # the candidates are measured one after the other to report the crash
+    crashing_test = (
+        config.results_dir / "candidates/example1/0/generated_tests/test_example1.py"
+    )
+    assert capture.get().splitlines()[-1] == (
+        f"Could not run pytest for example1: Could not run the tests of "
+        f"{crashing_test}"
+    )
+
+
+@pytest.mark.parametrize("minimize_tests", (False, True))
+def test_prepare_test_with_candidates(tmp_path: Path, *, minimize_tests: bool) -> None:
+    config, target = get_test_config_and_target(tmp_path)
+    candidates = TestGenerationCandidates((_POSITIVE_ONLY, _BOTH_BRANCHES))
+    coverages = Coverages(RatioResult(9, 6), RatioResult(4, 4))
+    with mock.patch(
+        "python_tool_competition_2024.calculation.select_best_candidate"
+    ) as select_mock, mock.patch(
+        "python_tool_competition_2024.calculation.minimize_generated_test"
+    ) as minimize_mock:
+        select_mock.return_value = (TestGenerationSuccess(_BOTH_BRANCHES), coverages)
+        minimize_mock.return_value = None
+        mock.seal(select_mock)
+        mock.seal(minimize_mock)
+        result = _prepare_test(
+            target,
+            candidates,
+            config,
+            CoverageCalculatorName.FORK,
+            minimize_tests=minimize_tests,
+        )
+    select_mock.assert_called_once_with(
+        target, config, candidates, CoverageCalculatorName.FORK
+    )
+    assert minimize_mock.call_args_list == (
+        [mock.call(target, config)] if minimize_tests else []
+    )
+    assert result == (TestGenerationSuccess(_BOTH_BRANCHES), coverages)
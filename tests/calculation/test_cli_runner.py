@@ -3,6 +3,7 @@ from __future__ import annotations
 import os
 import re
 import subprocess  # nosec: B404
+import sys
 from collections.abc import Iterator
 from contextlib import contextmanager
 from pathlib import Path
@@ -10,7 +11,11 @@ from unittest import mock
 
 import pytest
 
-from python_tool_competition_2024.calculation.cli_runner import _extend_env, run_command
+from python_tool_competition_2024.calculation.cli_runner import (
+    _extend_env,
+    cache_checked_bytecode,
+    run_command,
+)
 from python_tool_competition_2024.errors import CommandFailedError
 
 from ..helpers import get_test_config, sealed_mock
@@ -67,7 +72,7 @@ def test_output_with_error(
 
 @pytest.mark.parametrize("verbose", (True, False))
 def test_invalid_command(capsys: pytest.CaptureFixture[str], *, verbose: bool) -> None:
-    available_cmds = ("pytest", "coverage", "cosmic-ray", "cr-report", "mut.py")
+    available_cmds = ("pytest", "cosmic-ray", "cr-report", "mut.py")
     with _patch_run(exit_code=0) as run_mock, pytest.raises(
         ValueError, match=rf"\Aunknown not in {re.escape(repr(available_cmds))}\Z"
     ):
@@ -89,11 +94,14 @@ def test_invalid_command(capsys: pytest.CaptureFixture[str], *, verbose: bool) -
         ({}, {}),
         ({"TOX_ENV_DIR": "test", "OTHER": "value"}, {"OTHER": "value"}),
         ({"SOME": "test"}, {"SOME": "test"}),
+        ({"COVERAGE_FILE": "other/.coverage"}, {}),
     ),
 )
 def test_extend_env(original_env: dict[str, str], expected_env: dict[str, str]) -> None:
     config_mock = sealed_mock(
-        targets_dir=Path("targets", "path"), results_dir=Path("some", "results", "path")
+        targets_dir=Path("targets", "path"),
+        results_dir=Path("some", "results", "path"),
+        pycache_dir=Path("some", "pycache"),
     )
     with mock.patch(
         "python_tool_competition_2024.calculation.cli_runner.os"
@@ -102,10 +110,46 @@ def test_extend_env(original_env: dict[str, str], expected_env: dict[str, str])
         os_mock.environ = original_env
         mock.seal(os_mock)
         assert _extend_env(config_mock) == expected_env | {
-            "PYTHONPATH": "targets/path:some/results/path"
+            "PYTHONPATH": "targets/path:some/results/path",
+            "PYTHONPYCACHEPREFIX": "some/pycache",
+            "COVERAGE_FILE": "some/results/path/.coverage",
         }
 
 
+def test_cache_checked_bytecode(tmp_path: Path) -> None:
+    config = get_test_config(
+        show_commands=False, show_failures=False, root_dir=tmp_path
+    )
+    source = tmp_path / "some_module.py"
+    source.write_text("VALUE = 1\n", encoding="utf-8")
+    cache_checked_bytecode(config, source)
+    stat = source.stat()
+    # a mutation of the same size within the same second
+    source.write_text("VALUE = 2\n", encoding="utf-8")
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    env = _extend_env(config) | {"PYTHONPATH": str(tmp_path)}
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    script = (
+        "import importlib.util, some_module; "
+        "print(some_module.VALUE, "
+        "importlib.util.cache_from_source(some_module.__file__))"
+    )
+    for _ in range(2):
+        output = subprocess.run(
+            (sys.executable, "-c", script),  # noqa: S603
+            check=True,
+            stdout=subprocess.PIPE,
+            encoding="utf-8",
+            env=env,
+        ).stdout
+        value, cache_file = output.split()
+        assert value == "2"
+        assert Path(cache_file).is_relative_to(config.pycache_dir)
+        # the flags of the header mark the bytecode as checked hash based
+        assert Path(cache_file).read_bytes()[4:8] == b"\x03\x00\x00\x00"
+
+
 @contextmanager
 def _patch_run(*, exit_code: int) -> Iterator[mock.MagicMock]:
     with mock.patch(
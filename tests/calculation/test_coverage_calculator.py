@@ -1,26 +1,43 @@
 from __future__ import annotations
 
+import dataclasses
 import subprocess  # nosec B404
+import time
 from collections.abc import Callable
 from pathlib import Path
 from unittest import mock
 
 import pytest
+from defusedxml import ElementTree
 
 from python_tool_competition_2024.calculation.cli_runner import _extend_env
 from python_tool_competition_2024.calculation.coverage_caluclator import (
+    CoverageCalculatorName,
     Coverages,
+    _BranchCoverageVisitor,
+    _count_tests,
+    _LineCoverageVisitor,
+    _parse_coverage_xml,
+    calculate_all_coverages,
     calculate_coverages,
+    get_coverage_xml,
+)
+from python_tool_competition_2024.calculation.generation_results_calculator import (
+    write_generated_test,
 )
 from python_tool_competition_2024.config import Config
+from python_tool_competition_2024.coverage_measurement import measure_coverage
 from python_tool_competition_2024.errors import (
     ConditionCoverageError,
+    MeasurementFailedError,
     TargetNotFoundInCoveragesError,
 )
+from python_tool_competition_2024.results import RatioResult
 from python_tool_competition_2024.target_finder import Target, find_targets
 
 from ..cli.helpers import renderable_to_strs
-from ..helpers import get_test_config
+from ..example_generators import _REAL_TESTS
+from ..helpers import TARGETS_DIR, get_test_config, get_test_config_and_target
 
 
 def test_with_command_failing(tmp_path: Path) -> None:
@@ -115,6 +132,420 @@ def test_with_missing_file(tmp_path: Path) -> None:
     _run_with_coverage_xml(tmp_path, xml_creator, test)
 
 
+def test_pytest_cov_coverages_without_test(tmp_path: Path) -> None:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+    target = find_targets(config)[0]
+    with mock.patch(
+        "python_tool_competition_2024.calculation.cli_runner.subprocess.run"
+    ) as run_mock:
+        mock.seal(run_mock)
+        coverages = calculate_coverages(
+            target, config, CoverageCalculatorName.PYTEST_COV
+        )
+    run_mock.assert_not_called()
+    assert coverages == Coverages(
+        RatioResult(9, 0), RatioResult(4, 0), (4, 6, 7, 8, 11, 13, 14, 15, 16)
+    )
+    report = ElementTree.parse(get_coverage_xml(target, config)).getroot()
+    assert {
+        name: report.attrib[name]
+        for name in (
+            "lines-valid",
+            "lines-covered",
+            "branches-valid",
+            "branches-covered",
+        )
+    } == {
+        "lines-valid": "9",
+        "lines-covered": "0",
+        "branches-valid": "4",
+        "branches-covered": "0",
+    }
+
+
+def test_pytest_cov_coverages_without_test_ignore_cwd_config(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cwd = tmp_path / "cwd"
+    cwd.mkdir()
+    (cwd / "pyproject.toml").write_text(
+        """
+[tool.coverage.report]
+omit = ["*example1.py"]
+exclude_lines = ["return"]
+"""
+    )
+    monkeypatch.chdir(cwd)
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+    target = find_targets(config)[0]
+    assert calculate_coverages(
+        target, config, CoverageCalculatorName.PYTEST_COV
+    ) == Coverages(
+        RatioResult(9, 0), RatioResult(4, 0), (4, 6, 7, 8, 11, 13, 14, 15, 16)
+    )
+
+
+def test_coverage_calculators_match_pytest_cov(tmp_path: Path) -> None:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+    for target in find_targets(config):
+        body = _REAL_TESTS.get(target.source)
+        if body is not None:
+            write_generated_test(target, body)
+    targets = find_targets(config)
+    with config.console.capture():
+        expected = tuple(
+            calculate_coverages(target, config, CoverageCalculatorName.PYTEST_COV)
+            for target in targets
+        )
+        for name in (
+            CoverageCalculatorName.DATA_FILE,
+            CoverageCalculatorName.FORK,
+            CoverageCalculatorName.MONITORING,
+            CoverageCalculatorName.SESSION,
+        ):
+            assert (
+                tuple(calculate_coverages(target, config, name) for target in targets)
+                == expected
+            )
+            assert calculate_all_coverages(targets, config, name) == expected
+
+
+def test_forked_coverages_with_failing_test(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(
+        tmp_path,
+        "import example1\n\ndef test_failing():\n"
+        "    assert example1.some_method(1) == '6'\n",
+    )
+    with config.console.capture() as capture:
+        coverages = calculate_coverages(target, config, CoverageCalculatorName.FORK)
+    assert coverages == Coverages(
+        RatioResult(9, 4), RatioResult(4, 1), (8, 13, 14, 15, 16)
+    )
+    assert capture.get().splitlines() == ["Could not run pytest for example1."]
+
+
+def test_data_file_coverages_with_failing_test(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(
+        tmp_path,
+        "import example1\n\ndef test_failing():\n"
+        "    assert example1.some_method(1) == '6'\n",
+    )
+    with config.console.capture() as capture:
+        coverages = calculate_coverages(
+            target, config, CoverageCalculatorName.DATA_FILE
+        )
+    assert coverages == Coverages(
+        RatioResult(9, 4), RatioResult(4, 1), (8, 13, 14, 15, 16)
+    )
+    assert capture.get().splitlines() == [
+        "Could not run pytest for example1. Add -vv to show the console output."
+    ]
+    assert not get_coverage_xml(target, config).exists()
+
+
+def test_data_file_coverages_with_inherited_data_file(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("COVERAGE_FILE", str(tmp_path / "other.coverage"))
+    config, target = get_test_config_and_target(
+        tmp_path, _REAL_TESTS[TARGETS_DIR / "example1.py"]
+    )
+    with config.console.capture():
+        coverages = calculate_coverages(
+            target, config, CoverageCalculatorName.DATA_FILE
+        )
+    assert coverages == Coverages(
+        RatioResult(9, 4), RatioResult(4, 1), (8, 13, 14, 15, 16)
+    )
+    assert not (tmp_path / "other.coverage").exists()
+
+
+def test_forked_coverages_with_failed_measurement(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path, "def test_nothing(): pass\n")
+    with mock.patch(
+        "python_tool_competition_2024.calculation.coverage_caluclator.measure_coverage",
+        side_effect=MeasurementFailedError(target.test),
+    ), config.console.capture() as capture:
+        coverages = calculate_coverages(target, config, CoverageCalculatorName.FORK)
+    assert coverages == Coverages(RatioResult(9, 0), RatioResult(4, 0))
+    assert capture.get().splitlines() == [
+        f"Could not run pytest for example1: Could not run the tests of "
+        f"{target.test}"
+    ]
+
+
+_SPLIT_TESTS = """\
+import example1
+
+def test_positive():
+    assert example1.some_method(1) == '5'
+
+def test_negative():
+    assert example1.some_method(-1) == '-4'
+
+class TestOther:
+    def test_other(self):
+        assert example1.other_method(3) == 3
+"""
+
+_PARAMETRIZED_TESTS = """\
+import pytest
+
+import example1
+
+@pytest.mark.parametrize("number", (1, 2, 3))
+def test_positive(number):
+    assert example1.some_method(number)
+"""
+
+_UNCOUNTED_TESTS = """\
+import pytest
+
+import example1
+
+NUMBERS = [1, 2, 3]
+
+@pytest.mark.parametrize("number", NUMBERS)
+def test_positive(number):
+    assert example1.some_method(number)
+"""
+_PARAMETRIZED_COVERAGES = Coverages(
+    RatioResult(9, 4), RatioResult(4, 1), (8, 13, 14, 15, 16)
+)
+
+
+@pytest.mark.parametrize(
+    ("body", "threshold", "workers", "coverages"),
+    (
+        (_SPLIT_TESTS, 0, 1, Coverages(RatioResult(9, 9), RatioResult(4, 4), ())),
+        (_PARAMETRIZED_TESTS, 3, 2, _PARAMETRIZED_COVERAGES),
+        (_PARAMETRIZED_TESTS, 4, 1, _PARAMETRIZED_COVERAGES),
+        # the children decide from the collected tests whether they split them
+        (_UNCOUNTED_TESTS, 4, 2, _PARAMETRIZED_COVERAGES),
+        (_SPLIT_TESTS, 3, 2, Coverages(RatioResult(9, 9), RatioResult(4, 4), ())),
+        (_SPLIT_TESTS, 4, 1, Coverages(RatioResult(9, 9), RatioResult(4, 4), ())),
+        (
+            "def test_broken(:\n",
+            1,
+            1,
+            Coverages(
+                RatioResult(9, 0), RatioResult(4, 0), (4, 6, 7, 8, 11, 13, 14, 15, 16)
+            ),
+        ),
+    ),
+)
+def test_forked_coverages_with_split_tests(
+    tmp_path: Path, body: str, threshold: int, workers: int, coverages: Coverages
+) -> None:
+    config, target = get_test_config_and_target(tmp_path, body)
+    config = dataclasses.replace(config, test_split_threshold=threshold)
+    with mock.patch(
+        "python_tool_competition_2024.calculation.coverage_caluclator.os.cpu_count",
+        return_value=2,
+    ), mock.patch(
+        "python_tool_competition_2024.calculation.coverage_caluclator.measure_coverage",
+        wraps=measure_coverage,
+    ) as measure_mock, config.console.capture():
+        for name in (CoverageCalculatorName.FORK, CoverageCalculatorName.MONITORING):
+            assert calculate_coverages(target, config, name) == coverages
+    assert [
+        (call.kwargs["workers"], call.kwargs["split_above"])
+        for call in measure_mock.call_args_list
+    ] == [(workers, threshold), (workers, threshold)]
+
+
+@pytest.mark.parametrize(
+    ("body", "tests"),
+    (
+        ("def test_broken(:\n", 0),
+        ("def helper(): pass\n\nvalue = 1\n\ndef test_one(): pass\n", 1),
+        (
+            "@pytest.mark.parametrize('a', [1, 2])\n"
+            "@pytest.mark.parametrize('b', range(1, 7, 2))\n"
+            "def test_cases(a, b): pass\n",
+            6,
+        ),
+        (
+            "@mark.parametrize(argnames='a', argvalues={1, 2})\n"
+            "@pytest.mark.slow\n"
+            "async def test_cases(a): pass\n",
+            2,
+        ),
+        (
+            "@pytest.mark.parametrize('a', (1, 2))\n"
+            "class TestCases:\n"
+            "    def test_one(self, a): pass\n"
+            "    @pytest.mark.parametrize('b', [1, 2, 3])\n"
+            "    def test_two(self, a, b): pass\n",
+            8,
+        ),
+        (
+            "@pytest.fixture()\n"
+            "def value(): return 1\n"
+            "@decorators[0]()\n"
+            "def test_value(value): pass\n",
+            1,
+        ),
+        ("@pytest.mark.parametrize('a', [*VALUES])\ndef test_a(a): pass\n", None),
+        ("@pytest.mark.parametrize('a', VALUES)\ndef test_a(a): pass\n", None),
+        ("@pytest.mark.parametrize('a', list(range(2)))\ndef test_a(a): pass\n", None),
+        ("@pytest.mark.parametrize('a', range(COUNT))\ndef test_a(a): pass\n", None),
+        ("@pytest.mark.parametrize('a', range(stop=2))\ndef test_a(a): pass\n", None),
+        ("@pytest.mark.parametrize('a', range())\ndef test_a(a): pass\n", None),
+        ("@pytest.mark.parametrize('a', range(1, 2, 0))\ndef test_a(a): pass\n", None),
+        ("@pytest.mark.parametrize('a')\ndef test_a(a): pass\n", None),
+        (
+            "class TestCases:\n"
+            "    @pytest.mark.parametrize('a', VALUES)\n"
+            "    def test_a(self, a): pass\n",
+            None,
+        ),
+        (
+            "@pytest.fixture(params=[1, 2])\n"
+            "def value(request): return request.param\n"
+            "def test_value(value): pass\n",
+            None,
+        ),
+    ),
+)
+def test_count_tests(tmp_path: Path, body: str, tests: int | None) -> None:
+    test_file = tmp_path / "test_example.py"
+    test_file.write_text(body)
+    assert _count_tests(test_file) == tests
+
+
+def test_session_coverages_with_failed_measurement(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path, "def test_nothing(): pass\n")
+    with mock.patch(
+        "python_tool_competition_2024.calculation.coverage_caluclator."
+        "measure_coverages",
+        side_effect=MeasurementFailedError(config.tests_dir),
+    ), config.console.capture() as capture:
+        coverages = calculate_all_coverages(
+            (target,), config, CoverageCalculatorName.SESSION
+        )
+    assert coverages == (Coverages(RatioResult(9, 0), RatioResult(4, 0)),)
+    assert capture.get().splitlines() == [
+        "Could not run pytest for the generated tests: Could not run the "
+        f"tests of {config.tests_dir}"
+    ]
+
+
+def test_with_unnormalized_filename(tmp_path: Path) -> None:
+    def test(action: Callable[[], Coverages], _config: Config) -> None:
+        assert action() == Coverages(
+            line=RatioResult(total=2, successful=1),
+            branch=RatioResult(total=20, successful=10),
+            missing_lines=(2,),
+        )
+
+    def xml_creator(config: Config) -> str:
+        file = f"{config.targets_dir}/./example.py"
+        return f"""<?xml version="1.0" ?>
+<coverage>
+    <packages>
+        <package>
+            <classes>
+                <class line-rate="1.0" filename="{config.targets_dir}/other.py">
+                    <lines>
+                        <line hits="1" />
+                    </lines>
+                </class>
+                <class line-rate="1.0" filename="{file}">
+                    <lines>
+                        <line number="1" hits="1" condition-coverage="50% (10/20)" />
+                        <line number="2" hits="0" />
+                    </lines>
+                </class>
+            </classes>
+        </package>
+    </packages>
+</coverage>
+"""
+
+    _run_with_coverage_xml(tmp_path, xml_creator, test)
+
+
+@pytest.mark.benchmark()
+def test_streamed_coverage_xml_is_faster_than_parsed_tree(tmp_path: Path) -> None:
+    files = 20_000
+    coverage_xml = tmp_path / "coverage.xml"
+    _write_large_coverage_xml(coverage_xml, files, target_index=files // 2)
+    target = Target(
+        source=Path(f"/targets/package_{files // 2 % 50}/target.py"),
+        relative_source=Path("target.py"),
+        source_module="target",
+        test=Path("/tests/test_target.py"),
+        test_module="test_target",
+    )
+
+    start = time.perf_counter()
+    tree_coverages = _parse_coverage_xml_tree(coverage_xml, target)
+    tree_duration = time.perf_counter() - start
+    start = time.perf_counter()
+    streamed_coverages = _parse_coverage_xml(coverage_xml, target)
+    streamed_duration = time.perf_counter() - start
+
+    assert streamed_coverages == tree_coverages
+    assert streamed_coverages == Coverages(
+        line=RatioResult(total=20, successful=10),
+        branch=RatioResult(total=8, successful=4),
+        missing_lines=tuple(range(2, 21, 2)),
+    )
+    assert streamed_duration < tree_duration
+
+
+def _write_large_coverage_xml(
+    coverage_xml: Path, files: int, target_index: int
+) -> None:
+    parts = ['<?xml version="1.0" ?>\n<coverage><packages><package><classes>\n']
+    for index in range(files):
+        name = "target.py" if index == target_index else f"module_{index}.py"
+        parts.append(f'<class filename="/targets/package_{index % 50}/{name}"><lines>')
+        parts.extend(
+            (
+                f'<line number="{number}" hits="{number % 2}" branch="true"'
+                ' condition-coverage="50% (1/2)" />'
+                if number % 5 == 0
+                else f'<line number="{number}" hits="{number % 2}" />'
+            )
+            for number in range(1, 21)
+        )
+        parts.append("</lines></class>\n")
+    parts.append("</classes></package></packages></coverage>\n")
+    coverage_xml.write_text("".join(parts), encoding="utf-8")
+
+
+def _parse_coverage_xml_tree(coverage_xml: Path, target: Target) -> Coverages:
+    coverage = ElementTree.parse(coverage_xml).getroot()
+    line_visitor = _LineCoverageVisitor()
+    branch_visitor = _BranchCoverageVisitor()
+    for file in coverage.iter("class"):
+        if Path(file.attrib["filename"]) == target.source:
+            line_visitor.visit_file(file)
+            branch_visitor.visit_file(file)
+    return Coverages(
+        line=line_visitor.get_coverages(),
+        branch=branch_visitor.get_coverages(),
+        missing_lines=line_visitor.get_missing_lines(),
+    )
+
+
 def _run_with_coverage_xml(
     tmp_path: Path,
     xml_creator: Callable[[Config], str],
@@ -146,7 +577,12 @@ def _run_with_coverage_xml(
         )
         target = targets[0]
         target.test.touch()
-        test(lambda: calculate_coverages(target, config), config)
+        test(
+            lambda: calculate_coverages(
+                target, config, CoverageCalculatorName.PYTEST_COV
+            ),
+            config,
+        )
         run_mock.assert_called_once_with(
             (
                 "pytest",
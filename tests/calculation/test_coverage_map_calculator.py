@@ -0,0 +1,104 @@
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from python_tool_competition_2024.calculation import coverage_map_calculator
+from python_tool_competition_2024.calculation.coverage_map_calculator import (
+    calculate_coverage_map,
+    get_coverage_map_file,
+)
+from python_tool_competition_2024.coverage_map import read_coverage_map
+from python_tool_competition_2024.errors import MeasurementFailedError
+
+from ..helpers import get_test_config_and_target
+
+_TESTS = """\
+from example1 import other_method, some_method
+
+
+def test_positive() -> None:
+    assert some_method(1) == "5"
+
+
+class TestOther:
+    def test_other(self) -> None:
+        assert other_method(3) == 3
+"""
+
+
+def test_calculate_coverage_map(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path)
+    target.test.parent.mkdir(parents=True)
+    target.test.write_text(_TESTS, encoding="utf-8")
+    coverage_map = calculate_coverage_map(target, config)
+    map_file = get_coverage_map_file(target, config)
+    assert map_file == config.coverages_dir / "example1.tests.json"
+    assert coverage_map is not None
+    assert read_coverage_map(map_file) == coverage_map
+    assert tuple(coverage_map.tests) == (
+        "test_example1.py::test_positive",
+        "test_example1.py::TestOther::test_other",
+    )
+    assert coverage_map.covered_lines("test_example1.py::test_positive") == (
+        4,
+        6,
+        7,
+        11,
+    )
+    assert coverage_map.covered_branches("test_example1.py::test_positive") == ((6, 7),)
+    assert coverage_map.covered_lines("test_example1.py::TestOther::test_other") == (
+        4,
+        11,
+        13,
+        14,
+        15,
+        16,
+    )
+    assert coverage_map.covered_branches("test_example1.py::TestOther::test_other") == (
+        (14, 15),
+        (14, 16),
+    )
+
+
+def test_calculate_coverage_map_independent_of_cwd(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    config, target = get_test_config_and_target(tmp_path)
+    target.test.parent.mkdir(parents=True)
+    target.test.write_text(_TESTS, encoding="utf-8")
+    # the common ancestor of the cwd and the test file
+    monkeypatch.chdir(tmp_path)
+    calculate_coverage_map(target, config)
+    coverage_map = read_coverage_map(get_coverage_map_file(target, config))
+    assert coverage_map is not None
+    assert tuple(coverage_map.tests) == (
+        "test_example1.py::test_positive",
+        "test_example1.py::TestOther::test_other",
+    )
+
+
+def test_calculate_coverage_map_without_test(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path)
+    map_file = get_coverage_map_file(target, config)
+    map_file.parent.mkdir(parents=True)
+    map_file.write_text("outdated", encoding="utf-8")
+    assert calculate_coverage_map(target, config) is None
+    assert not map_file.exists()
+
+
+def test_calculate_coverage_map_with_failed_measurement(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path)
+    target.test.parent.mkdir(parents=True)
+    target.test.write_text(_TESTS, encoding="utf-8")
+    with mock.patch.object(
+        coverage_map_calculator,
+        "measure_coverage",
+        side_effect=MeasurementFailedError(target.test),
+    ), config.console.capture() as capture:
+        assert calculate_coverage_map(target, config) is None
+    assert capture.get().splitlines() == [
+        "Could not record the coverage map of example1: Could not run the "
+        f"tests of {target.test}"
+    ]
+    assert not get_coverage_map_file(target, config).exists()
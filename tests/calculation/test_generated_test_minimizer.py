@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from python_tool_competition_2024.calculation import generated_test_minimizer
+from python_tool_competition_2024.calculation.generated_test_minimizer import (
+    _remove_functions,
+    _select_functions,
+    minimize_generated_test,
+)
+from python_tool_competition_2024.coverage_analysis import CoverageAnalysis
+from python_tool_competition_2024.coverage_measurement import measure_coverage
+from python_tool_competition_2024.errors import (
+    MeasurementFailedError,
+    MeasurementTimeoutError,
+)
+from python_tool_competition_2024.results import RatioResult
+
+from ..helpers import TARGETS_DIR, get_test_config_and_target
+
+_REDUNDANT_TESTS = '''\
+import pytest
+
+from example1 import other_method, some_method
+
+
+def test_positive() -> None:
+    assert some_method(1) == "5"
+
+
+def test_positive_again() -> None:
+    assert some_method(2) == "10"
+
+
+class TestNegative:
+    def test_negative(self) -> None:
+        assert some_method(-1) == "-4"
+
+
+class TestRedundant:
+    """Only redundant tests."""
+
+    def test_negative_again(self) -> None:
+        assert some_method(-2) == "-5"
+
+
+class TestZero:
+    @pytest.mark.skipif(False, reason="always runs")
+    def test_zero(self) -> None:
+        assert some_method(0) == "-3"
+
+
+@pytest.mark.parametrize("number", (0, 3))
+def test_other(number: int) -> None:
+    assert other_method(number) >= 0
+'''
+
+_MINIMIZED_TESTS = '''\
+import pytest
+
+from example1 import other_method, some_method
+
+
+def test_positive() -> None:
+    assert some_method(1) == "5"
+
+
+
+
+class TestNegative:
+    def test_negative(self) -> None:
+        assert some_method(-1) == "-4"
+
+
+class TestRedundant:
+    """Only redundant tests."""
+
+
+
+
+
+@pytest.mark.parametrize("number", (0, 3))
+def test_other(number: int) -> None:
+    assert other_method(number) >= 0
+'''
+
+
+def test_minimize_generated_test(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path, _REDUNDANT_TESTS)
+    with config.console.capture() as capture:
+        minimize_generated_test(target, config)
+    assert capture.get().splitlines() == [
+        "Minimized the test for example1 from 6 to 3 test functions "
+        "(34 to 26 lines)."
+    ]
+    assert target.test.read_text(encoding="utf-8") == _MINIMIZED_TESTS
+
+
+def test_minimize_generated_test_without_redundant_tests(tmp_path: Path) -> None:
+    body = "def test_nothing() -> None:\n    pass\n"
+    config, target = get_test_config_and_target(tmp_path, body)
+    with config.console.capture() as capture:
+        minimize_generated_test(target, config)
+    assert capture.get().splitlines() == [
+        "Minimized the test for example1 from 1 to 1 test functions (2 to 2 lines)."
+    ]
+    assert target.test.read_text(encoding="utf-8") == body
+
+
+def test_minimize_missing_test(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path)
+    with config.console.capture() as capture:
+        minimize_generated_test(target, config)
+    assert capture.get() == ""
+    assert not target.test.exists()
+
+
+@pytest.mark.parametrize(
+    ("body", "reason"),
+    (
+        (
+            """\
+from example1 import some_method
+
+def test_positive() -> None:
+    assert some_method(1) == "5"
+
+def test_failing() -> None:
+    assert some_method(1) == "6"
+""",
+            "Not all tests passed.",
+        ),
+        (
+            """\
+from example1 import some_method
+
+def _create_test():
+    def test() -> None:
+        assert some_method(1) == "5"
+    return test
+
+test_first = _create_test()
+test_second = _create_test()
+""",
+            "Not all test functions were found.",
+        ),
+        (
+            """\
+from example1 import some_method
+
+_CALLS = []
+
+def test_positive() -> None:
+    assert some_method(1) == "5"
+
+def test_positive_with_state() -> None:
+    _CALLS.append(some_method(1))
+
+def test_depends_on_state() -> None:
+    assert some_method(1 - len(_CALLS))
+""",
+            "The coverages were not preserved.",
+        ),
+    ),
+)
+def test_minimize_generated_test_unchanged(
+    tmp_path: Path, body: str, reason: str
+) -> None:
+    config, target = get_test_config_and_target(tmp_path, body)
+    with config.console.capture() as capture:
+        minimize_generated_test(target, config)
+    assert capture.get().splitlines() == [
+        f"Could not minimize the test for example1: {reason}"
+    ]
+    assert target.test.read_text(encoding="utf-8") == body
+
+
+def test_minimize_generated_test_with_timeout(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path, _REDUNDANT_TESTS)
+    with mock.patch.object(
+        generated_test_minimizer,
+        "measure_coverage",
+        side_effect=MeasurementTimeoutError(target.test, 300),
+    ), config.console.capture() as capture:
+        minimize_generated_test(target, config)
+    assert capture.get().splitlines() == [
+        "Could not minimize the test for example1: Running the tests of "
+        f"{target.test} took longer than 300s"
+    ]
+    assert target.test.read_text(encoding="utf-8") == _REDUNDANT_TESTS
+
+
+def test_minimize_generated_test_with_failed_verification(tmp_path: Path) -> None:
+    config, target = get_test_config_and_target(tmp_path, _REDUNDANT_TESTS)
+    run = measure_coverage(
+        target.source,
+        target.source_module,
+        target.test,
+        python_paths=(TARGETS_DIR,),
+        timeout=60,
+        per_test=True,
+    )
+    with mock.patch.object(
+        generated_test_minimizer,
+        "measure_coverage",
+        side_effect=(run, MeasurementFailedError(target.test)),
+    ), config.console.capture() as capture:
+        minimize_generated_test(target, config)
+    assert capture.get().splitlines() == [
+        "Could not minimize the test for example1: The coverages were not preserved."
+    ]
+    assert target.test.read_text(encoding="utf-8") == _REDUNDANT_TESTS
+
+
+def test_select_functions_covering_only_together() -> None:
+    coverage = CoverageAnalysis(RatioResult(1, 1), RatioResult(0, 0), (), ())
+    functions: dict[tuple[str, ...], frozenset[int | tuple[int, int]]] = {
+        ("test_a",): frozenset({1}),
+        ("test_b",): frozenset({1}),
+    }
+    assert _select_functions(coverage, functions) == {("test_a",), ("test_b",)}
+
+
+def test_remove_functions() -> None:
+    source = """\
+import pytest
+
+async def test_async():
+    pass
+
+@pytest.mark.asyncio
+async def test_decorated_async():
+    pass
+
+class TestAll:
+    async def test_method(self):
+        pass
+
+    class TestNested:
+        def test_nested(self):
+            pass
+"""
+    assert _remove_functions(
+        source,
+        (
+            ("test_decorated_async",),
+            ("TestAll", "test_method"),
+            ("TestAll", "TestNested", "test_nested"),
+        ),
+    ) == ("import pytest\n\nasync def test_async():\n    pass\n\n\n")
+    assert _remove_functions(source, (("test_missing",),)) is None
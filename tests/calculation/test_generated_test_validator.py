@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from python_tool_competition_2024.calculation.generated_test_validator import (
+    validate_generated_test,
+)
+from python_tool_competition_2024.config import Config
+from python_tool_competition_2024.target_finder import Target, find_targets
+
+from ..helpers import TARGETS_DIR, get_test_config
+
+
+@pytest.mark.parametrize(
+    "body",
+    (
+        "import example1\n\ndef test_example():\n    assert example1.some_method(1)\n",
+        "# no tests at all\n",
+    ),
+)
+def test_valid_test(tmp_path: Path, body: str) -> None:
+    config, target = _write_test(tmp_path, body, show_commands=False)
+    with config.console.capture() as capture:
+        assert validate_generated_test(target, config) is True
+    assert capture.get() == ""
+    assert target.test.read_text() == body
+
+
+@pytest.mark.parametrize(
+    ("body", "message"),
+    (
+        (
+            "def test_example(:\n    pass\n",
+            "The generated test for example1 is invalid: invalid syntax "
+            "(test_example1.py, line 1)",
+        ),
+        ("x = '\0'\n", "The generated test for example1 is invalid: "),
+        (
+            "import missing_module\n\ndef test_example():\n    pass\n",
+            "Could not collect the generated test for example1. "
+            "Add -vv to show the console output.",
+        ),
+        (
+            "import os\n\nos._exit(0)\n",
+            "Could not collect the generated test for example1. "
+            "Add -vv to show the console output.",
+        ),
+    ),
+)
+def test_invalid_test(tmp_path: Path, body: str, message: str) -> None:
+    config, target = _write_test(tmp_path, body, show_commands=False)
+    with config.console.capture() as capture:
+        assert validate_generated_test(target, config) is False
+    assert capture.get().startswith(message)
+    assert not target.test.exists()
+    assert (
+        target.test.with_name("test_example1.py.invalid").read_text(encoding="utf-8")
+        == body
+    )
+
+
+def test_invalid_test_with_output(tmp_path: Path) -> None:
+    config, target = _write_test(
+        tmp_path, "raise ValueError('broken')\n", show_commands=True
+    )
+    with config.console.capture() as capture:
+        assert validate_generated_test(target, config) is False
+    lines = capture.get().splitlines()
+    assert lines[0].startswith("Running: pytest --collect-only --quiet ")
+    assert any(line.endswith("ValueError: broken") for line in lines)
+    assert lines[-2:] == [
+        "Exited with code 2",
+        "Could not collect the generated test for example1.",
+    ]
+
+
+def _write_test(
+    tmp_path: Path, body: str, *, show_commands: bool
+) -> tuple[Config, Target]:
+    config = get_test_config(
+        show_commands=show_commands,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+    target = find_targets(config)[0]
+    target.test.parent.mkdir(parents=True)
+    target.test.write_text(body, encoding="utf-8")
+    return config, target
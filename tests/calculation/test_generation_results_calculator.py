@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import sys
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from python_tool_competition_2024.calculation.generation_results_calculator import (
+    calculate_generation_results,
+    default_generation_workers,
+    is_free_threaded,
+)
+from python_tool_competition_2024.calculation.generator_runner import GeneratorIsolation
+from python_tool_competition_2024.config import Config
+from python_tool_competition_2024.generation_results import (
+    TestGenerationResult,
+    TestGenerationSuccess,
+)
+from python_tool_competition_2024.generators import FileInfo, TestGenerator
+from python_tool_competition_2024.target_finder import Target, find_targets
+from python_tool_competition_2024.target_index import build_target_index
+
+from ..helpers import TARGETS_DIR, get_test_config
+
+_started: list[str] = []
+_threads: set[str] = set()
+
+
+class _RecordingTestGenerator(TestGenerator):
+    def build_test(self, target_file_info: FileInfo) -> TestGenerationResult:
+        _started.append(target_file_info.module_name)
+        _threads.add(threading.current_thread().name)
+        if target_file_info.module_name == "abort":
+            raise KeyboardInterrupt
+        return TestGenerationSuccess(f"# {target_file_info.module_name}")
+
+
+@pytest.fixture()
+def _recording_generator() -> Iterator[None]:
+    _started.clear()
+    _threads.clear()
+    with mock.patch(
+        "python_tool_competition_2024.calculation.generator_runner.find_generator"
+    ) as runner_mock, mock.patch(
+        "python_tool_competition_2024.calculation.generation_results_calculator"
+        ".find_generator"
+    ) as calculator_mock:
+        runner_mock.return_value = _RecordingTestGenerator
+        calculator_mock.return_value = _RecordingTestGenerator
+        yield
+
+
+def _config_and_targets(tmp_path: Path) -> tuple[Config, tuple[Target, ...]]:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+    targets = find_targets(config)
+    build_target_index((target.source for target in targets), config)
+    return config, targets
+
+
+@pytest.mark.parametrize(
+    ("is_gil_enabled", "free_threaded"), ((None, False), (True, False), (False, True))
+)
+def test_is_free_threaded(
+    monkeypatch: pytest.MonkeyPatch, is_gil_enabled: bool | None, *, free_threaded: bool
+) -> None:
+    if is_gil_enabled is None:
+        monkeypatch.delattr(sys, "_is_gil_enabled", raising=False)
+    else:
+        monkeypatch.setattr(
+            sys, "_is_gil_enabled", lambda: is_gil_enabled, raising=False
+        )
+    assert is_free_threaded() is free_threaded
+
+
+@pytest.mark.parametrize(
+    ("free_threaded", "cpu_count", "workers"),
+    ((False, 8, 1), (True, 8, 8), (True, None, 1)),
+)
+def test_default_generation_workers(
+    *, free_threaded: bool, cpu_count: int | None, workers: int
+) -> None:
+    with mock.patch(
+        "python_tool_competition_2024.calculation.generation_results_calculator"
+        ".is_free_threaded",
+        return_value=free_threaded,
+    ), mock.patch("os.cpu_count", return_value=cpu_count):
+        assert default_generation_workers() == workers
+
+
+@pytest.mark.usefixtures("_recording_generator")
+@pytest.mark.parametrize("workers", (1, 2, 8))
+def test_calculate_generation_results(tmp_path: Path, workers: int) -> None:
+    config, targets = _config_and_targets(tmp_path)
+    results = calculate_generation_results(
+        targets, config, GeneratorIsolation.NONE, workers
+    )
+    assert results == tuple(
+        TestGenerationSuccess(f"# {target.source_module}") for target in targets
+    )
+    for target in targets:
+        assert target.test.read_text() == f"# {target.source_module}"
+    if workers == 1:
+        assert _started == [target.source_module for target in targets]
+        assert _threads == {threading.current_thread().name}
+    else:
+        # the costliest targets are started first
+        assert set(_started[:2]) == {"example1", "sub_example"}
+        assert all(name.startswith("generation") for name in _threads)
+
+
+@pytest.mark.usefixtures("_recording_generator")
+def test_calculate_generation_results_with_abort(tmp_path: Path) -> None:
+    config, targets = _config_and_targets(tmp_path)
+    aborting = Target(
+        source=targets[0].source,
+        relative_source=targets[0].relative_source,
+        source_module="abort",
+        test=targets[0].test,
+        test_module=targets[0].test_module,
+    )
+    with pytest.raises(KeyboardInterrupt):
+        calculate_generation_results(
+            (aborting, *targets[1:]), config, GeneratorIsolation.NONE, 2
+        )
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from python_tool_competition_2024.calculation import generator_runner
+from python_tool_competition_2024.calculation.generation_results_calculator import (
+    _target_to_file_info,
+)
+from python_tool_competition_2024.calculation.generator_runner import (
+    GeneratorIsolation,
+    _decode_result,
+    _encode_result,
+    _run_in_subinterpreter,
+    _run_script,
+    _subinterpreter_main,
+    run_generator,
+)
+from python_tool_competition_2024.config import GeneratorName
+from python_tool_competition_2024.generation_results import (
+    FailureReason,
+    TestGenerationCandidates,
+    TestGenerationFailure,
+    TestGenerationResult,
+    TestGenerationSuccess,
+)
+from python_tool_competition_2024.generators import (
+    DummyTestGenerator,
+    FileInfo,
+    TestGenerator,
+)
+from python_tool_competition_2024.target_finder import find_targets
+
+from ..helpers import TARGETS_DIR, get_test_config
+
+
+class _PrintingTestGenerator(TestGenerator):
+    def build_test(self, target_file_info: FileInfo) -> TestGenerationSuccess:
+        target_file_info.config.console.print("Generating the test.", style="red")
+        return TestGenerationSuccess("body")
+
+
+class _ThresholdTestGenerator(TestGenerator):
+    def build_test(self, target_file_info: FileInfo) -> TestGenerationSuccess:
+        return TestGenerationSuccess(str(target_file_info.config.test_split_threshold))
+
+
+def _file_info(tmp_path: Path) -> FileInfo:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+    return _target_to_file_info(find_targets(config)[0], config)
+
+
+@pytest.mark.usefixtures("_no_subinterpreter_coverage")
+@pytest.mark.parametrize("isolation", tuple(GeneratorIsolation))
+def test_run_generator(tmp_path: Path, isolation: GeneratorIsolation) -> None:
+    file_info = _file_info(tmp_path)
+    assert run_generator(file_info, isolation) == DummyTestGenerator().build_test(
+        file_info
+    )
+
+
+@pytest.mark.usefixtures("_no_subinterpreter_coverage")
+def test_run_generator_in_failing_subinterpreter(tmp_path: Path) -> None:
+    file_info = _file_info(tmp_path)
+    file_info = dataclasses.replace(
+        file_info,
+        config=dataclasses.replace(
+            file_info.config, generator_name=GeneratorName("missing_generator")
+        ),
+    )
+    result = run_generator(file_info, GeneratorIsolation.SUBINTERPRETER)
+    assert isinstance(result, TestGenerationFailure)
+    assert result.reason == FailureReason.UNEXPECTED_ERROR
+    assert result.error_lines[0] == "Could not run the generator in a sub-interpreter:"
+    assert "missing_generator" in str(result.error_lines[1])
+
+
+@pytest.mark.usefixtures("_no_subinterpreter_coverage")
+def test_subinterpreters_isolate_modules() -> None:
+    module_name = "tests.calculation.isolated_dummy_module"
+    assert module_name not in sys.modules
+    assert (
+        _run_script(
+            generator_runner._INTERPRETERS,  # type: ignore[arg-type]
+            "import sys\n"
+            "import types\n"
+            "sys.modules[name] = types.ModuleType(name)\n",
+            {"name": module_name},
+        )
+        is None
+    )
+    assert module_name not in sys.modules
+
+
+@pytest.mark.usefixtures("_no_subinterpreter_coverage")
+def test_run_script_with_error() -> None:
+    error = _run_script(
+        generator_runner._INTERPRETERS,  # type: ignore[arg-type]
+        "raise ValueError('some error')",
+        {},
+    )
+    assert error is not None
+    assert "ValueError" in error
+    assert "some error" in error
+
+
+def test_run_script_with_returned_error() -> None:
+    # since Python 3.13 the error is returned instead of raised
+    destroyed: list[str] = []
+    interpreters = SimpleNamespace(
+        create=lambda config: config,
+        run_string=lambda *_: SimpleNamespace(formatted="ValueError: some error"),
+        destroy=destroyed.append,
+    )
+    assert _run_script(interpreters, "", {}) == "ValueError: some error"  # type: ignore[arg-type]
+    assert destroyed == ["legacy"]
+
+
+def test_run_in_subinterpreter_prints_console_output(tmp_path: Path) -> None:
+    file_info = _file_info(tmp_path)
+    # runs the script of the sub-interpreter in this interpreter
+    interpreters = SimpleNamespace(
+        create=lambda **_: 1,
+        run_string=lambda _id, _script, shared: _subinterpreter_main(shared["request"]),
+        destroy=lambda _id: None,
+    )
+    with mock.patch.object(
+        generator_runner, "find_generator", return_value=_PrintingTestGenerator
+    ), file_info.config.console.capture() as capture:
+        result = _run_in_subinterpreter(
+            file_info, interpreters  # type: ignore[arg-type]
+        )
+    assert result == TestGenerationSuccess("body")
+    assert capture.get() == "Generating the test.\n"
+
+
+def test_run_in_subinterpreter_keeps_config(tmp_path: Path) -> None:
+    file_info = _file_info(tmp_path)
+    file_info = dataclasses.replace(
+        file_info, config=dataclasses.replace(file_info.config, test_split_threshold=5)
+    )
+    interpreters = SimpleNamespace(
+        create=lambda **_: 1,
+        run_string=lambda _id, _script, shared: _subinterpreter_main(shared["request"]),
+        destroy=lambda _id: None,
+    )
+    with mock.patch.object(
+        generator_runner, "find_generator", return_value=_ThresholdTestGenerator
+    ):
+        result = _run_in_subinterpreter(
+            file_info, interpreters  # type: ignore[arg-type]
+        )
+    assert result == TestGenerationSuccess("5")
+
+
+def test_run_in_failing_subinterpreter_without_console_output(tmp_path: Path) -> None:
+    file_info = _file_info(tmp_path)
+    interpreters = SimpleNamespace(
+        create=lambda **_: 1,
+        run_string=lambda *_: "ImportError: some error",
+        destroy=lambda _id: None,
+    )
+    with file_info.config.console.capture() as capture:
+        result = _run_in_subinterpreter(
+            file_info, interpreters  # type: ignore[arg-type]
+        )
+    assert result == TestGenerationFailure(
+        (
+            "Could not run the generator in a sub-interpreter:",
+            "ImportError: some error",
+        ),
+        FailureReason.UNEXPECTED_ERROR,
+    )
+    assert capture.get() == ""
+
+
+@pytest.mark.parametrize(
+    ("color_system", "output"),
+    (
+        (None, "Generating\nthe test.\n"),
+        ("standard", "\x1b[31mGenerating\x1b[0m\n\x1b[31mthe test.\x1b[0m\n"),
+    ),
+)
+def test_subinterpreter_main(
+    tmp_path: Path, color_system: str | None, output: str
+) -> None:
+    file_info = _file_info(tmp_path)
+    config = file_info.config
+    result_file = tmp_path / "result.json"
+    console_file = tmp_path / "console.txt"
+    with mock.patch.object(
+        generator_runner, "find_generator", return_value=_PrintingTestGenerator
+    ):
+        _subinterpreter_main(
+            json.dumps(
+                {
+                    "sys_path": sys.path,
+                    "generator_name": config.generator_name,
+                    "targets_dir": str(config.targets_dir),
+                    "results_dir": str(config.results_dir.parent),
+                    "show_commands": False,
+                    "show_failures": False,
+                    "test_split_threshold": 0,
+                    "console_width": 10,
+                    "console_color_system": color_system,
+                    "console_file": str(console_file),
+                    "source": str(file_info.absolute_path),
+                    "module_name": file_info.module_name,
+                    "result_file": str(result_file),
+                }
+            )
+        )
+    assert _decode_result(result_file.read_text()) == TestGenerationSuccess("body")
+    assert console_file.read_text() == output
+
+
+@pytest.mark.parametrize(
+    ("result", "decoded"),
+    (
+        (TestGenerationSuccess("body"), TestGenerationSuccess("body")),
+        (
+            TestGenerationCandidates(("first", "second")),
+            TestGenerationCandidates(("first", "second")),
+        ),
+        (
+            TestGenerationFailure(
+                ("An unexpected error occured:", RuntimeError("some error")),
+                FailureReason.UNEXPECTED_ERROR,
+            ),
+            TestGenerationFailure(
+                ("An unexpected error occured:", "RuntimeError: some error"),
+                FailureReason.UNEXPECTED_ERROR,
+            ),
+        ),
+    ),
+)
+def test_encode_and_decode_result(
+    result: TestGenerationResult, decoded: TestGenerationResult
+) -> None:
+    assert _decode_result(_encode_result(result)) == decoded
+
+
+def test_encode_unknown_result() -> None:
+    result = TestGenerationResult()
+    with pytest.raises(TypeError, match="Unknown test generation result"):
+        _encode_result(result)
@@ -11,7 +11,10 @@ from unittest import mock
 from click.testing import CliRunner
 from rich.console import RenderableType
 
-from python_tool_competition_2024.calculation.coverage_caluclator import Coverages
+from python_tool_competition_2024.calculation.coverage_caluclator import (
+    CoverageCalculatorName,
+    Coverages,
+)
 from python_tool_competition_2024.calculation.mutation_calculator import (
     MutationCalculatorName,
 )
@@ -156,9 +159,9 @@ _MUTATION_SCORES = (
 )
 
 _COVERAGES = (
-    Coverages(RatioResult(10, 5), RatioResult(15, 6)),
-    Coverages(RatioResult(3, 0), RatioResult(8, 2)),
-    Coverages(RatioResult(7, 7), RatioResult(12, 6)),
+    Coverages(RatioResult(10, 5), RatioResult(15, 6), (2, 3, 5, 8, 13)),
+    Coverages(RatioResult(3, 0), RatioResult(8, 2), (1, 2, 3)),
+    Coverages(RatioResult(7, 7), RatioResult(12, 6), ()),
     Coverages(RatioResult(20, 5), RatioResult(25, 16)),
     Coverages(RatioResult(20, 5), RatioResult(25, 16)),
 )
@@ -174,7 +177,7 @@ def _register_mutation_scores(
     with mock.patch(
         "python_tool_competition_2024.calculation.calculate_mutation"
     ) as calculate_mutation_mock, mock.patch(
-        "python_tool_competition_2024.calculation.calculate_coverages"
+        "python_tool_competition_2024.calculation.coverage_caluclator.calculate_coverages"
     ) as calculate_coverages_mock:
         calculate_mutation_mock.side_effect = _MUTATION_SCORES
         mock.seal(calculate_mutation_mock)
@@ -183,14 +186,20 @@ def _register_mutation_scores(
         yield
         num_mutations = len(_MUTATION_SCORES) if scores_called else 0
         num_coverages = len(_COVERAGES) if scores_called else 0
-        assert (
-            calculate_mutation_mock.call_args_list
-            == [mock.call(mock.ANY, mock.ANY, MutationCalculatorName.COSMIC_RAY)]
-            * num_mutations
-        )
+        assert calculate_mutation_mock.call_args_list == [
+            mock.call(
+                mock.ANY,
+                mock.ANY,
+                MutationCalculatorName.COSMIC_RAY,
+                coverages.missing_lines or (),
+                mock.ANY,
+            )
+            for coverages in _COVERAGES[:num_mutations]
+        ]
         assert (
             calculate_coverages_mock.call_args_list
-            == [mock.call(mock.ANY, mock.ANY)] * num_coverages
+            == [mock.call(mock.ANY, mock.ANY, CoverageCalculatorName.PYTEST_COV)]
+            * num_coverages
         )
 
 
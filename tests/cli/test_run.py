@@ -5,9 +5,13 @@ import re
 import shutil
 from collections.abc import Iterable, Iterator
 from pathlib import Path
+from unittest import mock
 
 import pytest
 
+from python_tool_competition_2024 import calculation
+from python_tool_competition_2024.coverage_map import read_coverage_map
+
 from ..example_generators import LengthTestGenerator, get_static_body
 from ..helpers import TARGETS_DIR
 from .helpers import ENTRY_POINT_GROUP, cli_title, run_cli, run_successful_cli
@@ -50,6 +54,7 @@ Target {targets_dir / "example2.py"} failed with FailureReason.UNEXPECTED_ERROR
     )
     csv_file = results_dir / "statistics.csv"
     assert _find_files(wd_tmp_path) == (
+        _index_file(wd_tmp_path / "results"),
         *test_files,
         csv_file,
         wd_tmp_path / "targets" / "example1.py",
@@ -117,6 +122,7 @@ def test_run_in_wd_with_all_success(wd_tmp_path: Path) -> None:
     )
     csv_file = results_dir / "statistics.csv"
     assert _find_files(wd_tmp_path) == (
+        _index_file(wd_tmp_path / "results"),
         *test_files,
         csv_file,
         wd_tmp_path / "targets" / "example1.py",
@@ -177,6 +183,7 @@ Add -v to show the failed generation results.
     results_dir = wd_tmp_path / "results" / "failures"
     csv_file = results_dir / "statistics.csv"
     assert _find_files(wd_tmp_path) == (
+        _index_file(wd_tmp_path / "results"),
         csv_file,
         wd_tmp_path / "targets" / "example1.py",
         wd_tmp_path / "targets" / "example2.py",
@@ -225,6 +232,7 @@ Add -v to show the failed generation results.
     results_dir = wd_tmp_path / "results" / "raising"
     csv_file = results_dir / "statistics.csv"
     assert _find_files(wd_tmp_path) == (
+        _index_file(wd_tmp_path / "results"),
         csv_file,
         wd_tmp_path / "targets" / "example1.py",
         wd_tmp_path / "targets" / "example2.py",
@@ -259,6 +267,7 @@ def test_run_in_wd_with_abort(wd_tmp_path: Path) -> None:
     )
 
     assert _find_files(wd_tmp_path) == (
+        _index_file(wd_tmp_path / "results"),
         wd_tmp_path / "targets" / "example1.py",
         wd_tmp_path / "targets" / "example2.py",
         wd_tmp_path / "targets" / "sub_example" / "__init__.py",
@@ -298,7 +307,11 @@ Add -v to show the failed generation results.
         test_dir / "test_sub_example.py",
     )
     csv_file = results_dir / "statistics.csv"
-    assert _find_files(wd_tmp_path) == (*test_files, csv_file)
+    assert _find_files(wd_tmp_path) == (
+        _index_file(results_dir.parent),
+        *test_files,
+        csv_file,
+    )
     assert tuple(csv_file.read_text().splitlines()) == (
         (
             "target,"
@@ -354,6 +367,8 @@ Add -v to show the failed generation results.
     )
     csv_file = results_dir / "statistics.csv"
     assert _find_files(wd_tmp_path) == (
+        wd_tmp_path / "results" / ".cache" / "pycache",
+        _index_file(wd_tmp_path / "results"),
         results_dir / ".coverage",
         results_dir / ".pytest_cache",
         *_cosmic_ray_files(results_dir),
@@ -383,13 +398,55 @@ Add -v to show the failed generation results.
     }
 
 
-def test_run_with_different_targets_and_dummy(wd_tmp_path: Path) -> None:
-    assert run_successful_cli(
-        ("run", "dummy", "--targets-dir", str(TARGETS_DIR)),
-        generators=None,
-        mock_scores=True,
-    ) == (
+@pytest.mark.usefixtures("_no_subinterpreter_coverage")
+@pytest.mark.parametrize(
+    ("isolation_args", "supported", "isolation_lines"),
+    (
+        ((), True, ()),
+        (("--generator-isolation", "none"), False, ()),
+        (("--generator-isolation", "subinterpreter"), True, ()),
+        (("--generation-workers", "3"), True, ()),
+        (
+            ("--minimize-tests",),
+            True,
+            tuple(
+                f"Minimized the test for {module} from 1 to 1 test functions "
+                "(5 to 5 lines)."
+                for module in (
+                    "example1",
+                    "example2",
+                    "sub_example",
+                    "sub_example.example3",
+                    "sub_example.example4",
+                )
+            ),
+        ),
+        (
+            ("--generator-isolation", "subinterpreter"),
+            False,
+            (
+                "Sub-interpreters are not supported by this Python version. "
+                "Running the generator in the same interpreter.",
+            ),
+        ),
+    ),
+)
+def test_run_with_different_targets_and_dummy(
+    wd_tmp_path: Path,
+    isolation_args: tuple[str, ...],
+    *,
+    supported: bool,
+    isolation_lines: tuple[str, ...],
+) -> None:
+    with mock.patch.object(calculation, "SUBINTERPRETERS_SUPPORTED", supported):
+        stdout = run_successful_cli(
+            ("run", "dummy", "--targets-dir", str(TARGETS_DIR), *isolation_args),
+            generators=None,
+            mock_scores=True,
+        )
+    assert stdout == (
         cli_title("Using generator dummy"),
+        *isolation_lines,
         *"""\
 ┏━━━━━━━━━━━━━━━━━━━━━━━━━┳━━━━━━━━━━┳━━━━━━━━━━━━━━━┳━━━━━━━━━━━━━━━━━┳━━━━━━━━━━━━━━━━┓
 ┃ Target                  ┃ Success  ┃ Line Coverage ┃ Branch Coverage ┃ Mutation Score ┃
@@ -417,7 +474,11 @@ def test_run_with_different_targets_and_dummy(wd_tmp_path: Path) -> None:
         test_dir / "test_sub_example.py",
     )
     csv_file = results_dir / "statistics.csv"
-    assert _find_files(wd_tmp_path) == (*test_files, csv_file)
+    assert _find_files(wd_tmp_path) == (
+        _index_file(results_dir.parent),
+        *test_files,
+        csv_file,
+    )
     assert tuple(csv_file.read_text().splitlines()) == (
         (
             "target,"
@@ -446,6 +507,31 @@ def test_run_with_different_targets_and_dummy(wd_tmp_path: Path) -> None:
     }
 
 
+@pytest.mark.usefixtures("_no_subinterpreter_coverage")
+def test_run_with_coverage_map(wd_tmp_path: Path) -> None:
+    run_successful_cli(
+        ("run", "dummy", "--targets-dir", str(TARGETS_DIR), "--record-coverage-map"),
+        generators=None,
+        mock_scores=True,
+    )
+    coverages_dir = wd_tmp_path / "results" / "dummy" / "coverages"
+    map_files = tuple(
+        coverages_dir / f"{module}.tests.json"
+        for module in (
+            "example1",
+            "example2",
+            "sub_example.example3",
+            "sub_example.example4",
+            "sub_example",
+        )
+    )
+    assert tuple(sorted(coverages_dir.glob("*.tests.json"))) == map_files
+    for map_file in map_files:
+        coverage_map = read_coverage_map(map_file)
+        assert coverage_map is not None
+        assert len(coverage_map.tests) == 1
+
+
 def test_run_with_different_targets_and_results(wd_tmp_path: Path) -> None:
     results_dir = wd_tmp_path / "other_res" / "length"
     results_dir.parent.mkdir()
@@ -489,7 +575,16 @@ Add -v to show the failed generation results.
         test_dir / "test_sub_example.py",
     )
     csv_file = results_dir / "statistics.csv"
-    assert _find_files(wd_tmp_path) == (*test_files, csv_file)
+    # the results of the previous run are kept for the generator
+    previous_file = (
+        results_dir.parent / ".cache" / "previous_results" / "length" / "old_file"
+    )
+    assert _find_files(wd_tmp_path) == (
+        previous_file,
+        _index_file(results_dir.parent),
+        *test_files,
+        csv_file,
+    )
     assert tuple(csv_file.read_text().splitlines()) == (
         (
             "target,"
@@ -531,9 +626,47 @@ def test_run_with_help(help_arg: str) -> None:
         "                                  [default: targets]",
         "  --results-dir DIRECTORY         The directory to store all results to.",
         "                                  [default: results]",
-        "  --mutation-calculator [mutpy|cosmic-ray]",
+        "  --mutation-calculator [mutpy|cosmic-ray|cosmic-ray-fork-server|native|native-schemata]",  # noqa: E501
         "                                  The calculator to run mutation analysis.",
-        "                                  [default: cosmic-ray]",
+        "                                  `cosmic-ray-fork-server` runs the tests of",
+        "                                  every mutant in a fork of a warm server,",
+        "                                  `native` mutates the targets in memory and",
+        "                                  runs the tests in a fork of this process,",
+        "                                  `native-schemata` compiles all mutants of a",
+        "                                  target at once.  [default: cosmic-ray]",
+        "  --coverage-calculator [pytest-cov|data-file|fork|monitoring|session]",
+        "                                  The calculator to measure line and branch",
+        "                                  coverage. `data-file` reads the coverage data",  # noqa: E501
+        "                                  file of pytest-cov instead of its XML report,",  # noqa: E501
+        "                                  `fork` runs the tests in a fork of this",
+        "                                  process instead of a new one, `monitoring`",
+        "                                  does the same but measures with sys.monitoring",  # noqa: E501
+        "                                  on Python 3.12+ and `session` runs the tests",  # noqa: E501
+        "                                  of all targets in a single forked pytest",
+        "                                  session.  [default: pytest-cov]",
+        "  --generator-isolation [none|subinterpreter]",
+        "                                  How to isolate the generator. `subinterpreter`",  # noqa: E501
+        "                                  runs each target in its own sub-interpreter.",  # noqa: E501
+        "                                  [default: none]",
+        "  --generation-workers INTEGER RANGE",
+        "                                  The number of threads to generate tests in",
+        "                                  parallel. 0 uses one thread per CPU on free-",  # noqa: E501
+        "                                  threaded Python builds and a single thread",
+        "                                  otherwise.  [default: 0; x>=0]",
+        "  --split-tests-above INTEGER RANGE",
+        "                                  Run the tests of a generated test file with at",  # noqa: E501
+        "                                  least this many tests, counting every",
+        "                                  parametrized case, in one process per CPU when",  # noqa: E501
+        "                                  measuring the coverages with `fork` or",
+        "                                  `monitoring`. 0 never splits them.  [default:",  # noqa: E501
+        "                                  1000; x>=0]",
+        "  --minimize-tests                Remove generated test functions that do not",
+        "                                  add line or branch coverage before running the",  # noqa: E501
+        "                                  mutation analysis.",
+        "  --record-coverage-map           Record which test function covers which line",  # noqa: E501
+        "                                  and branch of each target in the coverages",
+        "                                  directory and only run the covering test",
+        "                                  functions against each mutant.",
         "  -h, --help                      Show this message and exit.",
     )
 
@@ -628,7 +761,7 @@ def _find_files(directory: Path) -> tuple[Path, ...]:
 
 def _each_file(directory: Path) -> Iterator[Path]:
     # only show cache dir as one, because content can change
-    if directory.name == ".pytest_cache":
+    if directory.name in (".pytest_cache", "pycache"):
         yield directory
         return
     for item in directory.iterdir():
@@ -638,6 +771,10 @@ def _each_file(directory: Path) -> Iterator[Path]:
             yield from _each_file(item)
 
 
+def _index_file(results_dir: Path) -> Path:
+    return results_dir / ".cache" / "target_index.json"
+
+
 def _dummy_body(target_file: Path | None) -> str:
     if target_file is None:
         return ""
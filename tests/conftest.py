@@ -1,19 +1,37 @@
+from collections.abc import Iterator
 from pathlib import Path
 
 import pytest
 
+from python_tool_competition_2024.forked_pytest import stop_fork_server
 from python_tool_competition_2024.generator_plugins import _load_plugins
+from python_tool_competition_2024.target_index import _load_index
 
 # let pytest show the assertions in tests.cli.helpers
 pytest.register_assert_rewrite("tests.cli.helpers")
 
 
+@pytest.fixture(autouse=True, scope="session")
+def _stop_fork_server() -> Iterator[None]:
+    yield
+    # pytest-cov measures the fork server as a new interpreter, so it has to exit
+    # before its coverage data is combined
+    stop_fork_server()
+
+
 @pytest.fixture(autouse=True)
 def _reset_caches() -> None:
     _load_plugins.cache_clear()
+    _load_index.cache_clear()
 
 
 @pytest.fixture()
 def wd_tmp_path(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
     monkeypatch.chdir(tmp_path)
     return tmp_path
+
+
+@pytest.fixture()
+def _no_subinterpreter_coverage(monkeypatch: pytest.MonkeyPatch) -> None:
+    # pytest-cov would start measuring each sub-interpreter on its own
+    monkeypatch.delenv("COV_CORE_DATAFILE", raising=False)
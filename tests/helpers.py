@@ -7,8 +7,12 @@ from unittest import mock
 
 from rich.console import Console
 
+from python_tool_competition_2024.calculation.generation_results_calculator import (
+    write_generated_test,
+)
 from python_tool_competition_2024.config import Config, get_config
 from python_tool_competition_2024.generator_plugins import to_test_generator_plugin_name
+from python_tool_competition_2024.target_finder import Target, find_targets
 
 CLI_COLUMNS: Final = 200
 _SOURCE_DIR = Path(__file__).parent.parent / "python_tool_competition_2024"
@@ -48,3 +52,18 @@ def get_test_config(
         show_commands=show_commands,
         show_failures=show_failures,
     )
+
+
+def get_test_config_and_target(
+    tmp_path: Path, body: str | None = None
+) -> tuple[Config, Target]:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+    target = find_targets(config)[0]
+    if body is not None:
+        write_generated_test(target, body)
+    return config, target
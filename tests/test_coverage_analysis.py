@@ -0,0 +1,92 @@
+from pathlib import Path
+
+from python_tool_competition_2024.coverage_analysis import (
+    CoverageAnalysis,
+    analyse_coverage,
+    combine_coverage_analyses,
+    find_statement_lines,
+    find_unexecuted_lines,
+)
+from python_tool_competition_2024.results import RatioResult
+
+from .helpers import TARGETS_DIR
+
+
+def test_analyse_coverage_without_executions() -> None:
+    assert analyse_coverage(TARGETS_DIR / "example1.py", (), ()) == CoverageAnalysis(
+        line=RatioResult(9, 0),
+        branch=RatioResult(4, 0),
+        missing_lines=(4, 6, 7, 8, 11, 13, 14, 15, 16),
+        missing_branches=((6, 7), (6, 8), (14, 15), (14, 16)),
+    )
+
+
+def test_analyse_coverage_with_executions() -> None:
+    assert analyse_coverage(
+        TARGETS_DIR / "example1.py",
+        (4, 6, 7, 11, 13, 14, 15, 16),
+        ((-1, 4), (4, 11), (6, 7), (14, 15), (15, 14), (14, 16)),
+    ) == CoverageAnalysis(
+        line=RatioResult(9, 8),
+        branch=RatioResult(4, 3),
+        missing_lines=(8,),
+        missing_branches=((6, 8),),
+    )
+
+
+def test_analyse_coverage_without_branches() -> None:
+    assert analyse_coverage(TARGETS_DIR / "example2.py", (), ()) == CoverageAnalysis(
+        line=RatioResult(2, 0),
+        branch=RatioResult(0, 0),
+        missing_lines=(4, 6),
+        missing_branches=(),
+    )
+
+
+def test_combine_coverage_analyses() -> None:
+    source = TARGETS_DIR / "example1.py"
+    assert combine_coverage_analyses(
+        (
+            analyse_coverage(source, (4, 6, 7, 11), ((-1, 4), (6, 7))),
+            analyse_coverage(source, (4, 6, 8, 11), ((-1, 4), (6, 8))),
+            analyse_coverage(source, (), ()),
+        )
+    ) == CoverageAnalysis(
+        line=RatioResult(9, 5),
+        branch=RatioResult(4, 2),
+        missing_lines=(13, 14, 15, 16),
+        missing_branches=((14, 15), (14, 16)),
+    )
+
+
+def test_find_unexecuted_lines(tmp_path: Path) -> None:
+    source = tmp_path / "example.py"
+    source.write_text(
+        "def some_method(\n"
+        "    number: int,\n"
+        ") -> list[int]:\n"
+        "    if number > 0:\n"
+        "        return [\n"
+        "            number,\n"
+        "        ]\n"
+        "    return []\n",
+        encoding="utf-8",
+    )
+    missing_lines = analyse_coverage(source, (1, 4, 8), ()).missing_lines
+    assert missing_lines == (5,)
+    assert find_unexecuted_lines(source, missing_lines) == frozenset((5, 6, 7))
+    assert find_unexecuted_lines(source, (4, 8)) == frozenset((4, 8))
+    assert find_statement_lines(source) == {
+        1: 1,
+        2: 1,
+        3: 1,
+        4: 4,
+        5: 5,
+        6: 5,
+        7: 5,
+        8: 8,
+    }
+
+
+def test_find_unexecuted_lines_without_missing_lines() -> None:
+    assert find_unexecuted_lines(TARGETS_DIR / "example1.py", ()) == frozenset()
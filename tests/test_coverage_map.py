@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from python_tool_competition_2024.coverage_analysis import CoverageAnalysis
+from python_tool_competition_2024.coverage_map import (
+    CoverageMap,
+    build_coverage_map,
+    read_coverage_map,
+    write_coverage_map,
+)
+from python_tool_competition_2024.results import RatioResult
+
+from .helpers import TARGETS_DIR
+
+
+def test_build_coverage_map() -> None:
+    coverage_map = build_coverage_map(
+        TARGETS_DIR / "example1.py",
+        {
+            "test_example1.py::test_positive": CoverageAnalysis(
+                line=RatioResult(9, 4),
+                branch=RatioResult(4, 1),
+                missing_lines=(8, 13, 14, 15, 16),
+                missing_branches=((6, 8), (14, 15), (14, 16)),
+            ),
+            "test_example1.py::test_nothing": CoverageAnalysis(
+                line=RatioResult(9, 0),
+                branch=RatioResult(4, 0),
+                missing_lines=(4, 6, 7, 8, 11, 13, 14, 15, 16),
+                missing_branches=((6, 7), (6, 8), (14, 15), (14, 16)),
+            ),
+        },
+    )
+    assert coverage_map.lines == (4, 6, 7, 8, 11, 13, 14, 15, 16)
+    assert coverage_map.branches == ((6, 7), (6, 8), (14, 15), (14, 16))
+    assert coverage_map.tests == {
+        "test_example1.py::test_positive": 0b0001_000010111,
+        "test_example1.py::test_nothing": 0,
+    }
+    assert coverage_map.covered_lines("test_example1.py::test_positive") == (
+        4,
+        6,
+        7,
+        11,
+    )
+    assert coverage_map.covered_branches("test_example1.py::test_positive") == ((6, 7),)
+    assert coverage_map.covered_lines("test_example1.py::test_nothing") == ()
+    assert coverage_map.covered_branches("test_example1.py::test_nothing") == ()
+
+
+def test_select_tests() -> None:
+    coverage_map = CoverageMap(
+        lines=(1, 2, 4),
+        branches=((2, 4), (2, -1)),
+        tests={"test_a": 0b11011, "test_b": 0b10, "test_c": 0b00100},
+    )
+    assert coverage_map.select_tests((1,)) == ("test_a",)
+    assert coverage_map.select_tests((4, 2)) == ("test_a", "test_b", "test_c")
+    assert coverage_map.select_tests((2,)) == ("test_a", "test_b")
+    assert coverage_map.select_tests(()) == ()
+    assert coverage_map.select_tests((3,)) is None
+    assert coverage_map.select_tests((1, 5)) is None
+
+
+def test_write_and_read_coverage_map(tmp_path: Path) -> None:
+    coverage_map = CoverageMap(
+        lines=(1, 2, 4),
+        branches=((2, 4), (2, -1)),
+        tests={"test_a": 0b11011, "test_b": 0, "test_c": 0b00100},
+    )
+    map_file = tmp_path / "coverages" / "example.tests.json"
+    write_coverage_map(coverage_map, map_file)
+    assert tuple(path.name for path in map_file.parent.iterdir()) == (
+        "example.tests.json",
+    )
+    assert read_coverage_map(map_file) == coverage_map
+
+
+def test_write_large_coverage_map(tmp_path: Path) -> None:
+    lines = tuple(range(1, 5001))
+    branches = tuple((line, line + 1) for line in range(1, 2001))
+    elements = len(lines) + len(branches)
+    coverage_map = CoverageMap(
+        lines=lines,
+        branches=branches,
+        tests={
+            f"test_example.py::test_{index}": (1 << (index % elements + 1)) - 1
+            for index in range(0, 20_000, 10)
+        },
+    )
+    map_file = tmp_path / "example.tests.json"
+    write_coverage_map(coverage_map, map_file)
+    # every test needs one bit per line and branch, encoded in base64
+    assert map_file.stat().st_size < 2_000 * (elements / 8 * 4 / 3 + 40) + 100_000
+    assert read_coverage_map(map_file) == coverage_map
+
+
+@pytest.mark.parametrize(
+    "content",
+    (
+        None,
+        "no json",
+        json.dumps({"version": 0, "lines": [], "branches": [], "tests": {}}),
+        json.dumps({"version": 1, "lines": [], "branches": [[1]], "tests": {}}),
+        json.dumps({"version": 1, "lines": [], "branches": [], "tests": {"a": "%"}}),
+        json.dumps({"version": 1, "lines": []}),
+    ),
+)
+def test_read_invalid_coverage_map(tmp_path: Path, content: str | None) -> None:
+    map_file = tmp_path / "example.tests.json"
+    if content is not None:
+        map_file.write_text(content)
+    assert read_coverage_map(map_file) is None
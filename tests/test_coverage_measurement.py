@@ -0,0 +1,430 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from python_tool_competition_2024.coverage_analysis import CoverageAnalysis
+from python_tool_competition_2024.coverage_measurement import (
+    CoverageRun,
+    CoverageTarget,
+    measure_coverage,
+    measure_coverages,
+    measure_parallel_coverages,
+)
+from python_tool_competition_2024.coverage_monitoring import MONITORING_SUPPORTED
+from python_tool_competition_2024.errors import (
+    MeasurementFailedError,
+    MeasurementTimeoutError,
+)
+from python_tool_competition_2024.results import RatioResult
+
+from .helpers import TARGETS_DIR
+
+
+def _measure(
+    tmp_path: Path,
+    body: str,
+    *,
+    timeout: float = 60,
+    monitoring: bool = False,
+    workers: int = 1,
+) -> CoverageRun:
+    test_file = tmp_path / "test_example1.py"
+    test_file.write_text(body)
+    return measure_coverage(
+        TARGETS_DIR / "example1.py",
+        "example1",
+        test_file,
+        python_paths=(TARGETS_DIR,),
+        timeout=timeout,
+        monitoring=monitoring,
+        workers=workers,
+    )
+
+
+@pytest.mark.parametrize("workers", (1, 3))
+@pytest.mark.parametrize("monitoring", (False, True))
+def test_measure_coverage(tmp_path: Path, *, monitoring: bool, workers: int) -> None:
+    run = _measure(
+        tmp_path,
+        """
+from example1 import some_method
+
+def test_positive() -> None:
+    assert some_method(1) == "5"
+
+def test_negative() -> None:
+    assert some_method(-1) == "-4"
+""",
+        monitoring=monitoring,
+        workers=workers,
+    )
+    assert run == CoverageRun(
+        exit_code=0,
+        coverage=CoverageAnalysis(
+            line=RatioResult(9, 5),
+            branch=RatioResult(4, 2),
+            missing_lines=(13, 14, 15, 16),
+            missing_branches=((14, 15), (14, 16)),
+        ),
+    )
+    assert run.passed is True
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+@pytest.mark.parametrize("monitoring", (False, True))
+def test_measure_coverage_of_failing_test(
+    tmp_path: Path, *, monitoring: bool, workers: int
+) -> None:
+    run = _measure(
+        tmp_path,
+        """
+from example1 import other_method
+
+def test_failing() -> None:
+    assert other_method(3) == 4
+""",
+        monitoring=monitoring,
+        workers=workers,
+    )
+    assert run == CoverageRun(
+        exit_code=1,
+        coverage=CoverageAnalysis(
+            line=RatioResult(9, 6),
+            branch=RatioResult(4, 2),
+            missing_lines=(6, 7, 8),
+            missing_branches=((6, 7), (6, 8)),
+        ),
+    )
+    assert run.passed is False
+
+
+@pytest.mark.parametrize("monitoring", (False, True))
+def test_measure_coverage_without_import(tmp_path: Path, *, monitoring: bool) -> None:
+    run = _measure(
+        tmp_path, "def test_nothing() -> None:\n    pass\n", monitoring=monitoring
+    )
+    assert run.exit_code == 0
+    assert run.coverage.line == RatioResult(9, 0)
+    assert run.coverage.branch == RatioResult(4, 0)
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_measure_coverage_without_tests(tmp_path: Path, workers: int) -> None:
+    run = _measure(tmp_path, "import example1\n", workers=workers)
+    assert run.exit_code == pytest.ExitCode.NO_TESTS_COLLECTED
+    assert run.coverage.line == RatioResult(9, 2)
+
+
+def test_measure_coverage_without_workers(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match=r"\AAt least one worker is required, got 0\Z"):
+        _measure(tmp_path, "def test_nothing() -> None:\n    pass\n", workers=0)
+
+
+def test_measure_coverage_timeout(tmp_path: Path) -> None:
+    with pytest.raises(MeasurementTimeoutError) as error_info:
+        _measure(
+            tmp_path,
+            "import time\n\ndef test_slow() -> None:\n    time.sleep(60)\n",
+            timeout=0.5,
+        )
+    assert error_info.value.message == (
+        f"Running the tests of {tmp_path / 'test_example1.py'} took longer than 0.5s"
+    )
+
+
+def test_measure_coverage_crash(tmp_path: Path) -> None:
+    with pytest.raises(MeasurementFailedError) as error_info:
+        _measure(tmp_path, "import os\n\nos._exit(1)\n")
+    assert error_info.value.message == (
+        f"Could not run the tests of {tmp_path / 'test_example1.py'}"
+    )
+
+
+@pytest.mark.parametrize(("split_above", "processes"), ((0, 3), (4, 3), (5, 1)))
+def test_measure_coverage_split_above(
+    tmp_path: Path, split_above: int, processes: int
+) -> None:
+    pids_dir = tmp_path / "pids"
+    pids_dir.mkdir()
+    test_file = tmp_path / "test_example1.py"
+    test_file.write_text(
+        f"""
+import os
+from pathlib import Path
+
+import pytest
+
+from example1 import some_method
+
+@pytest.mark.parametrize("number", range(1, 5))
+def test_positive(number: int) -> None:
+    Path({str(pids_dir)!r}, str(os.getpid())).touch()
+    assert some_method(number)
+"""
+    )
+    run = measure_coverage(
+        TARGETS_DIR / "example1.py",
+        "example1",
+        test_file,
+        python_paths=(TARGETS_DIR,),
+        timeout=60,
+        workers=3,
+        split_above=split_above,
+    )
+    assert run.passed is True
+    assert run.coverage.line == RatioResult(9, 4)
+    # all four cases count, so they are only run by one child with a higher minimum
+    assert len(tuple(pids_dir.iterdir())) == processes
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_measure_coverage_per_test(tmp_path: Path, workers: int) -> None:
+    test_file = tmp_path / "test_example1.py"
+    test_file.write_text(
+        """
+from example1 import some_method
+
+def test_positive() -> None:
+    assert some_method(1) == "5"
+
+class TestNegative:
+    def test_negative(self) -> None:
+        assert some_method(-1) == "-4"
+"""
+    )
+    run = measure_coverage(
+        TARGETS_DIR / "example1.py",
+        "example1",
+        test_file,
+        python_paths=(TARGETS_DIR,),
+        timeout=60,
+        per_test=True,
+        workers=workers,
+    )
+    assert run.coverage.missing_lines == (13, 14, 15, 16)
+    assert run.tests == {
+        "test_example1.py::test_positive": CoverageAnalysis(
+            line=RatioResult(9, 4),
+            branch=RatioResult(4, 1),
+            missing_lines=(8, 13, 14, 15, 16),
+            missing_branches=((6, 8), (14, 15), (14, 16)),
+        ),
+        "test_example1.py::TestNegative::test_negative": CoverageAnalysis(
+            line=RatioResult(9, 4),
+            branch=RatioResult(4, 1),
+            missing_lines=(7, 13, 14, 15, 16),
+            missing_branches=((6, 7), (14, 15), (14, 16)),
+        ),
+    }
+    assert tuple(run.tests) == (
+        "test_example1.py::test_positive",
+        "test_example1.py::TestNegative::test_negative",
+    )
+
+
+def test_measure_coverage_per_test_with_monitoring(tmp_path: Path) -> None:
+    with pytest.raises(
+        ValueError,
+        match=r"\AThe coverages of each test cannot be measured with sys.monitoring\Z",
+    ):
+        measure_coverage(
+            TARGETS_DIR / "example1.py",
+            "example1",
+            tmp_path / "test_example1.py",
+            python_paths=(TARGETS_DIR,),
+            timeout=60,
+            per_test=True,
+            monitoring=True,
+        )
+
+
+@pytest.mark.benchmark()
+@pytest.mark.skipif(not MONITORING_SUPPORTED, reason="requires sys.monitoring")
+def test_monitoring_is_faster_than_tracing(tmp_path: Path) -> None:
+    source = tmp_path / "slow_module.py"
+    source.write_text(
+        """
+def collatz_steps(number):
+    steps = 0
+    while number != 1:
+        if number % 2:
+            number = 3 * number + 1
+        else:
+            number //= 2
+        steps += 1
+    return steps
+"""
+    )
+    test_file = tmp_path / "test_slow_module.py"
+    test_file.write_text(
+        """
+from slow_module import collatz_steps
+
+def test_collatz_steps() -> None:
+    assert sum(collatz_steps(number) for number in range(1, 3_000)) > 0
+"""
+    )
+    durations = {}
+    runs = {}
+    for monitoring in (False, True):
+        start = time.perf_counter()
+        runs[monitoring] = measure_coverage(
+            source,
+            "slow_module",
+            test_file,
+            python_paths=(tmp_path,),
+            timeout=300,
+            monitoring=monitoring,
+        )
+        durations[monitoring] = time.perf_counter() - start
+    assert runs[True] == runs[False]
+    assert runs[True].coverage.line == RatioResult(8, 8)
+    assert runs[True].coverage.branch == RatioResult(4, 4)
+    assert durations[True] < durations[False]
+
+
+@pytest.mark.benchmark()
+def test_split_tests_are_faster(tmp_path: Path) -> None:
+    test_file = tmp_path / "test_example1.py"
+    test_file.write_text(
+        """
+import time
+
+import pytest
+
+from example1 import some_method
+
+@pytest.mark.parametrize("number", range(200))
+def test_waiting(number: int) -> None:
+    time.sleep(0.02)
+    assert some_method(number)
+"""
+    )
+    durations = {}
+    runs = {}
+    for workers in (1, 4):
+        start = time.perf_counter()
+        runs[workers] = measure_coverage(
+            TARGETS_DIR / "example1.py",
+            "example1",
+            test_file,
+            python_paths=(TARGETS_DIR,),
+            timeout=300,
+            workers=workers,
+        )
+        durations[workers] = time.perf_counter() - start
+    assert runs[4] == runs[1]
+    assert runs[4].coverage.line == RatioResult(9, 5)
+    assert durations[4] < durations[1]
+
+
+def test_measure_coverages_like_single_measurements(tmp_path: Path) -> None:
+    tests = {
+        "test_example1.py": (
+            "example1.py",
+            "from example1 import some_method\n\n"
+            "def test_positive() -> None:\n"
+            "    assert some_method(1) == '5'\n",
+        ),
+        "test_example2.py": (
+            "example2.py",
+            "from example2 import my_method\n\n"
+            "def test_failing() -> None:\n"
+            "    assert my_method(2) == 5\n",
+        ),
+        "test_example3.py": (
+            "sub_example/example3.py",
+            "from sub_example.example3 import example\n\n"
+            "def test_example() -> None:\n"
+            "    assert example('a') == 'Got: a!'\n",
+        ),
+        # the package was already imported by the previous test
+        "test_sub_example.py": (
+            "sub_example/__init__.py",
+            "from sub_example import helper\n\n"
+            "def test_helper() -> None:\n"
+            "    assert helper('') is None\n",
+        ),
+        "test_example4.py": ("sub_example/example4.py", "def test_broken(:\n"),
+        "test_nothing.py": ("example1.py", "# no tests\n"),
+    }
+    targets = []
+    for test_name, (source, body) in tests.items():
+        (tmp_path / test_name).write_text(body)
+        targets.append(
+            CoverageTarget(
+                TARGETS_DIR / source,
+                source.removesuffix(".py").removesuffix("/__init__").replace("/", "."),
+                tmp_path / test_name,
+            )
+        )
+    runs = measure_coverages(targets, python_paths=(TARGETS_DIR,), timeout=60)
+    assert tuple(run.exit_code for run in runs) == (0, 1, 0, 0, 2, 5)
+    assert runs == tuple(
+        measure_coverage(
+            target.source,
+            target.module_name,
+            target.test_file,
+            python_paths=(TARGETS_DIR,),
+            timeout=60,
+        )
+        for target in targets
+    )
+
+
+def test_measure_coverages_without_targets() -> None:
+    assert measure_coverages((), python_paths=(), timeout=60) == ()
+
+
+@pytest.mark.parametrize("monitoring", (False, True))
+def test_measure_parallel_coverages_like_single_measurements(
+    tmp_path: Path, *, monitoring: bool
+) -> None:
+    bodies = (
+        "from example1 import some_method\n\n"
+        "def test_positive() -> None:\n"
+        "    assert some_method(1) == '5'\n",
+        "from example1 import other_method\n\n"
+        "def test_failing() -> None:\n"
+        "    assert other_method(3) == 4\n",
+        "def test_broken(:\n",
+    )
+    targets = []
+    for index, body in enumerate(bodies):
+        (tmp_path / str(index)).mkdir()
+        test_file = tmp_path / str(index) / "test_example1.py"
+        test_file.write_text(body)
+        targets.append(
+            CoverageTarget(TARGETS_DIR / "example1.py", "example1", test_file)
+        )
+    python_paths = tuple((TARGETS_DIR, target.test_file.parent) for target in targets)
+    runs = measure_parallel_coverages(
+        targets, python_paths=python_paths, timeout=60, monitoring=monitoring
+    )
+    assert tuple(run.exit_code for run in runs) == (0, 1, 2)
+    assert runs == tuple(
+        measure_coverage(
+            target.source,
+            target.module_name,
+            target.test_file,
+            python_paths=paths,
+            timeout=60,
+            monitoring=monitoring,
+        )
+        for target, paths in zip(targets, python_paths)
+    )
+
+
+def test_measure_parallel_coverages_without_targets() -> None:
+    assert measure_parallel_coverages((), python_paths=(), timeout=60) == ()
+
+
+def test_measure_parallel_coverages_with_missing_python_paths(tmp_path: Path) -> None:
+    target = CoverageTarget(
+        TARGETS_DIR / "example1.py", "example1", tmp_path / "test_example1.py"
+    )
+    with pytest.raises(
+        ValueError, match="^Got the python paths of 0 targets for 1 targets$"
+    ):
+        measure_parallel_coverages((target,), python_paths=(), timeout=60)
@@ -0,0 +1,129 @@
+import dis
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+from python_tool_competition_2024.coverage_analysis import analyse_coverage
+from python_tool_competition_2024.coverage_measurement import measure_coverage
+
+_SOURCE = """
+def check(value):
+    if value > 0 and value < 10:
+        return "small"
+    elif value:
+        return "other"
+    return "zero"
+
+
+def count(values):
+    total = 0
+    for value in values:
+        if value:
+            continue
+        total += 1
+    while total < 3:
+        total += 1
+    return total
+
+
+def parse(value):
+    try:
+        if value:
+            raise ValueError(value)
+    except ValueError:
+        return False
+    finally:
+        value = None
+    return True
+
+
+def collect(value):
+    errors = []
+    try:
+        if value:
+            raise ExceptionGroup("failed", [ValueError(value)])
+    except* ValueError:
+        errors.append(value)
+    return errors
+
+
+def generate(limit):
+    yield from range(limit)
+
+
+class Example:
+    values = [value for value in range(3) if value]
+
+
+def unused():
+    return 1
+"""
+
+_CALLS = """
+for value in (5, 20, -1, 0):
+    check(value)
+count([1, 0, 1])
+parse(1)
+parse(0)
+collect(1)
+collect(0)
+list(generate(2))
+"""
+
+
+# sys.monitoring is only available on Python 3.12 and newer
+if sys.version_info[0:2] >= (3, 12):
+    from python_tool_competition_2024.coverage_monitoring import (
+        ExecutionMonitor,
+        _Instructions,
+    )
+
+    @pytest.mark.parametrize(
+        "calls",
+        (
+            "",
+            _CALLS,
+            "check(5)\ncount([])\nparse(0)\ncollect(0)\n",
+            "check(0)\ncount([0, 0, 0, 0])\nparse(1)\ncollect(1)\nlist(generate(0))\n",
+        ),
+    )
+    def test_execution_monitor_like_tracer(tmp_path: Path, calls: str) -> None:
+        source = tmp_path / "example.py"
+        source.write_text(_SOURCE)
+        test_file = tmp_path / "test_example.py"
+        test_file.write_text(
+            "from example import *\n\n\ndef test_calls() -> None:\n"
+            + "".join(f"    {line}\n" for line in calls.splitlines())
+            + "    pass\n"
+        )
+
+        spec = importlib.util.spec_from_file_location("_monitored_example", source)
+        assert spec is not None
+        assert spec.loader is not None
+        module = importlib.util.module_from_spec(spec)
+        monitor = ExecutionMonitor(source)
+        monitor.start()
+        try:
+            spec.loader.exec_module(module)
+            exec(calls, vars(module).copy())  # noqa: S102
+        finally:
+            monitor.stop()
+
+        traced = measure_coverage(
+            source, "example", test_file, python_paths=(tmp_path,), timeout=60
+        )
+        assert traced.passed
+        assert analyse_coverage(source, monitor.lines, monitor.arcs) == traced.coverage
+
+    def test_instructions_without_next_line() -> None:
+        module = compile("def spin():\n    while True: pass\n", "spin.py", "exec")
+        code = next(const for const in module.co_consts if hasattr(const, "co_code"))
+        offset = next(
+            instruction.offset
+            for instruction in dis.get_instructions(code)
+            if instruction.positions is not None and instruction.positions.lineno == 2
+        )
+        # the line loops to itself forever, so no other line runs after it
+        assert tuple(_Instructions(code).straight_arcs({offset: 2})) == ()
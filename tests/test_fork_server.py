@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import dataclasses
+import subprocess  # nosec B404
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from python_tool_competition_2024 import target_importer
+from python_tool_competition_2024.coverage_analysis import find_statement_lines
+from python_tool_competition_2024.coverage_map import CoverageMap
+from python_tool_competition_2024.errors import MeasurementFailedError
+from python_tool_competition_2024.fork_client import main
+from python_tool_competition_2024.fork_server import _TestSelection, serve_tests
+from python_tool_competition_2024.target_importer import import_target
+
+_TARGET = """
+def add(a: int, b: int) -> int:
+    return a + b
+"""
+
+
+_SELECTION_TEST = """
+from example import add
+
+def test_add():
+    assert add(1, 2) == 3
+
+def test_positive():
+    assert add(1, 1) > 0
+"""
+
+# the map claims that `test_add` does not execute the return statement
+_COVERAGE_MAP = CoverageMap(
+    lines=(2, 3),
+    branches=(),
+    tests={"test_example.py::test_add": 0b01, "test_example.py::test_positive": 0b11},
+)
+
+
+@contextmanager
+def _serve(
+    tmp_path: Path, body: str, coverage_map: CoverageMap | None = None
+) -> Iterator[tuple[str, ...]]:
+    targets_dir = tmp_path / "targets"
+    targets_dir.mkdir()
+    (targets_dir / "example.py").write_text(_TARGET)
+    test_file = tmp_path / "test_example.py"
+    test_file.write_text(body)
+    with serve_tests(
+        test_file,
+        python_paths=(targets_dir,),
+        pycache_prefix=tmp_path / "pycache",
+        working_dir=tmp_path,
+        source=targets_dir / "example.py",
+        coverage_map=coverage_map,
+    ) as command:
+        yield command
+
+
+def test_serve_tests(tmp_path: Path) -> None:
+    with _serve(
+        tmp_path,
+        "from example import add\n\ndef test_add():\n    assert add(1, 2) == 3\n",
+    ) as command:
+        assert command[:-1] == (
+            sys.executable,
+            "-I",
+            "-S",
+            str(Path(main.__code__.co_filename)),
+        )
+        assert subprocess.run(command, check=False).returncode == 0  # noqa: S603
+        # every child imports the current version of the target
+        target = tmp_path / "targets" / "example.py"
+        target.write_text(_TARGET.replace("a + b", "a - b"))
+        assert main(command[-1:]) == pytest.ExitCode.TESTS_FAILED
+        target.write_text(_TARGET)
+        assert main(command[-1:]) == pytest.ExitCode.OK
+
+
+def test_serve_tests_with_imported_target(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(sys, "meta_path", list(sys.meta_path))
+    monkeypatch.setattr(target_importer, "_finders", {})
+    targets_dir = tmp_path / "targets"
+    targets_dir.mkdir()
+    target = targets_dir / "example.py"
+    target.write_text(_TARGET)
+    test_file = tmp_path / "test_example.py"
+    test_file.write_text(
+        "from example import add\n\ndef test_add():\n    assert add(1, 2) == 3\n"
+    )
+    with mock.patch.dict(sys.modules):
+        # e.g. a generator imported the target in the competition process
+        import_target(targets_dir, "example")
+        with serve_tests(
+            test_file,
+            python_paths=(targets_dir,),
+            pycache_prefix=tmp_path / "pycache",
+            working_dir=tmp_path,
+        ) as command:
+            target.write_text(_TARGET.replace("a + b", "a - b"))
+            assert main(command[-1:]) == pytest.ExitCode.TESTS_FAILED
+
+
+def test_serve_tests_with_coverage_map(tmp_path: Path) -> None:
+    with _serve(tmp_path, _SELECTION_TEST, _COVERAGE_MAP) as command:
+        assert main(command[-1:]) == pytest.ExitCode.OK
+        target = tmp_path / "targets" / "example.py"
+        # only `test_positive` runs against the changed return statement
+        target.write_text(_TARGET.replace("a + b", "a * b"))
+        assert main(command[-1:]) == pytest.ExitCode.OK
+        # all tests run if the lines cannot be mapped to the original ones
+        target.write_text(_TARGET.replace("a + b", "a * b") + "\n")
+        assert main(command[-1:]) == pytest.ExitCode.TESTS_FAILED
+
+
+def test_select_tests(tmp_path: Path) -> None:
+    source = tmp_path / "example.py"
+    source.write_text(_TARGET)
+    selection = _TestSelection(
+        source,
+        tuple(source.read_bytes().splitlines()),
+        find_statement_lines(source),
+        _COVERAGE_MAP,
+    )
+    assert selection.select_tests() is None
+    source.write_text(_TARGET.replace("a + b", "a * b"))
+    assert selection.select_tests() == ("test_example.py::test_positive",)
+    source.write_text(_TARGET.replace("int:", "float:"))
+    assert selection.select_tests() == (
+        "test_example.py::test_add",
+        "test_example.py::test_positive",
+    )
+    source.write_text("# changed" + _TARGET)
+    assert selection.select_tests() is None
+    source.write_text(_TARGET + "\n")
+    assert selection.select_tests() is None
+    selection = dataclasses.replace(
+        selection, coverage_map=CoverageMap(lines=(2,), branches=(), tests={})
+    )
+    source.write_text(_TARGET.replace("a + b", "a * b"))
+    assert selection.select_tests() is None
+
+
+def test_serve_tests_with_client_timeout(tmp_path: Path) -> None:
+    with _serve(
+        tmp_path,
+        "import time\nfrom pathlib import Path\n\n"
+        "def test_slow():\n"
+        "    if Path('slow').exists():\n"
+        "        time.sleep(60)\n",
+    ) as command:
+        (tmp_path / "slow").touch()
+        with pytest.raises(subprocess.TimeoutExpired):
+            subprocess.run(command, check=False, timeout=1)  # noqa: S603
+        (tmp_path / "slow").unlink()
+        # the server killed the slow child and answers the next client
+        start = time.monotonic()
+        assert main(command[-1:]) == pytest.ExitCode.OK
+        assert time.monotonic() - start < 30
+
+
+def test_serve_tests_with_stopped_server(tmp_path: Path) -> None:
+    with pytest.raises(MeasurementFailedError) as error_info:
+        _use_stopped_server(tmp_path)
+    assert (
+        str(error_info.value)
+        == f"Could not run the tests of {tmp_path / 'test_example.py'}"
+    )
+
+
+def _use_stopped_server(tmp_path: Path) -> None:
+    with _serve(
+        tmp_path, "import os\nimport time\n\ntime.sleep(0.5)\nos._exit(0)\n"
+    ) as command:
+        # the server stops while it imports the test
+        assert main(command[-1:]) == 3
+        # its socket is closed before the process exited
+        time.sleep(1)
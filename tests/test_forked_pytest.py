@@ -0,0 +1,77 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from python_tool_competition_2024.errors import (
+    MeasurementFailedError,
+    MeasurementTimeoutError,
+)
+from python_tool_competition_2024.forked_pytest import (
+    get_test_args,
+    run_in_children,
+    stop_fork_server,
+)
+
+
+def _get_parent_pid(_: object) -> int:
+    return os.getppid()
+
+
+def test_run_in_children_outside_of_the_main_thread(tmp_path: Path) -> None:
+    assert run_in_children(_get_parent_pid, (None,), tmp_path, 60) == (os.getpid(),)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        parent_pids = executor.submit(
+            run_in_children, _get_parent_pid, (None, None), tmp_path, 60
+        ).result()
+    # the children are forked by a separate server process
+    assert len(parent_pids) == 2
+    assert os.getpid() not in parent_pids
+
+
+def _get_working_dir(_: object) -> Path:
+    return Path.cwd()
+
+
+def _sleep(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def _exit(exit_code: int) -> None:
+    os._exit(exit_code)
+
+
+def _run_in_thread(*args: object) -> tuple[object, ...]:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run_in_children, *args).result()  # type: ignore[arg-type]
+
+
+def test_run_in_children_of_the_fork_server(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    stop_fork_server()
+    stop_fork_server()
+    # the server is started again after it stopped
+    parent_pids = _run_in_thread(_get_parent_pid, (None,), tmp_path, 60)
+    assert os.getpid() not in parent_pids
+    # the children run in the working directory of the caller
+    monkeypatch.chdir(tmp_path)
+    assert _run_in_thread(_get_working_dir, (None,), tmp_path, 60) == (tmp_path,)
+    with pytest.raises(MeasurementFailedError):
+        _run_in_thread(_exit, (1,), tmp_path, 60)
+    start = time.monotonic()
+    with pytest.raises(MeasurementTimeoutError):
+        _run_in_thread(_sleep, (60, 60), tmp_path, 0.5)
+    assert time.monotonic() - start < 30
+
+
+def test_get_test_args(tmp_path: Path) -> None:
+    test_file = tmp_path / "test_example.py"
+    assert get_test_args(test_file, None) == (str(test_file),)
+    assert get_test_args(test_file, ()) == ()
+    assert get_test_args(
+        test_file,
+        ("test_example.py::test_a", "tests/test_example.py::TestClass::test_b[1-x::y]"),
+    ) == (f"{test_file}::test_a", f"{test_file}::TestClass::test_b[1-x::y]")
@@ -1,4 +1,10 @@
-from python_tool_competition_2024.generation_results import FailureReason
+import pytest
+
+from python_tool_competition_2024.errors import NoCandidatesError
+from python_tool_competition_2024.generation_results import (
+    FailureReason,
+    TestGenerationCandidates,
+)
 
 
 def test_failure_reason_order() -> None:
@@ -12,3 +18,10 @@ def test_failure_reason_order() -> None:
         FailureReason.UNEXPECTED_ERROR,
         FailureReason.UNSUPPORTED_FEATURE_USED,
     )
+
+
+def test_candidates_without_bodies() -> None:
+    with pytest.raises(
+        NoCandidatesError, match=r"\AAt least one candidate test must be generated\.\Z"
+    ):
+        TestGenerationCandidates(())
@@ -0,0 +1,114 @@
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from python_tool_competition_2024.generator_store import (
+    GeneratorStore,
+    get_generator_store,
+)
+
+from .helpers import get_test_config
+
+
+def test_get_set_and_delete(tmp_path: Path) -> None:
+    store = GeneratorStore(tmp_path / "store" / "db.sqlite3", "gen")
+    assert store.get("key") is None
+    assert not (tmp_path / "store").exists()
+
+    store.set("key", b"value")
+    assert store.get("key") == b"value"
+    store.set("key", b"other")
+    assert store.get("key") == b"other"
+
+    store.delete("key")
+    assert store.get("key") is None
+    store.delete("key")
+
+
+def test_namespaces_are_separated(tmp_path: Path) -> None:
+    first = GeneratorStore(tmp_path / "db.sqlite3", "first")
+    second = GeneratorStore(tmp_path / "db.sqlite3", "second")
+    first.set("key", b"first")
+    second.set("key", b"second")
+    assert first.get("key") == b"first"
+    assert second.get("key") == b"second"
+    first.delete("key")
+    assert first.get("key") is None
+    assert second.get("key") == b"second"
+
+
+def test_values_are_kept_between_instances(tmp_path: Path) -> None:
+    GeneratorStore(tmp_path / "db.sqlite3", "gen").set("key", b"value")
+    assert GeneratorStore(tmp_path / "db.sqlite3", "gen").get("key") == b"value"
+
+
+def test_least_recently_used_are_evicted(tmp_path: Path) -> None:
+    # every entry has a size of 5 bytes
+    store = GeneratorStore(tmp_path / "db.sqlite3", "gen", max_size=15)
+    other = GeneratorStore(tmp_path / "db.sqlite3", "other", max_size=15)
+    store.set("a", b"1234")
+    store.set("b", b"1234")
+    store.set("c", b"1234")
+    other.set("x", b"1234")
+    assert store.get("a") == b"1234"
+
+    store.set("d", b"1234")
+    assert store.get("b") is None
+    assert store.get("a") == b"1234"
+    assert store.get("c") == b"1234"
+    assert store.get("d") == b"1234"
+    assert other.get("x") == b"1234"
+
+    store.set("e", b"too large for the store")
+    assert store.get("e") is None
+    assert store.get("a") == b"1234"
+
+
+def test_failed_transaction_is_rolled_back(tmp_path: Path) -> None:
+    store = GeneratorStore(tmp_path / "db.sqlite3", "gen")
+
+    def insert_and_fail() -> None:
+        with store._transaction() as connection:
+            connection.execute("INSERT INTO entries VALUES ('gen', 'key', '', 0, 0)")
+            raise KeyError
+
+    with pytest.raises(KeyError):
+        insert_and_fail()
+    assert store.get("key") is None
+
+
+def _set_values(path: Path, worker: int) -> None:
+    store = GeneratorStore(path, "gen")
+    for i in range(20):
+        store.set(f"{worker}-{i}", str(i).encode())
+        assert store.get(f"{worker}-{i}") == str(i).encode()
+
+
+def test_concurrent_access(tmp_path: Path) -> None:
+    path = tmp_path / "db.sqlite3"
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_set_values, args=(path, worker)) for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    _set_values(path, 4)
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    store = GeneratorStore(path, "gen")
+    for worker in range(5):
+        for i in range(20):
+            assert store.get(f"{worker}-{i}") == str(i).encode()
+
+
+def test_get_generator_store(tmp_path: Path) -> None:
+    config = get_test_config(
+        show_commands=False, show_failures=False, root_dir=tmp_path
+    )
+    store = get_generator_store(config)
+    store.set("key", b"value")
+    assert (tmp_path / "results" / ".cache" / "generator_store.sqlite3").exists()
+    assert get_generator_store(config).get("key") == b"value"
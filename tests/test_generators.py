@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+import ast
 import inspect
 from pathlib import Path
 from types import ModuleType
+from unittest import mock
 
 from python_tool_competition_2024.calculation.generation_results_calculator import (
     _target_to_file_info,
+    write_generated_test,
 )
+from python_tool_competition_2024.generation_results import TestGenerationSuccess
+from python_tool_competition_2024.previous_results import (
+    PreviousResult,
+    keep_previous_results,
+)
+from python_tool_competition_2024.reporters.csv_reporter import report_csv
+from python_tool_competition_2024.results import RatioResult, get_result, get_results
 from python_tool_competition_2024.target_finder import find_targets
 
 from .helpers import TARGETS_DIR, get_test_config
@@ -44,3 +54,119 @@ def test_import_module() -> None:
 
 def _get_public_attr_names(module: ModuleType) -> frozenset[str]:
     return frozenset(name for name in dir(module) if not name.startswith("_"))
+
+
+def test_cached_source_properties() -> None:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=Path.cwd(),
+        targets_dir=TARGETS_DIR,
+    )
+    target = find_targets(config)[0]
+    file_info = _target_to_file_info(target, config)
+
+    with mock.patch.object(
+        Path, "read_bytes", autospec=True, side_effect=Path.read_bytes
+    ) as read_mock:
+        assert file_info.source == (TARGETS_DIR / "example1.py").read_text()
+        assert file_info.source is file_info.source
+        assert file_info.syntax_tree is file_info.syntax_tree
+        assert isinstance(file_info.syntax_tree, ast.Module)
+        assert file_info.functions is file_info.functions
+        assert file_info.classes is file_info.classes
+    read_mock.assert_called_once_with(TARGETS_DIR / "example1.py")
+
+    assert tuple((f.name, f.signature) for f in file_info.functions) == (
+        ("some_method", "(number: int) -> str"),
+        ("other_method", "(number: int) -> int"),
+    )
+    assert file_info.classes == ()
+    assert file_info.module is file_info.import_module()
+    assert file_info.module.__name__ == "example1"
+
+
+def test_metadata(tmp_path: Path) -> None:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+    file_info = _target_to_file_info(find_targets(config)[0], config)
+    assert file_info.metadata is file_info.metadata
+    assert file_info.metadata.functions == file_info.functions
+    assert file_info.metadata.lines_of_code == 12
+    assert file_info.metadata.complexity == 3
+
+
+def test_evaluate_draft(tmp_path: Path) -> None:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+    file_info = _target_to_file_info(find_targets(config)[0], config)
+    run = file_info.evaluate_draft(
+        "from example1 import some_method\n"
+        "\n"
+        "\n"
+        "def test_positive() -> None:\n"
+        '    assert some_method(1) == "5"\n'
+    )
+    assert run.passed is True
+    assert run.coverage.line == RatioResult(9, 4)
+    assert run.coverage.branch == RatioResult(4, 1)
+    assert run.coverage.missing_lines == (8, 13, 14, 15, 16)
+
+
+def test_previous_result(tmp_path: Path) -> None:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+    target = find_targets(config)[0]
+    assert _target_to_file_info(target, config).previous_result is None
+
+    write_generated_test(target, "def test_previous(): pass\n")
+    report_csv(
+        get_results(
+            (
+                get_result(
+                    target=target,
+                    generation_result=TestGenerationSuccess("unused"),
+                    line_coverage=RatioResult(9, 4),
+                    branch_coverage=RatioResult(4, 1),
+                    mutation_analysis=RatioResult(36, 18),
+                ),
+            )
+        ),
+        config,
+    )
+    keep_previous_results(config)
+    file_info = _target_to_file_info(target, config)
+    assert file_info.previous_result is file_info.previous_result
+    assert file_info.previous_result == PreviousResult(
+        test="def test_previous(): pass\n",
+        line_coverage=RatioResult(9, 4),
+        branch_coverage=RatioResult(4, 1),
+        mutation_analysis=RatioResult(36, 18),
+    )
+
+
+def test_store(tmp_path: Path) -> None:
+    config = get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+    first, second = (
+        _target_to_file_info(target, config) for target in find_targets(config)[:2]
+    )
+    assert first.store is first.store
+    first.store.set("shared", b"value")
+    assert second.store.get("shared") == b"value"
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import marshal
+import time
+from pathlib import Path
+
+import pytest
+
+from python_tool_competition_2024.coverage_map import CoverageMap
+from python_tool_competition_2024.mutation_testing import (
+    Mutant,
+    MutationRun,
+    generate_mutants,
+    run_mutants,
+)
+
+from .helpers import TARGETS_DIR
+
+_SOURCE = '''
+def check(items: list[int], flag: bool = True) -> float:
+    """Loop over the items."""
+    for item in items:
+        if not flag and item is None:
+            break
+        if -item in items or item != 2:
+            continue
+    return 1.5 ** 2
+'''
+
+
+_MATCH_SOURCE = """
+def describe(value: object) -> int:
+    match value:
+        case -1:
+            return 1
+        case [2, *_]:
+            return 2
+    total = 3
+    total += not value
+    return total
+"""
+
+_MATCH_TEST = """
+from example import describe
+
+def test_describe() -> None:
+    assert describe(-1) == 1
+    assert describe([2]) == 2
+    assert describe(4) == 3
+"""
+
+
+def _run(
+    tmp_path: Path,
+    body: str,
+    *,
+    timeout: float = 60,
+    schemata: bool = False,
+    coverage_map: CoverageMap | None = None,
+) -> tuple[tuple[Mutant, ...], MutationRun]:
+    mutants = generate_mutants(TARGETS_DIR / "example1.py", schemata=schemata)
+    test_file = tmp_path / "test_example1.py"
+    test_file.write_text(body)
+    return mutants, run_mutants(
+        TARGETS_DIR / "example1.py",
+        "example1",
+        test_file,
+        mutants,
+        python_paths=(TARGETS_DIR,),
+        timeout=timeout,
+        coverage_map=coverage_map,
+    )
+
+
+@pytest.mark.parametrize("schemata", (False, True))
+def test_generate_mutants(*, schemata: bool) -> None:
+    mutants = generate_mutants(TARGETS_DIR / "example1.py", schemata=schemata)
+    assert tuple(mutant.identifier for mutant in mutants) == (
+        tuple(range(8)) if schemata else (None,) * 8
+    )
+    assert len({mutant.code for mutant in mutants}) == (1 if schemata else 8)
+    assert tuple((mutant.operator, mutant.line) for mutant in mutants) == (
+        ("replace Gt with GtE", 6),
+        ("replace 0 with 1", 6),
+        ("replace Mult with Div", 7),
+        ("replace 5 with 6", 7),
+        ("replace Sub with Add", 8),
+        ("replace 3 with 4", 8),
+        ("replace 0 with 1", 13),
+        ("replace Add with Sub", 15),
+    )
+
+
+@pytest.mark.parametrize("schemata", (False, True))
+def test_generate_mutants_of_all_operators(tmp_path: Path, *, schemata: bool) -> None:
+    source = tmp_path / "example.py"
+    source.write_text(_SOURCE)
+    assert tuple(
+        (mutant.operator, mutant.line)
+        for mutant in generate_mutants(source, schemata=schemata)
+    ) == (
+        ("replace True with False", 2),
+        ("replace And with Or", 5),
+        ("remove Not", 5),
+        ("replace Is with IsNot", 5),
+        ("replace Break with Continue", 6),
+        ("replace Or with And", 7),
+        ("replace USub with UAdd", 7),
+        ("replace In with NotIn", 7),
+        ("replace NotEq with Eq", 7),
+        ("replace 2 with 3", 7),
+        ("replace Continue with Break", 8),
+        ("replace 1.5 with 2.5", 9),
+        ("replace Pow with Mult", 9),
+        ("replace 2 with 3", 9),
+    )
+
+
+@pytest.mark.parametrize("schemata", (False, True))
+def test_run_mutants(tmp_path: Path, *, schemata: bool) -> None:
+    mutants, run = _run(
+        tmp_path,
+        """
+from example1 import some_method
+
+def test_positive() -> None:
+    assert some_method(1) == "5"
+""",
+        schemata=schemata,
+    )
+    assert len(mutants) == len(run.killed)
+    assert run == MutationRun(
+        exit_code=0, killed=(False, True, True, True, False, False, False, False)
+    )
+    assert run.passed
+
+
+@pytest.mark.parametrize("schemata", (False, True))
+def test_run_mutants_with_failing_test(tmp_path: Path, *, schemata: bool) -> None:
+    _, run = _run(
+        tmp_path,
+        """
+from example1 import some_method
+
+def test_wrong() -> None:
+    assert some_method(1) == "6"
+""",
+        schemata=schemata,
+    )
+    assert run == MutationRun(exit_code=1, killed=(False,) * 8)
+    assert not run.passed
+
+
+@pytest.mark.parametrize("schemata", (False, True))
+def test_run_mutants_killed_by_crashes_and_timeouts(
+    tmp_path: Path, *, schemata: bool
+) -> None:
+    _, run = _run(
+        tmp_path,
+        """
+import os
+import time
+
+from example1 import other_method, some_method
+
+def test_crash() -> None:
+    if some_method(1) != "5":
+        os._exit(3)
+
+def test_timeout() -> None:
+    if other_method(3) != 3:
+        time.sleep(10)
+""",
+        timeout=2,
+        schemata=schemata,
+    )
+    assert run == MutationRun(
+        exit_code=0, killed=(False, True, True, True, False, False, True, True)
+    )
+
+
+@pytest.mark.parametrize("schemata", (False, True))
+def test_run_mutants_with_coverage_map(tmp_path: Path, *, schemata: bool) -> None:
+    body = """
+from example1 import other_method, some_method
+
+def test_positive() -> None:
+    assert some_method(1) == "5"
+
+def test_negative() -> None:
+    assert some_method(-1) == "-4"
+
+def test_other() -> None:
+    assert other_method(3) == 3
+"""
+    _, run = _run(tmp_path, body, schemata=schemata)
+    assert run == MutationRun(exit_code=0, killed=(False,) + (True,) * 7)
+    # the map claims that `test_negative` does not execute any line
+    coverage_map = CoverageMap(
+        lines=(4, 6, 7, 8, 11, 13, 14, 15, 16),
+        branches=(),
+        tests={
+            "test_example1.py::test_positive": 0b000010111,
+            "test_example1.py::test_negative": 0,
+            "test_example1.py::test_other": 0b111110001,
+        },
+    )
+    _, run = _run(tmp_path, body, schemata=schemata, coverage_map=coverage_map)
+    assert run == MutationRun(
+        exit_code=0, killed=(False, True, True, True, False, False, True, True)
+    )
+
+
+def test_run_mutants_of_package(tmp_path: Path) -> None:
+    source = TARGETS_DIR / "sub_example" / "__init__.py"
+    mutants = generate_mutants(source)
+    assert tuple((mutant.operator, mutant.line) for mutant in mutants) == (
+        ("replace Add with Sub", 9),
+    )
+    test_file = tmp_path / "test_sub_example.py"
+    test_file.write_text(
+        """
+from sub_example import helper
+from sub_example.example3 import *
+
+def test_helper() -> None:
+    assert helper("") is None
+"""
+    )
+    assert run_mutants(
+        source,
+        "sub_example",
+        test_file,
+        mutants,
+        python_paths=(TARGETS_DIR,),
+        timeout=60,
+    ) == MutationRun(exit_code=0, killed=(False,))
+
+
+def test_run_mutants_does_not_change_the_source(tmp_path: Path) -> None:
+    source = TARGETS_DIR / "example1.py"
+    content = source.read_bytes()
+    _run(tmp_path, "from example1 import some_method\n\ndef test_a(): pass\n")
+    assert source.read_bytes() == content
+
+
+def test_generate_mutants_in_patterns(tmp_path: Path) -> None:
+    source = tmp_path / "example.py"
+    source.write_text(_MATCH_SOURCE)
+    expected = (
+        ("replace 1 with 2", 4),
+        ("replace 1 with 2", 5),
+        ("replace 2 with 3", 6),
+        ("replace 2 with 3", 7),
+        ("replace 3 with 4", 8),
+        ("replace Add with Sub", 9),
+        ("remove Not", 9),
+    )
+    mutants = generate_mutants(source)
+    assert tuple((mutant.operator, mutant.line) for mutant in mutants) == expected
+    schema_mutants = generate_mutants(source, schemata=True)
+    assert (
+        tuple((mutant.operator, mutant.line) for mutant in schema_mutants) == expected
+    )
+    # `case +1:` cannot be compiled and the constants in patterns cannot switch
+    assert tuple(mutant.identifier for mutant in schema_mutants) == (
+        None,
+        2,
+        None,
+        4,
+        5,
+        6,
+        7,
+    )
+
+
+@pytest.mark.parametrize("schemata", (False, True))
+def test_run_mutants_in_patterns(tmp_path: Path, *, schemata: bool) -> None:
+    source = tmp_path / "example.py"
+    source.write_text(_MATCH_SOURCE)
+    test_file = tmp_path / "test_example.py"
+    test_file.write_text(_MATCH_TEST)
+    mutants = generate_mutants(source, schemata=schemata)
+    assert run_mutants(
+        source, "example", test_file, mutants, python_paths=(tmp_path,), timeout=60
+    ) == MutationRun(exit_code=0, killed=(True, True, True, True, True, False, True))
+
+
+_OPERATORS_SOURCE = """
+def combine(a: int, b: int, items: list[int]) -> object:
+    if not a in items and b not in items:
+        return (a or b) and -a
+    if 0 < a <= b:
+        return a - b * 2
+    return a is b or not b
+"""
+
+_OPERATORS_TEST = """
+from example import combine
+
+def test_combine() -> None:
+    assert combine(1, 2, [3]) == -1
+    assert combine(0, 0, [3]) == 0
+    assert combine(1, 2, [1]) == -3
+    assert combine(2, 1, [1, 2]) is False
+"""
+
+
+def test_run_mutants_of_schema_operators(tmp_path: Path) -> None:
+    source = tmp_path / "example.py"
+    source.write_text(_OPERATORS_SOURCE)
+    test_file = tmp_path / "test_example.py"
+    test_file.write_text(_OPERATORS_TEST)
+    runs = tuple(
+        run_mutants(
+            source,
+            "example",
+            test_file,
+            generate_mutants(source, schemata=schemata),
+            python_paths=(tmp_path,),
+            timeout=60,
+        )
+        for schemata in (False, True)
+    )
+    assert runs[0].passed
+    assert runs[0] == runs[1]
+
+
+def test_generate_schema_of_long_operator_chain(tmp_path: Path) -> None:
+    source = tmp_path / "example.py"
+    source.write_text(
+        "def chain(a, b):\n"
+        f"    return {' + '.join('a' * 50)} < b and not not not a or -a\n"
+    )
+    start = time.monotonic()
+    mutants = generate_mutants(source, schemata=True)
+    assert time.monotonic() - start < 5
+    assert len(mutants) == 56
+    assert {mutant.identifier for mutant in mutants} == set(range(56))
+    # the operands are not copied for every operator around them
+    assert len(marshal.dumps(mutants[0].code)) < 20_000
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from python_tool_competition_2024.config import Config
+from python_tool_competition_2024.previous_results import (
+    PreviousResult,
+    get_previous_result,
+    keep_previous_results,
+)
+from python_tool_competition_2024.results import RatioResult
+
+from .helpers import TARGETS_DIR, get_test_config
+
+_STATISTICS = """\
+target,successful ratio,files,successful files,line coverage,lines,covered lines,\
+branch coverage,branches,covered branches,mutation score,mutants,killed mutants
+example1.py,1.0,1,1,0.5,9,4,0.25,4,1,0.5,36,18
+example2.py,0.0,1,0,0.0,2,0,1.0,0,0,0.0,13,0
+total,0.5,2,1,0.36363636363636365,11,4,0.25,4,1,0.36734693877551017,49,18
+"""
+
+
+def _get_config(tmp_path: Path) -> Config:
+    return get_test_config(
+        show_commands=False,
+        show_failures=False,
+        root_dir=tmp_path,
+        targets_dir=TARGETS_DIR,
+    )
+
+
+def _write_results(config: Config) -> None:
+    config.tests_dir.mkdir(parents=True)
+    (config.tests_dir / "test_example1.py").write_text("def test_example1(): pass\n")
+    config.csv_file.write_text(_STATISTICS)
+
+
+def test_keep_previous_results(tmp_path: Path) -> None:
+    config = _get_config(tmp_path)
+    previous_dir = config.cache_dir / "previous_results" / "dummy"
+
+    keep_previous_results(config)
+    assert not previous_dir.exists()
+
+    _write_results(config)
+    keep_previous_results(config)
+    assert not config.results_dir.exists()
+    assert (previous_dir / "statistics.csv").read_text() == _STATISTICS
+
+    config.results_dir.mkdir()
+    keep_previous_results(config)
+    assert not config.results_dir.exists()
+    assert tuple(previous_dir.iterdir()) == ()
+
+
+def test_get_previous_result(tmp_path: Path) -> None:
+    config = _get_config(tmp_path)
+    _write_results(config)
+    keep_previous_results(config)
+    assert get_previous_result(TARGETS_DIR / "example1.py", config) == PreviousResult(
+        test="def test_example1(): pass\n",
+        line_coverage=RatioResult(9, 4),
+        branch_coverage=RatioResult(4, 1),
+        mutation_analysis=RatioResult(36, 18),
+    )
+    assert get_previous_result(TARGETS_DIR / "example2.py", config) == PreviousResult(
+        test=None,
+        line_coverage=RatioResult(2, 0),
+        branch_coverage=RatioResult(0, 0),
+        mutation_analysis=RatioResult(13, 0),
+    )
+    assert (
+        get_previous_result(TARGETS_DIR / "sub_example" / "example3.py", config) is None
+    )
+
+
+def test_get_previous_result_without_previous_run(tmp_path: Path) -> None:
+    config = _get_config(tmp_path)
+    assert get_previous_result(TARGETS_DIR / "example1.py", config) is None
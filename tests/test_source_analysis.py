@@ -0,0 +1,101 @@
+import ast
+
+from python_tool_competition_2024.source_analysis import (
+    ClassInfo,
+    FunctionInfo,
+    ParameterInfo,
+    ParameterKind,
+    find_classes,
+    find_functions,
+)
+
+_SOURCE = """
+import os
+
+def simple(): pass
+
+async def complex_args(a, /, b: int, c: str = "x", *args: int, d, e=1, **kwargs):
+    pass
+
+class Example(Base, metaclass=Meta):
+    value = 1
+
+    def method(self, other: "Example") -> bool:
+        return self is other
+
+    class Nested:
+        pass
+
+def _private(*, key: bytes = b"") -> None: pass
+"""
+
+
+def test_find_functions() -> None:
+    tree = ast.parse(_SOURCE)
+    assert find_functions(tree) == (
+        FunctionInfo(
+            name="simple",
+            lineno=4,
+            signature="()",
+            parameters=(),
+            return_annotation=None,
+            is_async=False,
+        ),
+        FunctionInfo(
+            name="complex_args",
+            lineno=6,
+            signature=("(a, /, b: int, c: str='x', *args: int, d, e=1, **kwargs)"),
+            parameters=(
+                ParameterInfo("a", ParameterKind.POSITIONAL_ONLY, None, None),
+                ParameterInfo("b", ParameterKind.POSITIONAL_OR_KEYWORD, "int", None),
+                ParameterInfo("c", ParameterKind.POSITIONAL_OR_KEYWORD, "str", "'x'"),
+                ParameterInfo("args", ParameterKind.VAR_POSITIONAL, "int", None),
+                ParameterInfo("d", ParameterKind.KEYWORD_ONLY, None, None),
+                ParameterInfo("e", ParameterKind.KEYWORD_ONLY, None, "1"),
+                ParameterInfo("kwargs", ParameterKind.VAR_KEYWORD, None, None),
+            ),
+            return_annotation=None,
+            is_async=True,
+        ),
+        FunctionInfo(
+            name="_private",
+            lineno=18,
+            signature="(*, key: bytes=b'') -> None",
+            parameters=(
+                ParameterInfo("key", ParameterKind.KEYWORD_ONLY, "bytes", "b''"),
+            ),
+            return_annotation="None",
+            is_async=False,
+        ),
+    )
+
+
+def test_find_classes() -> None:
+    tree = ast.parse(_SOURCE)
+    assert find_classes(tree) == (
+        ClassInfo(
+            name="Example",
+            lineno=9,
+            bases=("Base",),
+            methods=(
+                FunctionInfo(
+                    name="method",
+                    lineno=12,
+                    signature="(self, other: 'Example') -> bool",
+                    parameters=(
+                        ParameterInfo(
+                            "self", ParameterKind.POSITIONAL_OR_KEYWORD, None, None
+                        ),
+                        ParameterInfo(
+                            "other",
+                            ParameterKind.POSITIONAL_OR_KEYWORD,
+                            "'Example'",
+                            None,
+                        ),
+                    ),
+                    return_annotation="bool",
+                    is_async=False,
+                ),
+            ),
+        ),
+    )
@@ -0,0 +1,90 @@
+import sys
+from collections import Counter
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from python_tool_competition_2024 import target_importer
+from python_tool_competition_2024.target_importer import import_target
+
+
+@pytest.fixture()
+def targets_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    monkeypatch.setattr(sys, "meta_path", list(sys.meta_path))
+    monkeypatch.setattr(target_importer, "_finders", {})
+    monkeypatch.setattr(target_importer, "_finder_users", Counter())
+    targets_dir = tmp_path / "targets"
+    (targets_dir / "importer_pkg").mkdir(parents=True)
+    (targets_dir / "importer_pkg" / "__init__.py").write_text("")
+    (targets_dir / "importer_pkg" / "sub.py").write_text(
+        "import time\n"
+        "from pathlib import Path\n"
+        "time.sleep(0.1)\n"
+        f"with Path({str(tmp_path / 'imports.log')!r}).open('a') as f:\n"
+        "    f.write('imported\\n')\n"
+    )
+    yield targets_dir
+    for name in ("importer_pkg", "importer_pkg.sub"):
+        sys.modules.pop(name, None)
+
+
+def _targets_finders() -> list[object]:
+    return [f for f in sys.meta_path if isinstance(f, target_importer._TargetsFinder)]
+
+
+def test_import_target(targets_dir: Path) -> None:
+    path_before = list(sys.path)
+    finders_before = _targets_finders()
+    module = import_target(targets_dir, "importer_pkg.sub")
+    assert module.__name__ == "importer_pkg.sub"
+    assert module.__file__ == str(targets_dir / "importer_pkg" / "sub.py")
+    assert sys.path == path_before
+    assert import_target(targets_dir, "importer_pkg.sub") is module
+    assert _targets_finders() == finders_before
+    assert not target_importer._finders
+    assert not target_importer._finder_users
+
+
+def test_import_target_concurrently(targets_dir: Path) -> None:
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        modules = set(
+            executor.map(
+                lambda _: import_target(targets_dir, "importer_pkg.sub"), range(16)
+            )
+        )
+    assert len(modules) == 1
+    assert (targets_dir.parent / "imports.log").read_text() == "imported\n"
+    assert not _targets_finders()
+
+
+def test_import_target_of_other_targets_dir(targets_dir: Path) -> None:
+    other_targets_dir = targets_dir.parent / "other_targets"
+    other_targets_dir.mkdir()
+    (targets_dir / "importer_first_only.py").write_text("")
+    import_target(targets_dir, "importer_pkg")
+    # the first targets dir does not shadow the modules of a later one
+    with pytest.raises(ModuleNotFoundError):
+        import_target(other_targets_dir, "importer_first_only")
+    assert not _targets_finders()
+
+
+def test_import_missing_target_removes_the_finder(targets_dir: Path) -> None:
+    with pytest.raises(ModuleNotFoundError):
+        import_target(targets_dir, "missing_importer_pkg")
+    assert not _targets_finders()
+
+
+def test_import_target_does_not_shadow_installed_modules(targets_dir: Path) -> None:
+    (targets_dir / "json.py").write_text("raise RuntimeError")
+    import_target(targets_dir, "importer_pkg")
+    assert import_target(targets_dir, "json") is sys.modules["json"]
+    assert sys.modules["json"].__file__ != str(targets_dir / "json.py")
+
+
+def test_import_missing_target(targets_dir: Path) -> None:
+    with pytest.raises(ModuleNotFoundError):
+        import_target(targets_dir, "importer_pkg.missing")
+    with pytest.raises(ModuleNotFoundError):
+        import_target(targets_dir, "missing_importer_pkg")
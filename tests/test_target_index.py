@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from python_tool_competition_2024.config import Config
+from python_tool_competition_2024.source_analysis import (
+    FunctionInfo,
+    ParameterInfo,
+    ParameterKind,
+)
+from python_tool_competition_2024.target_index import (
+    TargetMetadata,
+    _encode_json,
+    _load_index,
+    analyse_source,
+    build_target_index,
+    get_target_index,
+)
+
+from .helpers import TARGETS_DIR, get_test_config
+
+_SOURCE = """\
+\"\"\"Some docstring.\"\"\"
+
+import os, sys
+from . import helpers
+from ..parent.module import value
+from typing import (
+    Any,
+)
+
+
+# some comment
+def example(number: int, *, flag: bool = False) -> int:
+    if number > 0 and flag or number < -5:
+        return [i for i in range(number) if i % 2 if i % 3][0]
+    while number:
+        try:
+            number -= 1
+        except ValueError:
+            pass
+    assert number == 0
+    return 1 if flag else 2
+"""
+
+
+def test_analyse_source() -> None:
+    assert analyse_source(_SOURCE, Path("example.py")) == TargetMetadata(
+        functions=(
+            FunctionInfo(
+                name="example",
+                lineno=12,
+                signature="(number: int, *, flag: bool=False) -> int",
+                parameters=(
+                    ParameterInfo(
+                        "number", ParameterKind.POSITIONAL_OR_KEYWORD, "int", None
+                    ),
+                    ParameterInfo("flag", ParameterKind.KEYWORD_ONLY, "bool", "False"),
+                ),
+                return_annotation="int",
+                is_async=False,
+            ),
+        ),
+        classes=(),
+        imports=(".", "..parent.module", "os", "sys", "typing"),
+        lines_of_code=17,
+        # if, 2 boolean operators, comprehension with 2 conditions, while,
+        # except, assert, if expression
+        complexity=1 + 1 + 2 + 3 + 1 + 1 + 1 + 1,
+    )
+
+
+def test_analyse_source_with_match() -> None:
+    source = "match x:\n    case 1:\n        pass\n    case _:\n        pass\n"
+    assert analyse_source(source, Path("example.py")).complexity == 3
+
+
+def test_build_and_reuse_index(tmp_path: Path) -> None:
+    config = _copy_targets(tmp_path)
+    sources = tuple(sorted(config.targets_dir.glob("**/*.py")))
+    index_file = config.cache_dir / "target_index.json"
+
+    build_target_index(sources, config)
+    assert index_file.exists()
+    metadata = {
+        source: get_target_index(config).get_metadata(source) for source in sources
+    }
+    assert tuple(f.name for f in metadata[sources[0]].functions) == (
+        "some_method",
+        "other_method",
+    )
+    assert metadata[sources[0]].complexity == 3
+    assert metadata[sources[-1]].imports == ("gzip",)
+
+    _load_index.cache_clear()
+    with mock.patch(
+        "python_tool_competition_2024.target_index.analyse_source"
+    ) as analyse_mock:
+        mock.seal(analyse_mock)
+        modified = index_file.stat().st_mtime_ns
+        build_target_index(sources, config)
+        assert index_file.stat().st_mtime_ns == modified
+        assert {
+            source: get_target_index(config).get_metadata(source) for source in sources
+        } == metadata
+
+
+def test_index_invalidation(tmp_path: Path) -> None:
+    config = _copy_targets(tmp_path)
+    source = config.targets_dir / "example2.py"
+    build_target_index((source,), config)
+    original = get_target_index(config).get_metadata(source)
+
+    # only touching the file keeps the metadata, but updates the index
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    _load_index.cache_clear()
+    with mock.patch(
+        "python_tool_competition_2024.target_index.analyse_source"
+    ) as analyse_mock:
+        mock.seal(analyse_mock)
+        build_target_index((source,), config)
+    assert get_target_index(config).get_metadata(source) == original
+    _load_index.cache_clear()
+    assert get_target_index(config)._entries[str(source)].mtime_ns == (
+        stat.st_mtime_ns + 10**9
+    )
+
+    source.write_text("import json\n", encoding="utf-8")
+    _load_index.cache_clear()
+    build_target_index((source,), config)
+    assert get_target_index(config).get_metadata(source) == TargetMetadata(
+        functions=(), classes=(), imports=("json",), lines_of_code=1, complexity=1
+    )
+
+
+@pytest.mark.parametrize(
+    "content", (b"def invalid(:\n", b"# -*- coding: unknown -*-\n", b"value = '\xff'\n")
+)
+def test_build_index_with_invalid_source(tmp_path: Path, content: bytes) -> None:
+    config = _copy_targets(tmp_path)
+    invalid = config.targets_dir / "example2.py"
+    invalid.write_bytes(content)
+    sources = tuple(sorted(config.targets_dir.glob("**/*.py")))
+    build_target_index(sources, config)
+    _load_index.cache_clear()
+    index = get_target_index(config)
+    assert index.get_metadata(invalid) == TargetMetadata(
+        functions=(), classes=(), imports=(), lines_of_code=0, complexity=1
+    )
+    assert index.get_metadata(sources[0]).complexity == 3
+    assert str(invalid) in index._entries
+
+
+@pytest.mark.parametrize(
+    "content",
+    (
+        "invalid json",
+        "[]",
+        json.dumps({"version": 0, "entries": {}}),
+        json.dumps({"version": 1, "entries": {"a": {"__type__": "Unknown"}}}),
+    ),
+)
+def test_invalid_index_is_ignored(tmp_path: Path, content: str) -> None:
+    config = _copy_targets(tmp_path)
+    source = config.targets_dir / "example2.py"
+    index_file = config.cache_dir / "target_index.json"
+    index_file.parent.mkdir(parents=True)
+    index_file.write_text(content, encoding="utf-8")
+    build_target_index((source,), config)
+    assert json.loads(index_file.read_text(encoding="utf-8"))["version"] == 1
+
+
+def test_encode_unknown_object() -> None:
+    with pytest.raises(TypeError, match=r"\AObject of type object is not JSON"):
+        _encode_json(object())
+
+
+def _copy_targets(tmp_path: Path) -> Config:
+    config = get_test_config(
+        show_commands=False, show_failures=False, root_dir=tmp_path
+    )
+    shutil.copytree(TARGETS_DIR, config.targets_dir)
+    return config